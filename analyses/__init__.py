@@ -22,6 +22,8 @@ Example:
 
 from abc import ABC, abstractmethod
 
+from analyses.validation import validate
+
 
 class AnalysisTemplate(ABC):
     """Base class for analysis templates."""
@@ -56,6 +58,13 @@ class AnalysisTemplate(ABC):
         """
         pass
 
+    def validate_data(self, data: dict) -> list[str]:
+        """Validate analysis data against get_input_schema().
+
+        Returns a list of error messages; empty when the data is valid.
+        """
+        return validate(data, self.get_input_schema())
+
 
 # Registry of all available templates
 REGISTRY: dict[str, AnalysisTemplate] = {}
@@ -0,0 +1,59 @@
+"""Validation of analysis data against template input schemas.
+
+Supports the subset of JSON Schema used by the templates' get_input_schema():
+type, properties, required, additionalProperties, items, enum, minimum and
+maximum.
+"""
+
+_TYPE_CHECKS = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: (
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+    ),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+
+def validate(data, schema: dict, path: str = "") -> list[str]:
+    """Validate data against a schema.
+
+    Returns a list of error messages (empty when the data is valid). Each
+    message is prefixed with the JSON Pointer of the offending value.
+    """
+    location = path or "/"
+    expected_type = schema.get("type")
+    if expected_type and not _TYPE_CHECKS[expected_type](data):
+        return [f"{location}: expected {expected_type}"]
+
+    errors = []
+    if "enum" in schema and data not in schema["enum"]:
+        errors.append(f"{location}: must be one of {schema['enum']}")
+    if "minimum" in schema and data < schema["minimum"]:
+        errors.append(f"{location}: must be at least {schema['minimum']}")
+    if "maximum" in schema and data > schema["maximum"]:
+        errors.append(f"{location}: must be at most {schema['maximum']}")
+
+    if isinstance(data, dict):
+        for field in schema.get("required", []):
+            if field not in data:
+                errors.append(f"{location}: missing required field '{field}'")
+        properties = schema.get("properties", {})
+        additional = schema.get("additionalProperties", True)
+        for key, value in data.items():
+            child_path = f"{path}/{key.replace('~', '~0').replace('/', '~1')}"
+            if key in properties:
+                errors.extend(validate(value, properties[key], child_path))
+            elif additional is False:
+                errors.append(f"{child_path}: unexpected field")
+            elif isinstance(additional, dict):
+                errors.extend(validate(value, additional, child_path))
+
+    if isinstance(data, list) and isinstance(schema.get("items"), dict):
+        for index, value in enumerate(data):
+            errors.extend(validate(value, schema["items"], f"{path}/{index}"))
+
+    return errors
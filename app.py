@@ -1,30 +1,142 @@
 """Business Analysis Webapp - Flask Application."""
 
+import hashlib
 import os
+import threading
 from pathlib import Path
+import click
 from flask import Flask, render_template, request, redirect, url_for, jsonify, send_file
 
-from db import init_db
-from db.migrations import run_migrations
-from models import business, research, analysis, summary
+import db
+from db import bootstrap, storage, writer
+from models import business, research, analysis, summary, search, jobs, blobs, uploads
+from services import bulk_import, job_runner, json_patch, pdf_renderer, upload_gc
 import analyses
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret-key")
-app.config["UPLOAD_FOLDER"] = Path(__file__).parent / "uploads"
 app.config["MAX_CONTENT_LENGTH"] = 50 * 1024 * 1024  # 50MB max upload
+db.init_app(app)
 
 
 # --- Initialization ---
 
 
+@app.cli.command("init-db")
+@click.option("--force", is_flag=True, help="Re-run even if the schema is current.")
+def init_db_command(force):
+    """Create the database schema and apply pending migrations."""
+    if bootstrap.ensure_schema(force=force):
+        click.echo("Database initialized.")
+    else:
+        click.echo("Database schema is already current.")
+
+
+@app.cli.command("import-urls")
+@click.argument("business_id", type=int)
+@click.argument("url_file", type=click.File("r"), default="-")
+@click.option("--type", "item_type", default="article", help="Research item type.")
+def import_urls_command(business_id, url_file, item_type):
+    """Import research items from a list of URLs (a file, or stdin)."""
+    if not business.get_by_id(business_id):
+        raise click.ClickException(f"Business {business_id} not found")
+    try:
+        urls = bulk_import.parse_urls(url_file.read())
+    except ValueError as e:
+        raise click.ClickException(str(e)) from None
+
+    def report(result):
+        if result["status"] == "created":
+            click.echo(f"created #{result['item_id']}  {result['url']}")
+        else:
+            click.echo(f"failed        {result['url']}: {result['error']}", err=True)
+
+    results = bulk_import.import_urls(business_id, urls, item_type, on_result=report)
+    created = sum(result["status"] == "created" for result in results)
+    click.echo(f"Imported {created} of {len(urls)} URLs.")
+
+
+@app.cli.command("refresh-urls")
+@click.argument("business_id", type=int)
+def refresh_urls_command(business_id):
+    """Re-fetch a business's URL-sourced research, updating changed pages."""
+    if not business.get_by_id(business_id):
+        raise click.ClickException(f"Business {business_id} not found")
+
+    def report(result):
+        line = f"{result['status']:10} {result['url']}"
+        if result["error"]:
+            line += f": {result['error']}"
+        click.echo(line)
+
+    results = bulk_import.refresh_business(business_id, on_result=report)
+    updated = sum(result["status"] == "updated" for result in results)
+    click.echo(f"Updated {updated} of {len(results)} items.")
+
+
+@app.cli.command("gc-uploads")
+@click.option("--dry-run", is_flag=True, help="List orphans without moving them.")
+@click.option(
+    "--grace-hours",
+    type=float,
+    default=None,
+    help="Override UPLOAD_GC_GRACE_HOURS.",
+)
+def gc_uploads_command(dry_run, grace_hours):
+    """Quarantine unreferenced upload files and delete expired quarantine."""
+    grace = None if grace_hours is None else grace_hours * 3600
+
+    def report(path, size):
+        click.echo(f"orphan {size:>12}  {path}")
+
+    result = upload_gc.collect(grace=grace, dry_run=dry_run, on_orphan=report)
+    prefix = "Would have quarantined" if dry_run else "Quarantined"
+    click.echo(
+        f"{prefix} {result['quarantined']} of {result['scanned']} files; "
+        f"deleted {result['deleted']} expired, reclaiming "
+        f"{result['bytes_reclaimed']} bytes; restored {result['restored']}."
+    )
+
+
+_services_pid: int | None = None
+_services_lock = threading.Lock()
+
+
+def start_services() -> None:
+    """Start this process's background services, once.
+
+    This runs when the process serves its first request, never on import:
+    CLI commands and tests import this module too, and so does every worker
+    process the renderer spawns, and none of them may start services.
+    """
+    global _services_pid
+    with _services_lock:
+        if _services_pid == os.getpid():
+            return
+        # Initialize the schema once per process, not per request. Processes
+        # started together coordinate through a file lock; once the stored
+        # schema fingerprint matches, this is a single query. Set
+        # DB_BOOTSTRAP=0 to skip it (e.g. when a deploy step runs
+        # `flask --app app init-db` instead).
+        if os.environ.get("DB_BOOTSTRAP", "1") != "0":
+            bootstrap.ensure_schema()
+        # Background workers for text extraction (JOB_WORKERS=0 disables
+        # them, e.g. to run extraction in a separate worker process instead)
+        job_runner.start_workers()
+        # Periodic clean-up of upload files nothing references
+        # (UPLOAD_GC_INTERVAL_S=0 disables it; `flask --app app gc-uploads`
+        # runs a full pass by hand)
+        upload_gc.start_collector()
+        # Warm PDF renderer processes, so exports never import WeasyPrint on a
+        # request thread (PDF_RENDER_PROCESSES=0 renders in-process instead)
+        pdf_renderer.start_render_pool()
+        _services_pid = os.getpid()
+
+
 @app.before_request
-def ensure_db():
-    """Ensure database is initialized and migrated on first request."""
-    if not hasattr(app, "_db_initialized"):
-        init_db()
-        run_migrations()
-        app._db_initialized = True
+def start_services_on_first_request() -> None:
+    if _services_pid != os.getpid():
+        start_services()
 
 
 # --- Main Page (Business List) ---
@@ -32,10 +144,18 @@ def ensure_db():
 
 @app.route("/")
 def index():
-    """Main page - list all businesses."""
-    businesses = business.get_all()
+    """Main page - list businesses, most recently active first."""
+    after = request.args.get("after")
+    try:
+        businesses, next_cursor = business.get_page(after)
+    except ValueError as e:
+        return str(e), 400
     return render_template(
-        "index.html", businesses=businesses, business_types=business.BUSINESS_TYPES
+        "index.html",
+        businesses=businesses,
+        business_types=business.BUSINESS_TYPES,
+        next_cursor=next_cursor,
+        is_first_page=after is None,
     )
 
 
@@ -59,11 +179,13 @@ def view_business(business_id: int):
         return "Business not found", 404
 
     # Get all data for this business
-    research_items = research.get_items_for_business(business_id)
+    research_items = research.get_items_for_business(business_id, "metadata")
 
-    # Get quotes for each research item
+    # Attach quotes to each research item (one query for the whole business).
+    # The text itself is fetched lazily from get_research_text.
+    quotes_by_item = research.get_quotes_for_business(business_id)
     for item in research_items:
-        item["quotes"] = research.get_quotes_for_item(item["id"])
+        item["quotes"] = quotes_by_item.get(item["id"], [])
 
     # Get analyses (list of created analyses)
     biz_analyses = analysis.get_analyses_for_business(business_id)
@@ -109,68 +231,275 @@ def delete_business(business_id: int):
 # --- Research Items ---
 
 
-@app.route("/business/<int:business_id>/research", methods=["POST"])
-def create_research_item(business_id: int):
-    """Create a new research item."""
-    title = request.form["title"]
-    item_type = request.form["type"]
-    source_reference = request.form.get("source_reference", "")
-    plain_text = request.form.get("plain_text", "")
-    original_file_path = ""
+def _create_item_from_form(
+    business_id: int, form, blob: dict | None = None, filename: str = ""
+) -> int:
+    """Create a research item from the add-research form fields.
 
-    # Handle file upload
-    if "file" in request.files:
-        file = request.files["file"]
-        if file.filename:
-            upload_dir = research.ensure_upload_dir(business_id)
-            file_path = upload_dir / file.filename
-            file.save(file_path)
-            original_file_path = str(file_path)
-
-            # Try to extract text if it's a PDF or audio
-            if not plain_text:
-                try:
-                    from services import gemini
-
-                    ext = file_path.suffix.lower()
-                    if ext == ".pdf":
-                        plain_text = gemini.extract_text_from_pdf(file_path)
-                    elif ext in [".mp3", ".wav", ".m4a", ".ogg", ".flac"]:
-                        plain_text = gemini.transcribe_audio(file_path)
-                except Exception as e:
-                    # Log error but continue - user can paste text manually
-                    print(f"Error extracting text: {e}")
+    blob is the uploaded file, if any (see blobs); its extraction is queued
+    as a background job. Returns the new item ID.
+    """
+    title = form["title"]
+    item_type = form["type"]
+    source_reference = form.get("source_reference", "")
+    plain_text = form.get("plain_text", "")
+    extraction_job = None
+
+    # Extract text from a PDF or audio file in the background; the item is
+    # 'pending' until a worker fills in its text
+    if blob and not plain_text:
+        extraction_job = job_runner.job_kind_for_file(Path(filename))
 
     # Try to extract text from URL if provided and no text yet
     if (
         not plain_text
+        and not extraction_job
         and source_reference
         and source_reference.startswith(("http://", "https://"))
     ):
         try:
             from services import extractor
 
-            text = extractor.extract_from_url(source_reference)
+            text = extractor.extract_from_url(
+                source_reference, cache=extractor.get_url_cache()
+            )
             if text:
                 plain_text = text
         except Exception as e:
             print(f"Error extracting from URL: {e}")
 
-    research.create_item(
+    item_id = research.create_item(
         business_id=business_id,
         title=title,
         item_type=item_type,
         source_reference=source_reference,
         plain_text=plain_text,
-        original_file_path=original_file_path,
+        original_file_path=str(blobs.path_for(blob)) if blob else "",
+        extraction_job=extraction_job,
+        blob_sha256=blob["sha256"] if blob else None,
+    )
+    if extraction_job:
+        job_runner.notify()
+    return item_id
+
+
+@app.route("/business/<int:business_id>/research", methods=["POST"])
+def create_research_item(business_id: int):
+    """Create a new research item."""
+    blob = None
+    filename = ""
+
+    # Handle file upload: stored once per distinct content (see blobs)
+    if "file" in request.files:
+        file = request.files["file"]
+        if file.filename:
+            blob = blobs.store(file.stream, file.filename)
+            filename = file.filename
+
+    _create_item_from_form(business_id, request.form, blob, filename)
+    return redirect(url_for("view_business", business_id=business_id) + "#research")
+
+
+# --- Resumable Uploads ---
+# Large files can be sent in chunks instead (see models/uploads): create an
+# upload, PATCH its bytes in order (resuming from the offset GET reports after
+# a dropped connection), then complete it with the add-research form fields.
+
+
+def _upload_response(upload: dict, status: int = 200):
+    response = jsonify(
+        {
+            "id": upload["id"],
+            "filename": upload["filename"],
+            "offset": upload["bytes_received"],
+            "length": upload["length"],
+            "url": url_for("get_upload", upload_id=upload["id"]),
+        }
     )
+    response.status_code = status
+    response.headers["Upload-Offset"] = str(upload["bytes_received"])
+    response.headers["Upload-Length"] = str(upload["length"])
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@app.route("/business/<int:business_id>/uploads", methods=["POST"])
+def create_upload(business_id: int):
+    """Start a resumable upload from JSON {"filename", "length"}."""
+    if not business.get_by_id(business_id):
+        return jsonify({"error": "Business not found"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = uploads.create(
+            business_id, str(data.get("filename", "")), int(data.get("length", 0))
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    response = _upload_response(upload, 201)
+    response.headers["Location"] = url_for("get_upload", upload_id=upload["id"])
+    return response
+
+
+@app.route("/uploads/<upload_id>")
+def get_upload(upload_id: str):
+    """Report how many bytes of an upload have arrived (also as HEAD)."""
+    upload = uploads.get(upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found"}), 404
+    return _upload_response(upload)
+
+
+@app.route("/uploads/<upload_id>", methods=["PATCH"])
+def append_upload(upload_id: str):
+    """Append the request body at the Upload-Offset header's offset.
+
+    An optional Upload-Checksum header ("sha256 <base64 digest>") is checked
+    before the chunk is kept.
+    """
+    if request.mimetype != "application/offset+octet-stream":
+        return jsonify({"error": "Expected application/offset+octet-stream"}), 415
+    offset = request.headers.get("Upload-Offset", "")
+    if not offset.isdigit():
+        return jsonify({"error": "Upload-Offset header required"}), 400
+    try:
+        checksum = request.headers.get("Upload-Checksum")
+        upload = uploads.append(
+            upload_id,
+            int(offset),
+            request.stream,
+            uploads.parse_checksum(checksum) if checksum else None,
+        )
+    except uploads.OffsetMismatchError as e:
+        response = jsonify({"error": str(e), "offset": e.offset})
+        response.status_code = 409
+        response.headers["Upload-Offset"] = str(e.offset)
+        return response
+    except uploads.ChecksumMismatchError as e:
+        return jsonify({"error": str(e)}), "460 Checksum Mismatch"
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not upload:
+        return jsonify({"error": "Upload not found"}), 404
+    return "", 204, {"Upload-Offset": str(upload["bytes_received"])}
+
+
+@app.route("/uploads/<upload_id>", methods=["DELETE"])
+def delete_upload(upload_id: str):
+    """Abandon an upload."""
+    if not uploads.delete(upload_id):
+        return jsonify({"error": "Upload not found"}), 404
+    return "", 204
+
+
+@app.route("/uploads/<upload_id>/complete", methods=["POST"])
+def complete_upload(upload_id: str):
+    """Turn a fully received upload into a research item.
+
+    Takes the add-research form fields (title, type, ...) as form data or
+    JSON, and returns {"item_id", "redirect"}.
+    """
+    upload = uploads.get(upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found"}), 404
+    form = request.get_json(silent=True) or request.form
+    if not form.get("title") or form.get("type") not in research.ITEM_TYPES:
+        return jsonify({"error": "A title and a valid type are required"}), 400
+    try:
+        finished = uploads.finish(upload_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    if not finished:
+        return jsonify({"error": "Upload not found"}), 404
+    blob, filename = finished
+    item_id = _create_item_from_form(upload["business_id"], form, blob, filename)
+    redirect_url = url_for("view_business", business_id=upload["business_id"])
+    return jsonify({"item_id": item_id, "redirect": redirect_url + "#research"}), 201
+
+
+@app.route("/business/<int:business_id>/research/bulk", methods=["POST"])
+def bulk_import_research(business_id: int):
+    """Create research items from a list of URLs, pasted or in a text file.
+
+    Each URL becomes a pending item at once; background jobs fetch the pages.
+    """
+    if not business.get_by_id(business_id):
+        return "Business not found", 404
+
+    text = request.form.get("urls", "")
+    url_file = request.files.get("url_file")
+    if url_file and url_file.filename:
+        text += "\n" + url_file.read().decode("utf-8", errors="replace")
+    try:
+        urls = bulk_import.parse_urls(text)
+        bulk_import.queue_import(business_id, urls, request.form.get("type", "article"))
+    except ValueError as e:
+        return str(e), 400
+    job_runner.notify()
     return redirect(url_for("view_business", business_id=business_id) + "#research")
 
 
+@app.route("/business/<int:business_id>/research/refresh", methods=["POST"])
+def refresh_research_urls(business_id: int):
+    """Queue re-fetching the business's URL-sourced research, so changed pages
+    get updated in the background."""
+    if not business.get_by_id(business_id):
+        return "Business not found", 404
+    if bulk_import.queue_refresh(business_id):
+        job_runner.notify()
+    return redirect(url_for("view_business", business_id=business_id) + "#research")
+
+
+@app.route("/research/<int:item_id>/status")
+def get_research_status(item_id: int):
+    """Report a research item's status and its latest extraction job.
+
+    While the job runs, job.progress counts its finished parts; pass
+    ?partial=1 to also get the text extracted so far.
+    """
+    item = research.get_item_by_id(item_id, "metadata")
+    if not item:
+        return jsonify({"error": "Item not found"}), 404
+
+    job = jobs.get_latest_job_for_item(item_id)
+    if job:
+        progress = jobs.get_progress(job)
+        result = jobs.get_result(job)
+        job = {key: job[key] for key in ("id", "kind", "status", "attempts", "error")}
+        if result:
+            job["result"] = result
+        if progress:
+            if not request.args.get("partial"):
+                del progress["partial_text"]
+            job["progress"] = progress
+    return jsonify(
+        {
+            "id": item_id,
+            "status": item["status"],
+            "text_length": item["text_length"],
+            "job": job,
+        }
+    )
+
+
+@app.route("/research/<int:item_id>/text")
+def get_research_text(item_id: int):
+    """Get a research item's text as JSON (loaded when the item is expanded)."""
+    item = research.get_item_by_id(item_id, "text")
+    if not item:
+        return jsonify({"error": "Item not found"}), 404
+
+    plain_text = item["plain_text"] or ""
+    response = jsonify({"id": item_id, "plain_text": plain_text})
+    response.set_etag(hashlib.sha256(plain_text.encode("utf-8")).hexdigest())
+    # Always revalidate: the ETag makes repeat fetches a cheap 304
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
 @app.route("/research/<int:item_id>/update", methods=["POST"])
 def update_research_item(item_id: int):
     """Update a research item."""
-    item = research.get_item_by_id(item_id)
+    item = research.get_item_by_id(item_id, "metadata")
     if not item:
         return "Item not found", 404
 
@@ -188,7 +517,7 @@ def update_research_item(item_id: int):
 @app.route("/research/<int:item_id>/delete", methods=["POST"])
 def delete_research_item(item_id: int):
     """Delete a research item."""
-    item = research.get_item_by_id(item_id)
+    item = research.get_item_by_id(item_id, "metadata")
     if not item:
         return "Item not found", 404
 
@@ -220,6 +549,18 @@ def delete_quote(quote_id: int):
     return jsonify({"success": True})
 
 
+# --- Search ---
+
+
+@app.route("/business/<int:business_id>/search")
+def search_research(business_id: int):
+    """Full-text search over a business's research items and quotes."""
+    query = request.args.get("q", "").strip()
+    limit = min(request.args.get("limit", 20, type=int), 100)
+    results = search.search_business(business_id, query, limit) if query else []
+    return jsonify({"query": query, "results": results})
+
+
 # --- Analyses ---
 
 
@@ -249,8 +590,38 @@ def save_analysis_route(business_id: int, analysis_id: int):
         return jsonify({"error": "Analysis not found"}), 404
 
     data = request.get_json()
-    analysis.save_analysis_by_id(analysis_id, data)
-    return jsonify({"success": True})
+    version = analysis.save_analysis_by_id(analysis_id, data)
+    return jsonify({"success": True, "version": version})
+
+
+@app.route(
+    "/business/<int:business_id>/analysis/<int:analysis_id>", methods=["PATCH"]
+)
+def patch_analysis_route(business_id: int, analysis_id: int):
+    """Apply a JSON Patch to analysis data.
+
+    An optional If-Match header carrying the analysis version guards against
+    patching data that another save has changed in the meantime.
+    """
+    if_match = request.headers.get("If-Match", "").strip('"')
+    expected_version = int(if_match) if if_match.isdigit() else None
+
+    try:
+        version = analysis.patch_analysis(
+            analysis_id, business_id, request.get_json(), expected_version
+        )
+    except json_patch.JsonPatchError as e:
+        return jsonify({"error": f"Invalid patch: {e}"}), 400
+    except analysis.AnalysisValidationError as e:
+        return jsonify({"error": "Invalid analysis data", "details": e.errors}), 422
+    except analysis.VersionConflictError as e:
+        return jsonify({"error": "Version conflict", "version": e.current_version}), 412
+
+    if version is None:
+        return jsonify({"error": "Analysis not found"}), 404
+    response = jsonify({"success": True, "version": version})
+    response.set_etag(str(version))
+    return response
 
 
 @app.route(
@@ -320,19 +691,57 @@ def save_summary(business_id: int):
 
 @app.route("/business/<int:business_id>/summary/pdf")
 def export_summary_pdf(business_id: int):
-    """Export summary as PDF."""
+    """Export summary as PDF.
+
+    The PDF's ETag is the hash of the markdown and stylesheet it is rendered
+    from, so revalidating an unchanged summary gets a 304 without rendering.
+    """
     biz = business.get_by_id(business_id)
     if not biz:
         return "Business not found", 404
 
-    output_path = Path(app.config["UPLOAD_FOLDER"]) / str(business_id) / "summary.pdf"
+    biz_summary = summary.get_summary(business_id)
+    if biz_summary and summary.pdf_cache_key(biz_summary) in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(summary.pdf_cache_key(biz_summary))
+        return response
     try:
-        summary.export_to_pdf(business_id, output_path)
-        return send_file(
-            output_path, as_attachment=True, download_name=f"{biz['name']}_summary.pdf"
-        )
+        path = summary.export_to_pdf(business_id)
     except ValueError as e:
         return str(e), 400
+    except pdf_renderer.RenderError as e:
+        return str(e), 503
+    return send_file(
+        path,
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=f"{biz['name']}_summary.pdf",
+        etag=path.stem,
+        max_age=0,
+    )
+
+
+# --- Diagnostics ---
+
+
+@app.route("/stats")
+def stats():
+    """Process-level counters (connection pool, writer, storage, jobs, caches)."""
+    from services import extractor, gemini
+
+    return jsonify(
+        {
+            "db_pool": db.pool_stats(),
+            "db_writer": writer.writer_stats(),
+            "db_storage": storage.storage_stats(),
+            "jobs": jobs.count_by_status(),
+            "gemini_cache": gemini.cache_stats(),
+            "url_cache": extractor.url_cache_stats(),
+            "upload_gc": upload_gc.collector_stats(),
+            "pdf_renderer": pdf_renderer.renderer_stats(),
+            "counters": db.get_counters(),
+        }
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+"""Benchmark: database connection setups per business page render.
+
+Renders ``/business/<id>`` against a throwaway database twice:
+
+- *before*: every model call opens (and closes) its own connection, which is
+  how the models behaved before request-scoped connections existed.
+- *after*: one pooled connection per request, bound to ``flask.g``.
+
+Usage:
+    uv run python benchmarks/bench_connections.py [--items 50] [--requests 20]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+from db.migrations import run_migrations  # noqa: E402
+from models import analysis, business, research, summary  # noqa: E402
+
+
+def seed(items: int) -> int:
+    """Create a business with research items, quotes and analyses."""
+    business_id = business.create("Bench Co", "", "company", "")
+    for i in range(items):
+        item_id = research.create_item(
+            business_id, f"Interview {i}", "interview", plain_text="lorem ipsum " * 50
+        )
+        research.create_quote(item_id, 0, 11, "lorem ipsum")
+    for slug in ("pestel", "five_forces", "vrio"):
+        analysis.create_analysis(business_id, slug, slug)
+    summary.save_summary(business_id, "# Summary")
+    return business_id
+
+
+def run(client, business_id: int, requests: int) -> tuple[int, float]:
+    """Render the business page; return (connections opened, seconds)."""
+    db.reset_pool()
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(f"/business/{business_id}")
+        assert response.status_code == 200
+    elapsed = time.perf_counter() - start
+    return db.pool_stats()["connects"], elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = Path(tmp) / "bench.db"
+        db.init_db()
+        run_migrations()
+        business_id = seed(args.items)
+
+        from app import app
+
+        client = app.test_client()
+
+        # Legacy behaviour: no request scope and nothing kept idle
+        with patch("db.has_app_context", return_value=False), patch.object(
+            db, "POOL_SIZE", 0
+        ):
+            before, before_time = run(client, business_id, args.requests)
+
+        after, after_time = run(client, business_id, args.requests)
+        db.reset_pool()
+
+    print(f"Business page with {args.items} research items, {args.requests} requests")
+    print(f"{'':8} {'connects/request':>17} {'ms/request':>11}")
+    for label, connects, elapsed in (
+        ("before", before, before_time),
+        ("after", after, after_time),
+    ):
+        print(
+            f"{label:8} {connects / args.requests:>17.1f} "
+            f"{elapsed * 1000 / args.requests:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark: local-first PDF extraction against sending every page to Gemini.
+
+For each PDF, times the local text-layer pass and counts the pages (and API
+calls) that still go to Gemini, next to the Gemini-only baseline. Without
+arguments a sample set is generated: a born-digital report, a mixed document
+with scanned pages, and a fully scanned one.
+
+By default Gemini is not called: fallback ranges are counted, not sent. With
+--gemini (and GEMINI_API_KEY set) both paths run for real and are timed.
+
+Usage:
+    uv run python benchmarks/bench_pdf_extraction.py [PDF or directory ...] [--gemini]
+"""
+
+import argparse
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pypdf import PdfWriter  # noqa: E402
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject  # noqa: E402
+
+from services import gemini, pdf_text  # noqa: E402
+
+LINE = "Revenue grew in every segment, led by industrial pumps and valves."
+
+
+def write_sample(path: Path, pages: int, scanned_every: int | None) -> Path:
+    """Write a PDF with a text layer, leaving every nth page blank (scanned)."""
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    for n in range(1, pages + 1):
+        page = writer.add_blank_page(width=612, height=792)
+        if scanned_every and n % scanned_every == 0:
+            continue
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+        lines = " ".join(f"({LINE}) Tj T*" for _ in range(40))
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 10 Tf 14 TL 50 750 Td {lines} ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(stream)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+def sample_set(directory: Path) -> list[Path]:
+    return [
+        write_sample(directory / "born-digital.pdf", 60, None),
+        write_sample(directory / "mixed.pdf", 60, 4),
+        write_sample(directory / "scanned.pdf", 20, 1),
+    ]
+
+
+def find_pdfs(paths: list[str]) -> list[Path]:
+    found = []
+    for path in map(Path, paths):
+        found.extend(sorted(path.glob("*.pdf")) if path.is_dir() else [path])
+    return found
+
+
+def run(path: Path, call_gemini: bool) -> dict:
+    sent = []
+    if not call_gemini:
+
+        def count_ranges(
+            file_path, ranges, concurrency=None, on_result=None, file_hash=None
+        ):
+            sent.extend(ranges)
+            return ["" for _ in ranges]
+
+        gemini.extract_page_ranges = count_ranges
+
+    start = time.perf_counter()
+    _, result = pdf_text.extract_text(path)
+    local_first = time.perf_counter() - start
+
+    pages = result["pages"] or []
+    row = {
+        "pages": len(pages),
+        "to gemini": pages.count(pdf_text.GEMINI),
+        "calls": len(pdf_text.fallback_ranges(pages, gemini.PDF_PAGES_PER_CHUNK)),
+        "baseline calls": math.ceil(len(pages) / gemini.PDF_PAGES_PER_CHUNK),
+        "local-first s": local_first,
+    }
+    if call_gemini:
+        start = time.perf_counter()
+        gemini.extract_text_from_pdf(path)
+        row["gemini-only s"] = time.perf_counter() - start
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="PDF files or directories")
+    parser.add_argument("--gemini", action="store_true", help="call the real API")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdfs = find_pdfs(args.paths) if args.paths else sample_set(Path(tmp))
+        columns = ["pages", "to gemini", "calls", "baseline calls", "local-first s"]
+        if args.gemini:
+            columns.append("gemini-only s")
+        print(f"{'file':24}" + "".join(f"{c:>16}" for c in columns))
+        for path in pdfs:
+            row = run(path, args.gemini)
+            print(
+                f"{path.name[:24]:24}"
+                + "".join(
+                    f"{row[c]:>16.3f}" if isinstance(row[c], float) else f"{row[c]:>16}"
+                    for c in columns
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
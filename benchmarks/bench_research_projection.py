@@ -0,0 +1,86 @@
+"""Benchmark: research item projections with large transcripts.
+
+Loads a business's research items (each holding a ~1 MB transcript) with
+every projection in ``research.ITEM_PROJECTIONS`` and reports latency and
+peak Python memory.
+
+Usage:
+    uv run python benchmarks/bench_research_projection.py [--items 20] [--size-mb 1]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+from db.migrations import run_migrations  # noqa: E402
+from models import business, research  # noqa: E402
+
+ROUNDS = 5
+
+
+def measure(func) -> tuple[float, float]:
+    """Return (median seconds, peak MB) over a few rounds of ``func``."""
+    timings = []
+    peak = 0
+    for _ in range(ROUNDS):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    timings.sort()
+    return timings[len(timings) // 2], peak / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    transcript = ("Speaker 1: the quick brown fox jumps over the lazy dog. " * 20_000)[
+        : int(args.size_mb * 1024 * 1024)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = Path(tmp) / "bench.db"
+        db.init_db()
+        run_migrations()
+        business_id = business.create("Bench Co", "", "company", "")
+        item_ids = [
+            research.create_item(
+                business_id, f"Interview {i}", "interview", plain_text=transcript
+            )
+            for i in range(args.items)
+        ]
+
+        print(
+            f"{args.items} research items x {len(transcript) / 1024 / 1024:.1f} MB "
+            f"(median of {ROUNDS})"
+        )
+        print(f"{'query':34} {'ms':>9} {'peak MB':>9}")
+        for projection in research.ITEM_PROJECTIONS:
+            cases = {
+                f"get_items_for_business({projection})": lambda: (
+                    research.get_items_for_business(business_id, projection)
+                ),
+                f"get_item_by_id({projection})": lambda: [
+                    research.get_item_by_id(item_id, projection)
+                    for item_id in item_ids
+                ],
+            }
+            for label, func in cases.items():
+                seconds, peak_mb = measure(func)
+                print(f"{label:34} {seconds * 1000:>9.2f} {peak_mb:>9.2f}")
+        db.reset_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark: full-text research search over a synthetic corpus.
+
+Builds research items from 100k synthetic paragraphs (Zipf-distributed
+vocabulary), then compares ``search.search_business`` against the
+``LIKE '%term%'`` scan that was the only alternative before the FTS index.
+
+Usage:
+    uv run python benchmarks/bench_search.py [--paragraphs 100000] [--per-item 100]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+from db.migrations import run_migrations  # noqa: E402
+from models import business, search  # noqa: E402
+
+ROUNDS = 5
+WORDS_PER_PARAGRAPH = 60
+
+
+def make_vocabulary(rng: random.Random, size: int = 20_000) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        for _ in range(size)
+    ]
+
+
+def median_ms(func) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def like_scan(business_id: int, term: str) -> list:
+    with db.connection() as conn:
+        return conn.execute(
+            """SELECT id, title FROM research_items
+               WHERE business_id = ? AND (title LIKE ? OR plain_text LIKE ?)""",
+            (business_id, f"%{term}%", f"%{term}%"),
+        ).fetchall()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=100_000)
+    parser.add_argument("--per-item", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = Path(tmp) / "bench.db"
+        db.init_db()
+        run_migrations()
+        business_id = business.create("Bench Co", "", "company", "")
+
+        item_count = args.paragraphs // args.per_item
+        words = iter(
+            rng.choices(vocabulary, weights, k=args.paragraphs * WORDS_PER_PARAGRAPH)
+        )
+        texts = [
+            "\n\n".join(
+                " ".join(next(words) for _ in range(WORDS_PER_PARAGRAPH))
+                for _ in range(args.per_item)
+            )
+            for _ in range(item_count)
+        ]
+
+        start = time.perf_counter()
+        with db.connection() as conn:
+            conn.executemany(
+                """INSERT INTO research_items
+                   (business_id, title, item_type, plain_text)
+                   VALUES (?, ?, 'interview', ?)""",
+                [
+                    (business_id, f"Transcript {i}", text)
+                    for i, text in enumerate(texts)
+                ],
+            )
+            conn.commit()
+        build_seconds = time.perf_counter() - start
+        size_mb = db.DATABASE_PATH.stat().st_size / 1024 / 1024
+
+        print(
+            f"{args.paragraphs:,} paragraphs in {item_count:,} research items "
+            f"(indexed insert {build_seconds:.1f}s, database {size_mb:.0f} MB)"
+        )
+        queries = {
+            "common term": vocabulary[0],
+            "mid-frequency term": vocabulary[200],
+            "rare term": vocabulary[-1],
+            "two terms": f"{vocabulary[10]} {vocabulary[500]}",
+        }
+        print(f"{'query':20} {'hits':>6} {'fts ms':>9} {'like ms':>9}")
+        for label, query in queries.items():
+            hits = len(search.search_business(business_id, query, limit=20))
+            fts = median_ms(lambda: search.search_business(business_id, query, limit=20))
+            first_term = query.split()[0]
+            like = median_ms(lambda: like_scan(business_id, first_term))
+            print(f"{label:20} {hits:>6} {fts:>9.2f} {like:>9.2f}")
+        db.reset_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Benchmark: concurrent reads and writes under each storage profile.
+
+Runs reader threads that repeatedly load research items while one writer
+thread saves analysis data (an autosave stream) for a fixed duration, once
+per profile in ``storage.PROFILES``, and reports throughput and tail latency.
+
+Usage:
+    uv run python benchmarks/bench_storage.py [--readers 4] [--seconds 5]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db  # noqa: E402
+from db import storage  # noqa: E402
+from db.migrations import run_migrations  # noqa: E402
+
+
+def seed(conn) -> tuple[int, int]:
+    """Create a business with research items and one analysis to autosave."""
+    business_id = conn.execute(
+        "INSERT INTO businesses (name, type) VALUES ('Bench Co', 'company')"
+    ).lastrowid
+    conn.executemany(
+        """INSERT INTO research_items (business_id, title, item_type, plain_text)
+           VALUES (?, ?, 'interview', ?)""",
+        [(business_id, f"Interview {i}", "lorem ipsum " * 500) for i in range(50)],
+    )
+    analysis_id = conn.execute(
+        """INSERT INTO analyses (business_id, name, template_type, data_json)
+           VALUES (?, 'VRIO', 'vrio', '{}')""",
+        (business_id,),
+    ).lastrowid
+    conn.commit()
+    return business_id, analysis_id
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_profile(profile: str, readers: int, seconds: float) -> dict:
+    storage.PROFILE = profile
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = Path(tmp) / "bench.db"
+        db.init_db()
+        run_migrations()
+        setup = db.get_db()
+        business_id, analysis_id = seed(setup)
+        setup.close()
+
+        deadline = time.perf_counter() + seconds
+        read_latencies: list[float] = []
+        write_latencies: list[float] = []
+        errors = []
+        lock = threading.Lock()
+
+        def reader():
+            conn = db.get_db()
+            latencies = []
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    conn.execute(
+                        "SELECT id, title, length(plain_text) FROM research_items "
+                        "WHERE business_id = ?",
+                        (business_id,),
+                    ).fetchall()
+                except Exception as e:
+                    errors.append(e)
+                latencies.append(time.perf_counter() - start)
+            conn.close()
+            with lock:
+                read_latencies.extend(latencies)
+
+        def writer():
+            conn = db.get_db()
+            version = 0
+            while time.perf_counter() < deadline:
+                version += 1
+                data = json.dumps({"resources": [{"name": "Brand", "n": version}]})
+                start = time.perf_counter()
+                try:
+                    conn.execute(
+                        """UPDATE analyses SET data_json = ?, version = version + 1,
+                           updated_at = CURRENT_TIMESTAMP WHERE id = ?""",
+                        (data, analysis_id),
+                    )
+                    conn.commit()
+                except Exception as e:
+                    errors.append(e)
+                    conn.rollback()
+                write_latencies.append(time.perf_counter() - start)
+            conn.close()
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {
+            "reads/s": len(read_latencies) / seconds,
+            "writes/s": len(write_latencies) / seconds,
+            "read p99 ms": percentile(read_latencies, 0.99) * 1000,
+            "write p99 ms": percentile(write_latencies, 0.99) * 1000,
+            "errors": len(errors),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(
+        f"{args.readers} readers + 1 autosave writer, {args.seconds:.0f}s per profile"
+    )
+    columns = ["reads/s", "writes/s", "read p99 ms", "write p99 ms", "errors"]
+    print(f"{'profile':12}" + "".join(f"{c:>14}" for c in columns))
+    for profile in storage.PROFILES:
+        result = run_profile(profile, args.readers, args.seconds)
+        print(f"{profile:12}" + "".join(f"{result[c]:>14.1f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,166 @@
-"""Database connection and initialization."""
+"""Database connection and initialization.
+
+Model functions borrow connections through :func:`connection`. Inside a Flask
+request every call shares one connection bound to ``flask.g`` (returned to the
+pool on teardown); outside a request each call checks a connection out of the
+per-process pool for the duration of the ``with`` block.
+"""
+
+import hashlib
+import os
 import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
+
+from flask import Flask, g, has_app_context
 
 DATABASE_PATH = Path(__file__).parent.parent / "data" / "business_analysis.db"
 SCHEMA_PATH = Path(__file__).parent / "schema.sql"
 
+# Maximum number of idle connections kept per process. Checkouts beyond this
+# still succeed; the surplus connections are closed when they are released.
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+
 
 def get_db() -> sqlite3.Connection:
-    """Get a database connection with row factory enabled."""
+    """Open a new database connection with row factory enabled.
+
+    Prefer :func:`connection`, which reuses pooled connections. This is the
+    connection factory used by the pool and by one-off maintenance code. The
+    active storage profile (see :mod:`db.storage`) is applied to every
+    connection.
+    """
+    from db import storage
+
     DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DATABASE_PATH)
+    # Pooled connections may be released by a different thread than the one
+    # that opened them; the pool guarantees a single user at a time.
+    conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
+    storage.apply_profile(conn)
     return conn
 
 
+class ConnectionPool:
+    """A bounded pool of idle connections to a single database file."""
+
+    def __init__(self, path: Path, size: int):
+        self.path = path
+        self.size = size
+        self.pid = os.getpid()
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self.stats = {"connects": 0, "checkouts": 0, "discarded": 0}
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out an idle connection, opening a new one if none is free."""
+        with self._lock:
+            self.stats["checkouts"] += 1
+            if self._idle:
+                return self._idle.pop()
+            self.stats["connects"] += 1
+        return get_db()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, discarding it if the pool is full."""
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self.stats["discarded"] += 1
+            return
+
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+            self.stats["discarded"] += 1
+        conn.close()
+
+    def close_all(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Get this process's connection pool.
+
+    The pool is rebuilt after a fork (connections must not cross processes)
+    and when ``DATABASE_PATH`` has been pointed somewhere else.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid() or _pool.path != DATABASE_PATH:
+            if _pool is not None and _pool.pid == os.getpid():
+                _pool.close_all()
+            _pool = ConnectionPool(DATABASE_PATH, POOL_SIZE)
+        return _pool
+
+
+def reset_pool() -> None:
+    """Close all pooled connections and forget the pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close_all()
+        _pool = None
+
+
+def pool_stats() -> dict:
+    """Return connection counters for this process's pool."""
+    pool = get_pool()
+    with pool._lock:
+        return {**pool.stats, "idle": len(pool._idle), "size": pool.size}
+
+
+@contextmanager
+def connection() -> Iterator[sqlite3.Connection]:
+    """Borrow a database connection.
+
+    Within a Flask app context the request's shared connection is returned
+    (and stays open after the block); otherwise a pooled connection is
+    checked out and released when the block exits.
+    """
+    if has_app_context():
+        if "db_conn" not in g:
+            g.db_conn = get_pool().acquire()
+        yield g.db_conn
+        return
+
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def close_request_connection(exc: BaseException | None = None) -> None:
+    """Return the request's connection to the pool (app context teardown)."""
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        get_pool().release(conn)
+
+
+def init_app(app: Flask) -> None:
+    """Register request-scoped connection handling on a Flask app."""
+    app.teardown_appcontext(close_request_connection)
+
+
 def init_db() -> None:
     """Initialize the database with the schema."""
     conn = get_db()
@@ -23,6 +169,28 @@ def init_db() -> None:
     conn.close()
 
 
+def content_hash(text: str) -> str:
+    """Hash stored content so unchanged saves can be detected."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Process-wide event counters (e.g. elided writes), reported by /stats
+_counters: Counter = Counter()
+_counters_lock = threading.Lock()
+
+
+def increment_counter(name: str, amount: int = 1) -> None:
+    """Add to a named process-wide counter."""
+    with _counters_lock:
+        _counters[name] += amount
+
+
+def get_counters() -> dict:
+    """Return a snapshot of the process-wide counters."""
+    with _counters_lock:
+        return dict(_counters)
+
+
 def dict_from_row(row: sqlite3.Row | None) -> dict | None:
     """Convert a sqlite3.Row to a dictionary."""
     if row is None:
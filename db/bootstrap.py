@@ -0,0 +1,108 @@
+"""Startup-time schema initialization, safe across worker processes.
+
+:func:`ensure_schema` runs ``schema.sql`` and any pending migrations once per
+schema change rather than once per process. A fingerprint of the schema file
+and the migration list is stored in the database; when it matches, startup
+costs a single query. Otherwise the first process to take an exclusive lock on
+``<database>.lock`` does the work while the others wait, then find the new
+fingerprint and skip it.
+"""
+
+import hashlib
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import db
+from db import migrations
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def schema_fingerprint() -> str:
+    """Hash the schema file and the names of all registered migrations."""
+    digest = hashlib.sha256(db.SCHEMA_PATH.read_bytes())
+    for version, migration_func in migrations.MIGRATIONS:
+        digest.update(f"\n{version}:{migration_func.__name__}".encode())
+    return digest.hexdigest()
+
+
+def get_stored_fingerprint(conn: sqlite3.Connection) -> str | None:
+    try:
+        row = conn.execute(
+            "SELECT value FROM schema_meta WHERE key = 'fingerprint'"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Table doesn't exist yet
+        return None
+    return row["value"] if row else None
+
+
+def set_stored_fingerprint(conn: sqlite3.Connection, fingerprint: str) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_meta (key TEXT PRIMARY KEY, value TEXT)"
+    )
+    conn.execute(
+        """INSERT INTO schema_meta (key, value) VALUES ('fingerprint', ?)
+           ON CONFLICT(key) DO UPDATE SET value = excluded.value""",
+        (fingerprint,),
+    )
+    conn.commit()
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive, blocking lock on ``path`` across processes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _fingerprint_matches(fingerprint: str) -> bool:
+    conn = db.get_db()
+    try:
+        return get_stored_fingerprint(conn) == fingerprint
+    finally:
+        conn.close()
+
+
+def ensure_schema(force: bool = False) -> bool:
+    """Bring the database up to date with the schema and migrations.
+
+    Returns True if this process initialized or migrated the database, False
+    if it was already current (or another process brought it up to date
+    while this one waited for the lock).
+    """
+    fingerprint = schema_fingerprint()
+    if not force and _fingerprint_matches(fingerprint):
+        return False
+
+    lock_path = db.DATABASE_PATH.with_name(db.DATABASE_PATH.name + ".lock")
+    with file_lock(lock_path):
+        if not force and _fingerprint_matches(fingerprint):
+            return False
+        db.init_db()
+        migrations.run_migrations()
+        conn = db.get_db()
+        try:
+            set_stored_fingerprint(conn, fingerprint)
+        finally:
+            conn.close()
+    return True
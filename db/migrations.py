@@ -3,7 +3,11 @@
 Handles schema version tracking and upgrades.
 """
 
+import os
 import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator
 from db import get_db
 
 
@@ -28,124 +32,750 @@ def set_schema_version(conn: sqlite3.Connection, version: int) -> None:
     conn.commit()
 
 
+# Rows per chunk for batched migration steps
+BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", "1000"))
+
+
+def get_progress(conn: sqlite3.Connection, version: int) -> tuple[int, int | None]:
+    """Return the (step index, key cursor) an interrupted migration stopped at."""
+    row = conn.execute(
+        "SELECT step, cursor FROM migration_progress WHERE version = ?", (version,)
+    ).fetchone()
+    return (row["step"], row["cursor"]) if row else (0, None)
+
+
+def set_progress(
+    conn: sqlite3.Connection, version: int, step: int, cursor: int | None
+) -> None:
+    """Record progress; call inside the transaction that did the work."""
+    conn.execute(
+        """INSERT INTO migration_progress (version, step, cursor) VALUES (?, ?, ?)
+           ON CONFLICT(version) DO UPDATE SET
+               step = excluded.step, cursor = excluded.cursor,
+               updated_at = CURRENT_TIMESTAMP""",
+        (version, step, cursor),
+    )
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection) -> Iterator[None]:
+    """Run a block in its own write transaction, rolled back on error."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+class SqlStep:
+    """A set-based step: one or more statements applied in one transaction."""
+
+    def __init__(self, name: str, *statements: str):
+        self.name = name
+        self.statements = statements
+
+    def count_rows(self, conn: sqlite3.Connection, cursor: int | None) -> None:
+        return None
+
+    def apply(self, conn: sqlite3.Connection) -> None:
+        for statement in self.statements:
+            conn.execute(statement)
+
+    def run(self, conn, version: int, index: int, cursor, batch_size: int) -> None:
+        with _transaction(conn):
+            self.apply(conn)
+            set_progress(conn, version, index + 1, None)
+
+    def sample(self, conn, cursor, batch_size: int) -> None:
+        self.apply(conn)
+
+
+class FunctionStep:
+    """A step that runs ``func(conn)`` in one transaction (e.g. conditional DDL)."""
+
+    def __init__(self, name: str, func):
+        self.name = name
+        self.func = func
+
+    def count_rows(self, conn: sqlite3.Connection, cursor: int | None) -> None:
+        return None
+
+    def run(self, conn, version: int, index: int, cursor, batch_size: int) -> None:
+        with _transaction(conn):
+            self.func(conn)
+            set_progress(conn, version, index + 1, None)
+
+    def sample(self, conn, cursor, batch_size: int) -> None:
+        self.func(conn)
+
+
+class BatchedStep:
+    """A step applied to a table in key order, committing one chunk at a time.
+
+    ``statement`` must restrict itself to ``key > :lo AND key <= :hi``. Each
+    chunk commits together with its progress cursor, so an interrupted run
+    resumes after the last committed chunk, and the write lock is never held
+    for longer than one chunk.
+    """
+
+    def __init__(self, name: str, table: str, statement: str, key: str = "rowid"):
+        self.name = name
+        self.table = table
+        self.statement = statement
+        self.key = key
+
+    def count_rows(self, conn: sqlite3.Connection, cursor: int | None) -> int:
+        return conn.execute(
+            f"SELECT count(*) FROM {self.table} WHERE {self.key} > ?",
+            (cursor if cursor is not None else -1,),
+        ).fetchone()[0]
+
+    def apply_chunk(self, conn, lo: int, batch_size: int) -> int | None:
+        """Apply the next chunk after ``lo``; return its last key, or None if done."""
+        hi = conn.execute(
+            f"""SELECT max({self.key}) FROM (
+                    SELECT {self.key} FROM {self.table} WHERE {self.key} > ?
+                    ORDER BY {self.key} LIMIT ?)""",
+            (lo, batch_size),
+        ).fetchone()[0]
+        if hi is not None:
+            conn.execute(self.statement, {"lo": lo, "hi": hi})
+        return hi
+
+    def run(self, conn, version: int, index: int, cursor, batch_size: int) -> None:
+        lo = cursor if cursor is not None else -1
+        while True:
+            with _transaction(conn):
+                hi = self.apply_chunk(conn, lo, batch_size)
+                if hi is None:
+                    set_progress(conn, version, index + 1, None)
+                    return
+                set_progress(conn, version, index, hi)
+            lo = hi
+
+    def sample(self, conn, cursor, batch_size: int) -> None:
+        self.apply_chunk(conn, cursor if cursor is not None else -1, batch_size)
+
+
+class ChunkedMigration:
+    """A migration made of steps that commit, and record progress, separately.
+
+    ``skip_if`` is checked before a fresh (not resumed) run; when it returns
+    True the migration has nothing to do.
+    """
+
+    def __init__(self, name: str, steps: list, skip_if=None):
+        self.__name__ = name
+        self.steps = steps
+        self.skip_if = skip_if
+
+    def _start(self, conn: sqlite3.Connection, version: int):
+        """Return (step index, cursor) to start from, or None to skip."""
+        step_index, cursor = get_progress(conn, version)
+        if step_index == 0 and cursor is None:
+            if self.skip_if and self.skip_if(conn):
+                return None
+        return step_index, cursor
+
+    def run(self, conn: sqlite3.Connection, version: int, batch_size: int) -> None:
+        start = self._start(conn, version)
+        if start is None:
+            return
+        step_index, cursor = start
+        if step_index or cursor is not None:
+            print(f"Resuming at step {step_index + 1} of {len(self.steps)}")
+        for index in range(step_index, len(self.steps)):
+            self.steps[index].run(conn, version, index, cursor, batch_size)
+            cursor = None
+
+    def plan(self, conn: sqlite3.Connection, version: int, batch_size: int) -> list:
+        """Estimate each remaining step's rows and time, changing nothing.
+
+        The steps run in one transaction that is rolled back. Batched steps
+        apply a single chunk and extrapolate its time to the row count. Steps
+        that need an earlier pending migration's schema get no time estimate.
+        """
+        start = self._start(conn, version)
+        if start is None:
+            return []
+        step_index, cursor = start
+        estimates = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for step in self.steps[step_index:]:
+                rows = step.count_rows(conn, cursor)
+                started = time.perf_counter()
+                try:
+                    step.sample(conn, cursor, batch_size)
+                except sqlite3.OperationalError:
+                    # Depends on an earlier pending migration's schema changes
+                    estimates.append((step.name, rows, None))
+                    cursor = None
+                    continue
+                seconds = time.perf_counter() - started
+                if rows:
+                    seconds *= max(1, rows / batch_size)
+                estimates.append((step.name, rows, seconds))
+                cursor = None
+        finally:
+            conn.execute("ROLLBACK")
+        return estimates
+
+
 # Migration functions - each takes a connection and applies changes
-def migration_001_add_analysis_name(conn: sqlite3.Connection) -> None:
-    """Add name column to analyses and remove unique constraint."""
-    # Check if name column already exists
+def _analyses_has_name(conn: sqlite3.Connection) -> bool:
+    cursor = conn.execute("PRAGMA table_info(analyses)")
+    return "name" in [row["name"] for row in cursor.fetchall()]
+
+
+def _no_scenario_planning_table(conn: sqlite3.Connection) -> bool:
+    cursor = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='scenario_planning'"
+    )
+    return cursor.fetchone() is None
+
+
+# Default analysis name for each template, for analyses created before names
+_ANALYSIS_NAME = """CASE {row}.template_type
+                       WHEN 'pestel' THEN 'PESTEL Analysis'
+                       WHEN 'five_forces' THEN 'Five Forces Analysis'
+                       WHEN 'vrio' THEN 'VRIO Analysis'
+                       WHEN 'wardley' THEN 'Wardley Map'
+                       ELSE {row}.template_type
+                   END"""
+
+_MIRROR_ANALYSIS = f"""INSERT OR REPLACE INTO analyses_new
+           (id, business_id, name, template_type, data_json, created_at, updated_at)
+       VALUES (NEW.id, NEW.business_id, {_ANALYSIS_NAME.format(row="NEW")},
+               NEW.template_type, NEW.data_json, NEW.created_at, NEW.updated_at)"""
+
+# Add name column to analyses and remove unique constraint. SQLite doesn't
+# support DROP CONSTRAINT, so the table is rebuilt: created, copied in
+# chunks, then swapped in. The app keeps writing while the chunks copy, so
+# triggers mirror every change to the old table into the new one until the
+# swap drops them with it.
+migration_001_add_analysis_name = ChunkedMigration(
+    "migration_001_add_analysis_name",
+    skip_if=_analyses_has_name,
+    steps=[
+        SqlStep(
+            "create analyses_new",
+            """CREATE TABLE IF NOT EXISTS analyses_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                business_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                template_type TEXT NOT NULL,
+                data_json TEXT NOT NULL DEFAULT '{}',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
+            )""",
+            f"""CREATE TRIGGER IF NOT EXISTS analyses_mirror_insert
+                AFTER INSERT ON analyses BEGIN {_MIRROR_ANALYSIS}; END""",
+            f"""CREATE TRIGGER IF NOT EXISTS analyses_mirror_update
+                AFTER UPDATE ON analyses BEGIN {_MIRROR_ANALYSIS}; END""",
+            """CREATE TRIGGER IF NOT EXISTS analyses_mirror_delete
+               AFTER DELETE ON analyses BEGIN
+                   DELETE FROM analyses_new WHERE id = OLD.id;
+               END""",
+        ),
+        # Copy existing data, using template_type as default name. Rows the
+        # triggers already mirrored are newer than the copy, so are kept.
+        BatchedStep(
+            "copy analyses",
+            "analyses",
+            f"""INSERT OR IGNORE INTO analyses_new
+                   (id, business_id, name, template_type, data_json, created_at, updated_at)
+               SELECT id, business_id, {_ANALYSIS_NAME.format(row="analyses")},
+                      template_type, data_json, created_at, updated_at
+               FROM analyses WHERE id > :lo AND id <= :hi""",
+            key="id",
+        ),
+        # Drop old table (and its mirror triggers), rename new one and
+        # recreate the index
+        SqlStep(
+            "swap tables",
+            "DROP TABLE analyses",
+            "ALTER TABLE analyses_new RENAME TO analyses",
+            "CREATE INDEX IF NOT EXISTS idx_analyses_business ON analyses(business_id)",
+        ),
+    ],
+)
+
+
+# Migrate scenario_planning data to the analyses table, skipping businesses
+# that already have a scenario_planning analysis.
+migration_002_scenario_planning_to_analysis = ChunkedMigration(
+    "migration_002_scenario_planning_to_analysis",
+    skip_if=_no_scenario_planning_table,
+    steps=[
+        BatchedStep(
+            "copy scenario_planning",
+            "scenario_planning",
+            """INSERT INTO analyses
+                   (business_id, name, template_type, data_json, created_at, updated_at)
+               SELECT sp.business_id, 'Scenario Planning', 'scenario_planning',
+                      sp.data_json, sp.created_at, sp.updated_at
+               FROM scenario_planning sp
+               WHERE sp.id > :lo AND sp.id <= :hi
+                 AND NOT EXISTS (
+                     SELECT 1 FROM analyses a
+                     WHERE a.business_id = sp.business_id
+                       AND a.template_type = 'scenario_planning'
+                 )""",
+            key="id",
+        ),
+    ],
+)
+
+
+def migration_003_research_search(conn: sqlite3.Connection) -> None:
+    """Add FTS5 indexes over research items and quotes, kept in sync by triggers."""
+    conn.executescript("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS research_items_fts USING fts5(
+            title, plain_text,
+            content='research_items', content_rowid='id',
+            tokenize='porter unicode61'
+        );
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS quotes_fts USING fts5(
+            text,
+            content='quotes', content_rowid='id',
+            tokenize='porter unicode61'
+        );
+
+        -- External-content tables: deletes must replay the indexed values
+        CREATE TRIGGER IF NOT EXISTS research_items_fts_insert
+        AFTER INSERT ON research_items BEGIN
+            INSERT INTO research_items_fts (rowid, title, plain_text)
+            VALUES (new.id, new.title, new.plain_text);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS research_items_fts_delete
+        AFTER DELETE ON research_items BEGIN
+            INSERT INTO research_items_fts (research_items_fts, rowid, title, plain_text)
+            VALUES ('delete', old.id, old.title, old.plain_text);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS research_items_fts_update
+        AFTER UPDATE OF title, plain_text ON research_items BEGIN
+            INSERT INTO research_items_fts (research_items_fts, rowid, title, plain_text)
+            VALUES ('delete', old.id, old.title, old.plain_text);
+            INSERT INTO research_items_fts (rowid, title, plain_text)
+            VALUES (new.id, new.title, new.plain_text);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS quotes_fts_insert
+        AFTER INSERT ON quotes BEGIN
+            INSERT INTO quotes_fts (rowid, text) VALUES (new.id, new.text);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS quotes_fts_delete
+        AFTER DELETE ON quotes BEGIN
+            INSERT INTO quotes_fts (quotes_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS quotes_fts_update
+        AFTER UPDATE OF text ON quotes BEGIN
+            INSERT INTO quotes_fts (quotes_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO quotes_fts (rowid, text) VALUES (new.id, new.text);
+        END;
+
+        -- Title matches outrank body matches
+        INSERT INTO research_items_fts (research_items_fts, rank)
+        VALUES ('rank', 'bm25(10.0, 1.0)');
+
+        -- Backfill existing rows
+        INSERT INTO research_items_fts (research_items_fts) VALUES ('rebuild');
+        INSERT INTO quotes_fts (quotes_fts) VALUES ('rebuild');
+    """)
+
+
+def migration_004_analysis_version(conn: sqlite3.Connection) -> None:
+    """Add a version counter to analyses for optimistic concurrency."""
     cursor = conn.execute("PRAGMA table_info(analyses)")
     columns = [row["name"] for row in cursor.fetchall()]
 
-    if "name" in columns:
+    if "version" in columns:
         return  # Already migrated
 
-    # SQLite doesn't support DROP CONSTRAINT, so we need to recreate the table
-    conn.executescript("""
-        -- Create new table with updated schema
-        CREATE TABLE analyses_new (
+    conn.execute("ALTER TABLE analyses ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    conn.commit()
+
+
+def migration_005_content_hashes(conn: sqlite3.Connection) -> None:
+    """Add content hash columns used to skip saves of unchanged content.
+
+    Existing rows keep a NULL hash, so their next save always writes.
+    """
+    for table, column in (("analyses", "data_hash"), ("summaries", "content_hash")):
+        cursor = conn.execute(f"PRAGMA table_info({table})")
+        if column not in [row["name"] for row in cursor.fetchall()]:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+    conn.commit()
+
+
+def _add_business_counter_columns(conn: sqlite3.Connection) -> None:
+    cursor = conn.execute("PRAGMA table_info(businesses)")
+    columns = [row["name"] for row in cursor.fetchall()]
+    for column in ("research_item_count", "quote_count", "analysis_count"):
+        if column not in columns:
+            conn.execute(
+                f"ALTER TABLE businesses ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"
+            )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_businesses_updated ON businesses(updated_at, id)"
+    )
+
+
+# Counter columns on businesses, kept in sync by triggers that also bump
+# businesses.updated_at whenever a child row changes. When a research item is
+# deleted its quotes are cascade-deleted after the item row is gone, so their
+# delete trigger finds no business; the item's BEFORE DELETE trigger
+# subtracts them instead.
+_BUSINESS_COUNTER_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS research_items_count_insert
+       AFTER INSERT ON research_items BEGIN
+           UPDATE businesses
+           SET research_item_count = research_item_count + 1,
+               updated_at = CURRENT_TIMESTAMP
+           WHERE id = new.business_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS research_items_count_delete
+       BEFORE DELETE ON research_items BEGIN
+           UPDATE businesses
+           SET research_item_count = research_item_count - 1,
+               quote_count = quote_count - (
+                   SELECT count(*) FROM quotes WHERE research_item_id = old.id
+               ),
+               updated_at = CURRENT_TIMESTAMP
+           WHERE id = old.business_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS research_items_touch_business
+       AFTER UPDATE ON research_items BEGIN
+           UPDATE businesses SET updated_at = CURRENT_TIMESTAMP
+           WHERE id = new.business_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS quotes_count_insert
+       AFTER INSERT ON quotes BEGIN
+           UPDATE businesses
+           SET quote_count = quote_count + 1, updated_at = CURRENT_TIMESTAMP
+           WHERE id = (
+               SELECT business_id FROM research_items WHERE id = new.research_item_id
+           );
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS quotes_count_delete
+       AFTER DELETE ON quotes BEGIN
+           UPDATE businesses
+           SET quote_count = quote_count - 1, updated_at = CURRENT_TIMESTAMP
+           WHERE id = (
+               SELECT business_id FROM research_items WHERE id = old.research_item_id
+           );
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS quotes_touch_business
+       AFTER UPDATE ON quotes BEGIN
+           UPDATE businesses SET updated_at = CURRENT_TIMESTAMP
+           WHERE id = (
+               SELECT business_id FROM research_items WHERE id = new.research_item_id
+           );
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS analyses_count_insert
+       AFTER INSERT ON analyses BEGIN
+           UPDATE businesses
+           SET analysis_count = analysis_count + 1, updated_at = CURRENT_TIMESTAMP
+           WHERE id = new.business_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS analyses_count_delete
+       AFTER DELETE ON analyses BEGIN
+           UPDATE businesses
+           SET analysis_count = analysis_count - 1, updated_at = CURRENT_TIMESTAMP
+           WHERE id = old.business_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS analyses_touch_business
+       AFTER UPDATE ON analyses BEGIN
+           UPDATE businesses SET updated_at = CURRENT_TIMESTAMP
+           WHERE id = new.business_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS summaries_touch_business
+       AFTER INSERT ON summaries BEGIN
+           UPDATE businesses SET updated_at = CURRENT_TIMESTAMP
+           WHERE id = new.business_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS summaries_update_touch_business
+       AFTER UPDATE ON summaries BEGIN
+           UPDATE businesses SET updated_at = CURRENT_TIMESTAMP
+           WHERE id = new.business_id;
+       END""",
+]
+
+migration_006_business_counters = ChunkedMigration(
+    "migration_006_business_counters",
+    steps=[
+        FunctionStep("add counter columns", _add_business_counter_columns),
+        SqlStep("create counter triggers", *_BUSINESS_COUNTER_TRIGGERS),
+        # Triggers exist before the backfill, so rows changed mid-backfill
+        # are still counted correctly
+        BatchedStep(
+            "backfill counters",
+            "businesses",
+            """UPDATE businesses SET
+                   research_item_count = (
+                       SELECT count(*) FROM research_items r
+                       WHERE r.business_id = businesses.id
+                   ),
+                   quote_count = (
+                       SELECT count(*) FROM quotes q
+                       JOIN research_items r ON r.id = q.research_item_id
+                       WHERE r.business_id = businesses.id
+                   ),
+                   analysis_count = (
+                       SELECT count(*) FROM analyses a
+                       WHERE a.business_id = businesses.id
+                   )
+               WHERE id > :lo AND id <= :hi""",
+            key="id",
+        ),
+    ],
+)
+
+
+def migration_007_jobs(conn: sqlite3.Connection) -> None:
+    """Add the background jobs table and a research item status column."""
+    cursor = conn.execute("PRAGMA table_info(research_items)")
+    if "status" not in [row["name"] for row in cursor.fetchall()]:
+        conn.execute(
+            """ALTER TABLE research_items ADD COLUMN status TEXT NOT NULL DEFAULT 'ready'
+               CHECK (status IN ('ready', 'pending', 'failed'))"""
+        )
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            business_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            template_type TEXT NOT NULL,
-            data_json TEXT NOT NULL DEFAULT '{}',
+            kind TEXT NOT NULL,
+            research_item_id INTEGER NOT NULL,
+            payload_json TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'queued'
+                CHECK (status IN ('queued', 'running', 'done', 'failed')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            worker TEXT,
+            run_after REAL NOT NULL DEFAULT 0,
+            lease_expires_at REAL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
-        );
-        
-        -- Copy existing data, using template_type as default name
-        INSERT INTO analyses_new (id, business_id, name, template_type, data_json, created_at, updated_at)
-        SELECT id, business_id, 
-               CASE template_type
-                   WHEN 'pestel' THEN 'PESTEL Analysis'
-                   WHEN 'five_forces' THEN 'Five Forces Analysis'
-                   WHEN 'vrio' THEN 'VRIO Analysis'
-                   WHEN 'wardley' THEN 'Wardley Map'
-                   ELSE template_type
-               END as name,
-               template_type, data_json, created_at, updated_at
-        FROM analyses;
-        
-        -- Drop old table and rename new one
-        DROP TABLE analyses;
-        ALTER TABLE analyses_new RENAME TO analyses;
-        
-        -- Recreate index
-        CREATE INDEX IF NOT EXISTS idx_analyses_business ON analyses(business_id);
+            FOREIGN KEY (research_item_id) REFERENCES research_items(id) ON DELETE CASCADE
+        )
     """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, run_after)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_research_item ON jobs(research_item_id)"
+    )
+    conn.commit()
 
 
-def migration_002_scenario_planning_to_analysis(conn: sqlite3.Connection) -> None:
-    """Migrate scenario_planning data to analyses table."""
-    # Check if scenario_planning table exists
-    cursor = conn.execute(
-        "SELECT name FROM sqlite_master WHERE type='table' AND name='scenario_planning'"
-    )
-    if not cursor.fetchone():
-        return  # No scenario_planning table, nothing to migrate
+def migration_008_job_progress(conn: sqlite3.Connection) -> None:
+    """Add a progress column so running jobs can report partial results."""
+    cursor = conn.execute("PRAGMA table_info(jobs)")
+    if "progress_json" not in [row["name"] for row in cursor.fetchall()]:
+        conn.execute("ALTER TABLE jobs ADD COLUMN progress_json TEXT")
+    conn.commit()
 
-    # Get all existing scenario planning data
-    cursor = conn.execute(
-        "SELECT business_id, data_json, created_at, updated_at FROM scenario_planning"
-    )
-    rows = cursor.fetchall()
 
-    for row in rows:
-        business_id = row["business_id"]
-        data_json = row["data_json"]
-        created_at = row["created_at"]
-        updated_at = row["updated_at"]
+def migration_009_job_results(conn: sqlite3.Connection) -> None:
+    """Add a column recording how a finished job produced its text."""
+    cursor = conn.execute("PRAGMA table_info(jobs)")
+    if "result_json" not in [row["name"] for row in cursor.fetchall()]:
+        conn.execute("ALTER TABLE jobs ADD COLUMN result_json TEXT")
+    conn.commit()
+
 
-        # Check if this business already has a scenario_planning analysis
-        existing = conn.execute(
-            "SELECT id FROM analyses WHERE business_id = ? AND template_type = 'scenario_planning'",
-            (business_id,),
-        ).fetchone()
+_BLOB_REF_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS research_items_blob_insert
+       AFTER INSERT ON research_items WHEN new.blob_sha256 IS NOT NULL BEGIN
+           UPDATE blobs SET ref_count = ref_count + 1, updated_at = CURRENT_TIMESTAMP
+           WHERE sha256 = new.blob_sha256;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS research_items_blob_delete
+       AFTER DELETE ON research_items WHEN old.blob_sha256 IS NOT NULL BEGIN
+           UPDATE blobs SET ref_count = ref_count - 1, updated_at = CURRENT_TIMESTAMP
+           WHERE sha256 = old.blob_sha256;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS research_items_blob_update
+       AFTER UPDATE OF blob_sha256 ON research_items
+       WHEN old.blob_sha256 IS NOT new.blob_sha256 BEGIN
+           UPDATE blobs SET ref_count = ref_count - 1, updated_at = CURRENT_TIMESTAMP
+           WHERE sha256 = old.blob_sha256;
+           UPDATE blobs SET ref_count = ref_count + 1, updated_at = CURRENT_TIMESTAMP
+           WHERE sha256 = new.blob_sha256;
+       END""",
+]
 
-        if existing:
-            continue  # Already migrated
 
-        # Insert as a new analysis
+def migration_010_blobs(conn: sqlite3.Connection) -> None:
+    """Add content-addressed upload storage, reference-counted by triggers."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor = conn.execute("PRAGMA table_info(research_items)")
+    if "blob_sha256" not in [row["name"] for row in cursor.fetchall()]:
         conn.execute(
-            """INSERT INTO analyses (business_id, name, template_type, data_json, created_at, updated_at)
-               VALUES (?, 'Scenario Planning', 'scenario_planning', ?, ?, ?)""",
-            (business_id, data_json, created_at, updated_at),
+            "ALTER TABLE research_items ADD COLUMN blob_sha256 TEXT REFERENCES blobs(sha256)"
         )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_research_items_blob ON research_items(blob_sha256)"
+    )
+    for trigger in _BLOB_REF_TRIGGERS:
+        conn.execute(trigger)
+    conn.commit()
+
 
+def migration_011_uploads(conn: sqlite3.Connection) -> None:
+    """Add resumable (chunked) upload sessions."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS uploads (
+            id TEXT PRIMARY KEY,
+            business_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            bytes_received INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
+        )
+    """)
     conn.commit()
-    print(f"Migrated {len(rows)} scenario planning entries to analyses table")
 
 
 # List of all migrations in order
 MIGRATIONS = [
     (1, migration_001_add_analysis_name),
     (2, migration_002_scenario_planning_to_analysis),
+    (3, migration_003_research_search),
+    (4, migration_004_analysis_version),
+    (5, migration_005_content_hashes),
+    (6, migration_006_business_counters),
+    (7, migration_007_jobs),
+    (8, migration_008_job_progress),
+    (9, migration_009_job_results),
+    (10, migration_010_blobs),
+    (11, migration_011_uploads),
 ]
 
 
-def run_migrations() -> None:
-    """Run all pending migrations."""
-    conn = get_db()
-
-    # Ensure schema_version table exists
+def _ensure_tracking_tables(conn: sqlite3.Connection) -> None:
     conn.execute("""
         CREATE TABLE IF NOT EXISTS schema_version (
             id INTEGER PRIMARY KEY,
             version INTEGER NOT NULL
         )
     """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS migration_progress (
+            version INTEGER PRIMARY KEY,
+            step INTEGER NOT NULL,
+            cursor INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
     conn.commit()
 
+
+def run_migrations(batch_size: int | None = None) -> None:
+    """Run all pending migrations.
+
+    Chunked migrations resume from their recorded progress if a previous run
+    was interrupted.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    conn = get_db()
+
+    # Ensure the version and progress tracking tables exist
+    _ensure_tracking_tables(conn)
+
     current_version = get_schema_version(conn)
 
     for version, migration_func in MIGRATIONS:
         if version > current_version:
             print(f"Running migration {version}: {migration_func.__name__}")
-            migration_func(conn)
+            if isinstance(migration_func, ChunkedMigration):
+                migration_func.run(conn, version, batch_size)
+            else:
+                migration_func(conn)
+            conn.execute("DELETE FROM migration_progress WHERE version = ?", (version,))
             set_schema_version(conn, version)
             print(f"Migration {version} complete")
 
     conn.close()
 
 
+def plan_migrations(batch_size: int | None = None) -> list[dict]:
+    """Describe pending migrations without applying them.
+
+    Each entry lists the migration's steps with estimated row counts and
+    seconds; both are None where no estimate is possible (plain function
+    migrations, or set-based steps' row counts).
+    """
+    batch_size = batch_size or BATCH_SIZE
+    conn = get_db()
+    conn.isolation_level = None  # steps manage their own transactions
+    try:
+        _ensure_tracking_tables(conn)
+        current_version = get_schema_version(conn)
+        plan = []
+        for version, migration_func in MIGRATIONS:
+            if version <= current_version:
+                continue
+            if isinstance(migration_func, ChunkedMigration):
+                steps = migration_func.plan(conn, version, batch_size)
+            else:
+                # Plain migration functions can't be run without committing
+                steps = [("(not chunked)", None, None)]
+            plan.append(
+                {"version": version, "name": migration_func.__name__, "steps": steps}
+            )
+        return plan
+    finally:
+        conn.close()
+
+
+def print_plan(plan: list[dict]) -> None:
+    """Print the output of :func:`plan_migrations`."""
+    if not plan:
+        print("No pending migrations")
+    for migration in plan:
+        print(f"Migration {migration['version']}: {migration['name']}")
+        if not migration["steps"]:
+            print("  nothing to do")
+        for name, rows, seconds in migration["steps"]:
+            rows_text = f"{rows:,} rows" if rows is not None else "-"
+            time_text = f"~{seconds:.2f}s" if seconds is not None else "not estimated"
+            print(f"  {name:32} {rows_text:>14}  {time_text}")
+
+
 if __name__ == "__main__":
-    run_migrations()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply pending database migrations.")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report pending migrations with estimated row counts and timing.",
+    )
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+    if args.dry_run:
+        print_plan(plan_migrations(args.batch_size))
+    else:
+        run_migrations(args.batch_size)
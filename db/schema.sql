@@ -7,6 +7,21 @@ CREATE TABLE IF NOT EXISTS businesses (
     description TEXT,
     type TEXT NOT NULL CHECK (type IN ('product', 'company', 'business_unit')),
     strategic_question TEXT,
+    -- Maintained by triggers (migration 006)
+    research_item_count INTEGER NOT NULL DEFAULT 0,
+    quote_count INTEGER NOT NULL DEFAULT 0,
+    analysis_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Uploaded files, stored once per content hash under uploads/. ref_count
+-- (the research items using the file) is maintained by triggers (migration 010)
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    path TEXT NOT NULL,  -- relative to the upload directory
+    ref_count INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -18,8 +33,11 @@ CREATE TABLE IF NOT EXISTS research_items (
     title TEXT NOT NULL,
     source_reference TEXT,
     original_file_path TEXT,
+    blob_sha256 TEXT REFERENCES blobs(sha256),  -- uploaded file, if any
     plain_text TEXT,
     item_type TEXT NOT NULL CHECK (item_type IN ('article', 'note', 'interview', 'document', 'other')),
+    -- 'pending' while background text extraction runs (see jobs)
+    status TEXT NOT NULL DEFAULT 'ready' CHECK (status IN ('ready', 'pending', 'failed')),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
@@ -43,6 +61,8 @@ CREATE TABLE IF NOT EXISTS analyses (
     name TEXT NOT NULL,
     template_type TEXT NOT NULL,
     data_json TEXT NOT NULL DEFAULT '{}',
+    data_hash TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
@@ -53,6 +73,38 @@ CREATE TABLE IF NOT EXISTS summaries (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     business_id INTEGER NOT NULL UNIQUE,
     markdown_content TEXT DEFAULT '',
+    content_hash TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
+);
+
+-- Background jobs (text extraction for uploaded files)
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    research_item_id INTEGER NOT NULL,
+    payload_json TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    worker TEXT,
+    run_after REAL NOT NULL DEFAULT 0,  -- unix time
+    lease_expires_at REAL,  -- unix time; running jobs past this are reclaimed
+    progress_json TEXT,  -- {"done", "total", "partial_text"} while running
+    result_json TEXT,  -- handler-specific details of how the job was done
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (research_item_id) REFERENCES research_items(id) ON DELETE CASCADE
+);
+
+-- Resumable uploads in progress; the bytes are staged in uploads/tmp/<id>.part
+CREATE TABLE IF NOT EXISTS uploads (
+    id TEXT PRIMARY KEY,
+    business_id INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    length INTEGER NOT NULL,  -- declared total size
+    bytes_received INTEGER NOT NULL DEFAULT 0,  -- the offset to resume from
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (business_id) REFERENCES businesses(id) ON DELETE CASCADE
@@ -69,7 +121,11 @@ CREATE TABLE IF NOT EXISTS scenario_planning (
 );
 
 -- Indexes for common queries
+CREATE INDEX IF NOT EXISTS idx_businesses_updated ON businesses(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, run_after);
+CREATE INDEX IF NOT EXISTS idx_jobs_research_item ON jobs(research_item_id);
 CREATE INDEX IF NOT EXISTS idx_research_items_business ON research_items(business_id);
 CREATE INDEX IF NOT EXISTS idx_quotes_research_item ON quotes(research_item_id);
+CREATE INDEX IF NOT EXISTS idx_quotes_research_item_offset ON quotes(research_item_id, start_offset);
 CREATE INDEX IF NOT EXISTS idx_analyses_business ON analyses(business_id);
 CREATE INDEX IF NOT EXISTS idx_scenario_planning_business ON scenario_planning(business_id);
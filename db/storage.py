@@ -0,0 +1,164 @@
+"""SQLite storage profiles and WAL checkpoint management.
+
+A storage profile is the set of PRAGMAs applied to every new connection. The
+default ``production`` profile runs the database in WAL mode so readers never
+block the writer (and vice versa); ``legacy`` reproduces SQLite's defaults
+(rollback journal, full fsync on every commit) for comparison.
+
+In WAL mode committed pages accumulate in ``<db>-wal`` until a checkpoint
+copies them back. SQLite's automatic checkpoints are passive and never shrink
+the file, so a background :class:`Checkpointer` runs a passive checkpoint on a
+timer and truncates the WAL once it grows past a threshold.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import db
+
+PROFILES = {
+    "production": {
+        "journal_mode": "WAL",
+        # In WAL mode NORMAL only syncs at checkpoints: a power loss can drop
+        # the last commits but never corrupts the database
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negative values are KiB
+        "temp_store": "MEMORY",
+    },
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,  # sqlite3.connect's default timeout
+        "mmap_size": 0,
+        "cache_size": -2000,
+        "temp_store": "DEFAULT",
+    },
+}
+
+PROFILE = os.environ.get("DB_STORAGE_PROFILE", "production")
+# Seconds between passive checkpoints
+CHECKPOINT_INTERVAL = float(os.environ.get("DB_CHECKPOINT_INTERVAL_S", "30"))
+# WAL size above which the checkpointer truncates the WAL file
+WAL_TRUNCATE_BYTES = int(os.environ.get("DB_WAL_TRUNCATE_MB", "64")) * 1024 * 1024
+
+
+def get_profile(name: str | None = None) -> dict:
+    """Return the PRAGMA settings for a profile (default: ``PROFILE``)."""
+    name = name or PROFILE
+    if name not in PROFILES:
+        raise ValueError(
+            f"Unknown storage profile: {name!r} (expected one of {list(PROFILES)})"
+        )
+    return PROFILES[name]
+
+
+def apply_profile(conn: sqlite3.Connection, name: str | None = None) -> None:
+    """Apply a storage profile's PRAGMAs to a new connection."""
+    for pragma, value in get_profile(name).items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+def wal_path(path: Path) -> Path:
+    return path.with_name(path.name + "-wal")
+
+
+class Checkpointer:
+    """A background thread that keeps one database's WAL file bounded."""
+
+    def __init__(self, path: Path, interval: float, truncate_bytes: int):
+        self.path = path
+        self.pid = os.getpid()
+        self.interval = interval
+        self.truncate_bytes = truncate_bytes
+        self.stats = {"passive": 0, "truncate": 0, "busy": 0, "wal_bytes": 0}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="db-checkpointer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        conn = db.get_db()
+        try:
+            while not self._stop.wait(self.interval):
+                self.checkpoint(conn)
+        finally:
+            conn.close()
+
+    def checkpoint(self, conn: sqlite3.Connection) -> str:
+        """Run one checkpoint and return the mode used.
+
+        A passive checkpoint copies whatever it can without waiting on readers
+        or the writer. Once the WAL file is over the threshold a truncating
+        checkpoint waits (up to busy_timeout) for a quiet moment so the file
+        can be reset to zero bytes.
+        """
+        wal = wal_path(self.path)
+        size = wal.stat().st_size if wal.exists() else 0
+        mode = "truncate" if size > self.truncate_bytes else "passive"
+        try:
+            busy, _, _ = conn.execute(
+                f"PRAGMA wal_checkpoint({mode.upper()})"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            busy = 1
+        self.stats[mode] += 1
+        self.stats["busy"] += busy
+        self.stats["wal_bytes"] = wal.stat().st_size if wal.exists() else 0
+        return mode
+
+
+_checkpointer: Checkpointer | None = None
+_checkpointer_lock = threading.Lock()
+
+
+def ensure_checkpointer() -> Checkpointer | None:
+    """Start this process's checkpointer if the database runs in WAL mode.
+
+    Called on every write; like the connection pool, the checkpointer is
+    replaced after a fork or when ``db.DATABASE_PATH`` changes.
+    """
+    global _checkpointer
+    if get_profile()["journal_mode"].upper() != "WAL":
+        return None
+    with _checkpointer_lock:
+        if (
+            _checkpointer is None
+            or _checkpointer.pid != os.getpid()
+            or _checkpointer.path != db.DATABASE_PATH
+        ):
+            if _checkpointer is not None and _checkpointer.pid == os.getpid():
+                _checkpointer.stop()
+            _checkpointer = Checkpointer(
+                db.DATABASE_PATH, CHECKPOINT_INTERVAL, WAL_TRUNCATE_BYTES
+            )
+        return _checkpointer
+
+
+def stop_checkpointer() -> None:
+    """Stop this process's checkpointer, if it is running."""
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is not None and _checkpointer.pid == os.getpid():
+            _checkpointer.stop()
+        _checkpointer = None
+
+
+atexit.register(stop_checkpointer)
+
+
+def storage_stats() -> dict:
+    """Return the active profile and this process's checkpoint counters."""
+    with _checkpointer_lock:
+        running = _checkpointer is not None and _checkpointer.pid == os.getpid()
+        checkpoints = dict(_checkpointer.stats) if running else {}
+    return {"profile": PROFILE, "checkpointer_running": running, **checkpoints}
@@ -0,0 +1,235 @@
+"""Single-writer queue with group commit.
+
+All model writes are funnelled through one thread that owns the only write
+connection. Request threads submit write functions and block on a future;
+the writer drains the queue into batches and commits each batch as one
+transaction, so concurrent autosaves share a single fsync instead of
+contending for SQLite's write lock.
+
+Each write function receives the writer's connection as its first argument
+and must not commit: it runs inside a savepoint, so a failing write is rolled
+back on its own without affecting the rest of its batch.
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable
+
+import db
+from db import storage
+
+# Route writes through the writer thread; when disabled, writes run inline
+# on the caller's connection and commit individually.
+ENABLED = os.environ.get("DB_SINGLE_WRITER", "1") != "0"
+# Longest a write waits for others to join its batch before committing
+MAX_BATCH_LATENCY = float(os.environ.get("DB_WRITER_MAX_BATCH_LATENCY_MS", "5")) / 1000
+MAX_BATCH_SIZE = int(os.environ.get("DB_WRITER_MAX_BATCH_SIZE", "100"))
+
+_STOP = object()
+
+
+class WriteQueue:
+    """A writer thread that commits queued write functions in batches."""
+
+    def __init__(self, path: Path, max_batch_latency: float, max_batch_size: int):
+        self.path = path
+        self.pid = os.getpid()
+        self.max_batch_latency = max_batch_latency
+        self.max_batch_size = max_batch_size
+        self.stats = {"writes": 0, "failed": 0, "batches": 0, "largest_batch": 0}
+        self._queue: queue.Queue = queue.Queue()
+        # Guards _closed so nothing is queued after the thread's final drain
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Queue ``func(conn, *args, **kwargs)``; the future resolves after commit.
+
+        Raises RuntimeError if the writer thread has exited.
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("DB writer thread is not running")
+            self._queue.put((func, args, kwargs, future))
+        return future
+
+    def is_alive(self) -> bool:
+        """Whether the writer thread is still accepting writes."""
+        return self._thread.is_alive() and not self._closed
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Commit everything already queued, then stop the thread."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = db.get_db()
+        conn.isolation_level = None  # transactions are managed explicitly
+        return conn
+
+    def _run(self) -> None:
+        conn = None
+        try:
+            conn = self._connect()
+            stopping = False
+            while not stopping:
+                job = self._queue.get()
+                if job is _STOP:
+                    break
+                batch = [job]
+                deadline = time.monotonic() + self.max_batch_latency
+                while len(batch) < self.max_batch_size:
+                    try:
+                        job = self._queue.get(
+                            timeout=max(0, deadline - time.monotonic())
+                        )
+                    except queue.Empty:
+                        break
+                    if job is _STOP:
+                        stopping = True
+                        break
+                    batch.append(job)
+                try:
+                    self._commit_batch(conn, batch)
+                except Exception as e:
+                    # The connection is in an unknown state (e.g. ROLLBACK
+                    # failed after a disk error): fail only this batch and
+                    # carry on with a fresh connection
+                    print(f"DB writer batch failed: {type(e).__name__}: {e}")
+                    for _, _, _, future in batch:
+                        if not future.done():
+                            self.stats["failed"] += 1
+                            future.set_exception(e)
+                    conn.close()
+                    conn = self._connect()
+        finally:
+            # Whatever stopped the thread, callers must not wait forever
+            with self._lock:
+                self._closed = True
+            error = RuntimeError("DB writer thread stopped")
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not _STOP and job[3].set_running_or_notify_cancel():
+                    job[3].set_exception(error)
+            if conn is not None:
+                conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: list) -> None:
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for func, args, kwargs, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write")
+                try:
+                    result = func(conn, *args, **kwargs)
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    outcomes.append((future, e, False))
+                else:
+                    conn.execute("RELEASE write")
+                    outcomes.append((future, result, True))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # The transaction itself failed: nothing in the batch was saved
+            outcomes = [
+                (future, e, False) for _, _, _, future in batch if future.running()
+            ]
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            finally:
+                self._resolve(len(batch), outcomes)
+            return
+        self._resolve(len(batch), outcomes)
+
+    def _resolve(self, batch_size: int, outcomes: list) -> None:
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], batch_size)
+        for future, value, ok in outcomes:
+            if ok:
+                self.stats["writes"] += 1
+                future.set_result(value)
+            else:
+                self.stats["failed"] += 1
+                future.set_exception(value)
+
+
+_writer: WriteQueue | None = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> WriteQueue:
+    """Get this process's writer, starting it on first use.
+
+    Like the connection pool, the writer is replaced after a fork or when
+    ``db.DATABASE_PATH`` changes, and a writer whose thread has died is
+    replaced too.
+    """
+    global _writer
+    with _writer_lock:
+        if (
+            _writer is None
+            or _writer.pid != os.getpid()
+            or _writer.path != db.DATABASE_PATH
+            or not _writer.is_alive()
+        ):
+            if _writer is not None and _writer.pid == os.getpid():
+                _writer.stop()
+            _writer = WriteQueue(db.DATABASE_PATH, MAX_BATCH_LATENCY, MAX_BATCH_SIZE)
+        return _writer
+
+
+def stop_writer() -> None:
+    """Flush and stop this process's writer, if it is running."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None and _writer.pid == os.getpid():
+            _writer.stop()
+        _writer = None
+
+
+atexit.register(stop_writer)
+
+
+def writer_stats() -> dict:
+    """Return counters for this process's writer."""
+    with _writer_lock:
+        if _writer is None or _writer.pid != os.getpid():
+            return {"enabled": ENABLED, "running": False}
+        return {"enabled": ENABLED, "running": True, **_writer.stats}
+
+
+def run_write(func: Callable, *args, **kwargs) -> Any:
+    """Run ``func(conn, *args, **kwargs)`` as a committed write and return its result.
+
+    Exceptions raised by ``func`` propagate to the caller after its changes
+    have been rolled back. If the writer thread dies, pending callers get a
+    RuntimeError rather than waiting forever.
+    """
+    storage.ensure_checkpointer()
+    if ENABLED:
+        return get_writer().submit(func, *args, **kwargs).result()
+
+    with db.connection() as conn:
+        try:
+            result = func(conn, *args, **kwargs)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return result
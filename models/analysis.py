@@ -1,35 +1,53 @@
 """Analysis model - CRUD operations for analyses."""
 
 import json
-from db import get_db, dict_from_row
+import sqlite3
+from db import connection, content_hash, dict_from_row, increment_counter
+from db.writer import run_write
 import analyses as analysis_templates
+from services.json_patch import apply_patch
+
+
+class AnalysisValidationError(ValueError):
+    """Raised when analysis data does not match its template's input schema."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class VersionConflictError(Exception):
+    """Raised when a change was based on an out-of-date analysis version."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Analysis is at version {current_version}")
+        self.current_version = current_version
 
 
 def get_analyses_for_business(business_id: int) -> list[dict]:
     """Get all analyses for a business."""
-    conn = get_db()
-    cursor = conn.execute(
-        "SELECT * FROM analyses WHERE business_id = ? ORDER BY created_at",
-        (business_id,),
-    )
+    with connection() as conn:
+        cursor = conn.execute(
+            "SELECT * FROM analyses WHERE business_id = ? ORDER BY created_at",
+            (business_id,),
+        )
+        rows = cursor.fetchall()
     result = []
-    for row in cursor.fetchall():
+    for row in rows:
         analysis = dict_from_row(row)
         analysis["data"] = json.loads(analysis["data_json"])
         result.append(analysis)
-    conn.close()
     return result
 
 
 def get_analysis_by_id(analysis_id: int) -> dict | None:
     """Get an analysis by ID."""
-    conn = get_db()
-    cursor = conn.execute(
-        "SELECT * FROM analyses WHERE id = ?",
-        (analysis_id,),
-    )
-    row = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.execute(
+            "SELECT * FROM analyses WHERE id = ?",
+            (analysis_id,),
+        )
+        row = cursor.fetchone()
     if row:
         analysis = dict_from_row(row)
         analysis["data"] = json.loads(analysis["data_json"])
@@ -43,13 +61,12 @@ def get_analysis(business_id: int, template_type: str) -> dict | None:
     DEPRECATED: Use get_analysis_by_id instead.
     Kept for backward compatibility.
     """
-    conn = get_db()
-    cursor = conn.execute(
-        "SELECT * FROM analyses WHERE business_id = ? AND template_type = ?",
-        (business_id, template_type),
-    )
-    row = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.execute(
+            "SELECT * FROM analyses WHERE business_id = ? AND template_type = ?",
+            (business_id, template_type),
+        )
+        row = cursor.fetchone()
     if row:
         analysis = dict_from_row(row)
         analysis["data"] = json.loads(analysis["data_json"])
@@ -66,32 +83,105 @@ def create_analysis(business_id: int, template_type: str, name: str) -> int:
     empty_data = template.get_empty_data()
     data_json = json.dumps(empty_data)
 
-    conn = get_db()
-    cursor = conn.execute(
-        """INSERT INTO analyses (business_id, name, template_type, data_json)
-           VALUES (?, ?, ?, ?)""",
-        (business_id, name, template_type, data_json),
-    )
-    conn.commit()
-    analysis_id = cursor.lastrowid
-    conn.close()
-    return analysis_id
+    def insert(conn: sqlite3.Connection) -> int:
+        cursor = conn.execute(
+            """INSERT INTO analyses (business_id, name, template_type, data_json, data_hash)
+               VALUES (?, ?, ?, ?, ?)""",
+            (business_id, name, template_type, data_json, content_hash(data_json)),
+        )
+        return cursor.lastrowid
 
+    return run_write(insert)
 
-def save_analysis_by_id(analysis_id: int, data: dict) -> bool:
-    """Save analysis data by ID. Returns True if successful."""
+
+def save_analysis_by_id(analysis_id: int, data: dict) -> int | None:
+    """Save analysis data by ID. Returns the new version, or None if not found.
+
+    Saving data identical to what is stored is a no-op: nothing is written,
+    the version is unchanged and the elided write is counted.
+    """
     data_json = json.dumps(data)
-    conn = get_db()
-    cursor = conn.execute(
-        """UPDATE analyses 
-           SET data_json = ?, updated_at = CURRENT_TIMESTAMP
-           WHERE id = ?""",
-        (data_json, analysis_id),
-    )
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
-    return success
+    data_hash = content_hash(data_json)
+
+    def update_row(conn: sqlite3.Connection) -> tuple[int | None, bool]:
+        row = conn.execute(
+            """UPDATE analyses 
+               SET data_json = ?, data_hash = ?, version = version + 1,
+                   updated_at = CURRENT_TIMESTAMP
+               WHERE id = ? AND data_hash IS NOT ?
+               RETURNING version""",
+            (data_json, data_hash, analysis_id, data_hash),
+        ).fetchone()
+        if row:
+            return row["version"], False
+
+        row = conn.execute(
+            "SELECT version FROM analyses WHERE id = ?", (analysis_id,)
+        ).fetchone()
+        return (row["version"], True) if row else (None, False)
+
+    version, elided = run_write(update_row)
+    if elided:
+        increment_counter("elided_writes.analysis")
+    return version
+
+
+def patch_analysis(
+    analysis_id: int,
+    business_id: int,
+    operations: list[dict],
+    expected_version: int | None = None,
+) -> int | None:
+    """Apply a JSON Patch (RFC 6902) to an analysis's data.
+
+    The read, patch, schema validation and write run as one write job, so no
+    other write can interleave; a patch that leaves the data unchanged writes
+    nothing. Returns the new version, or None if the business has no such
+    analysis.
+
+    Raises:
+        JsonPatchError: If the patch is malformed or does not apply.
+        AnalysisValidationError: If the patched data violates the schema.
+        VersionConflictError: If expected_version is not the current version.
+    """
+
+    def apply(conn: sqlite3.Connection) -> tuple[int | None, bool]:
+        row = conn.execute(
+            """SELECT template_type, data_json, data_hash, version FROM analyses
+               WHERE id = ? AND business_id = ?""",
+            (analysis_id, business_id),
+        ).fetchone()
+        if not row:
+            return None, False
+        if expected_version is not None and row["version"] != expected_version:
+            raise VersionConflictError(row["version"])
+
+        data = apply_patch(json.loads(row["data_json"]), operations)
+        template = analysis_templates.get_template(row["template_type"])
+        if template:
+            errors = template.validate_data(data)
+            if errors:
+                raise AnalysisValidationError(errors)
+
+        data_json = json.dumps(data)
+        data_hash = content_hash(data_json)
+        if data_hash == row["data_hash"]:
+            return row["version"], True
+
+        cursor = conn.execute(
+            """UPDATE analyses
+               SET data_json = ?, data_hash = ?, version = version + 1,
+                   updated_at = CURRENT_TIMESTAMP
+               WHERE id = ?
+               RETURNING version""",
+            (data_json, data_hash, analysis_id),
+        )
+        return cursor.fetchone()["version"], False
+
+    version, elided = run_write(apply)
+    if elided:
+        increment_counter("elided_writes.analysis")
+    return version
 
 
 def save_analysis(business_id: int, template_type: str, data: dict) -> int:
@@ -99,62 +189,66 @@ def save_analysis(business_id: int, template_type: str, data: dict) -> int:
 
     DEPRECATED: Use save_analysis_by_id instead.
     Kept for backward compatibility - will update the first matching analysis.
+    Saving unchanged data is a no-op (counted as an elided write).
     """
     data_json = json.dumps(data)
-    conn = get_db()
-
-    # Check if an analysis of this type exists
-    cursor = conn.execute(
-        "SELECT id FROM analyses WHERE business_id = ? AND template_type = ?",
-        (business_id, template_type),
-    )
-    existing = cursor.fetchone()
-
-    if existing:
-        # Update existing
-        conn.execute(
-            """UPDATE analyses 
-               SET data_json = ?, updated_at = CURRENT_TIMESTAMP
-               WHERE id = ?""",
-            (data_json, existing["id"]),
+    data_hash = content_hash(data_json)
+
+    def upsert(conn: sqlite3.Connection) -> tuple[int, bool]:
+        # Check if an analysis of this type exists
+        cursor = conn.execute(
+            "SELECT id FROM analyses WHERE business_id = ? AND template_type = ?",
+            (business_id, template_type),
         )
-        analysis_id = existing["id"]
-    else:
+        existing = cursor.fetchone()
+
+        if existing:
+            # Update existing
+            cursor = conn.execute(
+                """UPDATE analyses 
+                   SET data_json = ?, data_hash = ?, version = version + 1,
+                       updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ? AND data_hash IS NOT ?""",
+                (data_json, data_hash, existing["id"], data_hash),
+            )
+            return existing["id"], cursor.rowcount == 0
+
         # Create new with default name
         template = analysis_templates.get_template(template_type)
         name = template.name if template else template_type
         cursor = conn.execute(
-            """INSERT INTO analyses (business_id, name, template_type, data_json)
-               VALUES (?, ?, ?, ?)""",
-            (business_id, name, template_type, data_json),
+            """INSERT INTO analyses (business_id, name, template_type, data_json, data_hash)
+               VALUES (?, ?, ?, ?, ?)""",
+            (business_id, name, template_type, data_json, data_hash),
         )
-        analysis_id = cursor.lastrowid
+        return cursor.lastrowid, False
 
-    conn.commit()
-    conn.close()
+    analysis_id, elided = run_write(upsert)
+    if elided:
+        increment_counter("elided_writes.analysis")
     return analysis_id
 
 
 def update_analysis_name(analysis_id: int, name: str) -> bool:
     """Update an analysis name. Returns True if successful."""
-    conn = get_db()
-    cursor = conn.execute(
-        """UPDATE analyses 
-           SET name = ?, updated_at = CURRENT_TIMESTAMP
-           WHERE id = ?""",
-        (name, analysis_id),
-    )
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
-    return success
+
+    def update_row(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute(
+            """UPDATE analyses 
+               SET name = ?, updated_at = CURRENT_TIMESTAMP
+               WHERE id = ?""",
+            (name, analysis_id),
+        )
+        return cursor.rowcount > 0
+
+    return run_write(update_row)
 
 
 def delete_analysis(analysis_id: int) -> bool:
     """Delete an analysis. Returns True if successful."""
-    conn = get_db()
-    cursor = conn.execute("DELETE FROM analyses WHERE id = ?", (analysis_id,))
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
-    return success
+
+    def delete_row(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute("DELETE FROM analyses WHERE id = ?", (analysis_id,))
+        return cursor.rowcount > 0
+
+    return run_write(delete_row)
@@ -0,0 +1,106 @@
+"""Blobs model - content-addressed storage for uploaded files.
+
+Each distinct file is stored once, at ``uploads/blobs/<aa>/<sha256><ext>``,
+and has a row in the blobs table. Research items reference a blob by hash;
+triggers keep the blob's ref_count equal to the number of items using it.
+Identical uploads share one copy, and no upload can overwrite another.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import BinaryIO
+
+from db import connection, dict_from_row
+from db.writer import run_write
+
+UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
+CHUNK_SIZE = 1024 * 1024
+# Extensions are kept (Gemini and the PDF/audio readers go by them), if sane
+EXTENSION_PATTERN = re.compile(r"^\.[a-z0-9]{1,10}$")
+
+
+def staging_dir() -> Path:
+    """Directory for files being written, on the same disk as the blobs."""
+    path = UPLOAD_DIR / "tmp"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def path_for(blob: dict) -> Path:
+    """Get the absolute path of a stored blob."""
+    return UPLOAD_DIR / blob["path"]
+
+
+def get(sha256: str) -> dict | None:
+    """Get a blob by content hash."""
+    with connection() as conn:
+        cursor = conn.execute("SELECT * FROM blobs WHERE sha256 = ?", (sha256,))
+        return dict_from_row(cursor.fetchone())
+
+
+def _extension(filename: str) -> str:
+    ext = Path(filename).suffix.lower()
+    return ext if EXTENSION_PATTERN.match(ext) else ""
+
+
+def store_file(staged: Path, sha256: str, size: int, filename: str) -> dict:
+    """Move a fully written, hashed file into blob storage.
+
+    If the content is already stored, the staged copy is discarded. Returns
+    the blob row.
+    """
+    relative = f"blobs/{sha256[:2]}/{sha256}{_extension(filename)}"
+
+    def upsert(conn: sqlite3.Connection) -> dict:
+        # Touching updated_at on reuse keeps the collector from dropping an
+        # unreferenced row before the caller gets to reference it
+        cursor = conn.execute(
+            """INSERT INTO blobs (sha256, size, path) VALUES (?, ?, ?)
+               ON CONFLICT(sha256) DO UPDATE SET updated_at = CURRENT_TIMESTAMP
+               RETURNING *""",
+            (sha256, size, relative),
+        )
+        return dict_from_row(cursor.fetchone())
+
+    blob = run_write(upsert)
+    final = path_for(blob)
+    if final.exists():
+        staged.unlink()
+    else:  # new content, or a row that survived its file: restore it
+        final.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(staged, final)
+    return blob
+
+
+def store(stream: BinaryIO, filename: str) -> dict:
+    """Stream an upload into blob storage, hashing it as it is written.
+
+    The file is read in CHUNK_SIZE pieces, so it is never held in memory.
+    Returns the blob row (sha256, size, path, ref_count).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=staging_dir(), delete=False) as staged:
+        try:
+            while chunk := stream.read(CHUNK_SIZE):
+                digest.update(chunk)
+                staged.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            staged.close()
+            os.unlink(staged.name)
+            raise
+    return store_file(Path(staged.name), digest.hexdigest(), size, filename)
+
+
+def usage() -> dict:
+    """Return the number of blobs and the bytes they occupy."""
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM blobs"
+        ).fetchone()
+        return {"blobs": row[0], "bytes": row[1]}
@@ -1,27 +1,77 @@
 """Business model - CRUD operations for businesses."""
 
-from db import get_db, dict_from_row
+import base64
+import json
+import sqlite3
+
+from db import connection, dict_from_row
+from db.writer import run_write
 
 
 BUSINESS_TYPES = ["product", "company", "business_unit"]
 
+# Businesses shown per page of the index
+PAGE_SIZE = 24
+
 
 def get_all() -> list[dict]:
     """Get all businesses."""
-    conn = get_db()
-    cursor = conn.execute("SELECT * FROM businesses ORDER BY updated_at DESC")
-    businesses = [dict_from_row(row) for row in cursor.fetchall()]
-    conn.close()
-    return businesses
+    with connection() as conn:
+        cursor = conn.execute("SELECT * FROM businesses ORDER BY updated_at DESC")
+        return [dict_from_row(row) for row in cursor.fetchall()]
+
+
+def encode_cursor(row: dict) -> str:
+    """Encode a row's (updated_at, id) sort key as an opaque page cursor."""
+    key = json.dumps([row["updated_at"], row["id"]])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    """Decode a page cursor. Raises ValueError if it is malformed."""
+    try:
+        updated_at, business_id = json.loads(base64.urlsafe_b64decode(cursor))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid page cursor: {cursor!r}") from e
+    if not isinstance(updated_at, str) or not isinstance(business_id, int):
+        raise ValueError(f"Invalid page cursor: {cursor!r}")
+    return updated_at, business_id
+
+
+def get_page(
+    after: str | None = None, limit: int = PAGE_SIZE
+) -> tuple[list[dict], str | None]:
+    """Get a page of businesses, most recently updated first.
+
+    Pages are keyed on (updated_at, id) rather than an offset, so each page
+    is an index range scan however deep it is. Returns the businesses and the
+    cursor for the next page (None on the last page).
+    """
+    with connection() as conn:
+        if after is None:
+            cursor = conn.execute(
+                """SELECT * FROM businesses
+                   ORDER BY updated_at DESC, id DESC LIMIT ?""",
+                (limit + 1,),
+            )
+        else:
+            cursor = conn.execute(
+                """SELECT * FROM businesses
+                   WHERE (updated_at, id) < (?, ?)
+                   ORDER BY updated_at DESC, id DESC LIMIT ?""",
+                (*decode_cursor(after), limit + 1),
+            )
+        rows = [dict_from_row(row) for row in cursor.fetchall()]
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
 
 
 def get_by_id(business_id: int) -> dict | None:
     """Get a business by ID."""
-    conn = get_db()
-    cursor = conn.execute("SELECT * FROM businesses WHERE id = ?", (business_id,))
-    business = dict_from_row(cursor.fetchone())
-    conn.close()
-    return business
+    with connection() as conn:
+        cursor = conn.execute("SELECT * FROM businesses WHERE id = ?", (business_id,))
+        return dict_from_row(cursor.fetchone())
 
 
 def create(
@@ -31,16 +81,15 @@ def create(
     if business_type not in BUSINESS_TYPES:
         raise ValueError(f"Invalid business type: {business_type}")
 
-    conn = get_db()
-    cursor = conn.execute(
-        """INSERT INTO businesses (name, description, type, strategic_question)
-           VALUES (?, ?, ?, ?)""",
-        (name, description, business_type, strategic_question),
-    )
-    conn.commit()
-    business_id = cursor.lastrowid
-    conn.close()
-    return business_id
+    def insert(conn: sqlite3.Connection) -> int:
+        cursor = conn.execute(
+            """INSERT INTO businesses (name, description, type, strategic_question)
+               VALUES (?, ?, ?, ?)""",
+            (name, description, business_type, strategic_question),
+        )
+        return cursor.lastrowid
+
+    return run_write(insert)
 
 
 def update(
@@ -54,24 +103,23 @@ def update(
     if business_type not in BUSINESS_TYPES:
         raise ValueError(f"Invalid business type: {business_type}")
 
-    conn = get_db()
-    cursor = conn.execute(
-        """UPDATE businesses 
-           SET name = ?, description = ?, type = ?, strategic_question = ?, updated_at = CURRENT_TIMESTAMP
-           WHERE id = ?""",
-        (name, description, business_type, strategic_question, business_id),
-    )
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
-    return success
+    def update_row(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute(
+            """UPDATE businesses 
+               SET name = ?, description = ?, type = ?, strategic_question = ?, updated_at = CURRENT_TIMESTAMP
+               WHERE id = ?""",
+            (name, description, business_type, strategic_question, business_id),
+        )
+        return cursor.rowcount > 0
+
+    return run_write(update_row)
 
 
 def delete(business_id: int) -> bool:
     """Delete a business. Returns True if successful."""
-    conn = get_db()
-    cursor = conn.execute("DELETE FROM businesses WHERE id = ?", (business_id,))
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
-    return success
+
+    def delete_row(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute("DELETE FROM businesses WHERE id = ?", (business_id,))
+        return cursor.rowcount > 0
+
+    return run_write(delete_row)
@@ -0,0 +1,243 @@
+"""Jobs model - persistent queue for background work on research items.
+
+A job is claimed by setting it 'running' with a lease. Workers renew the
+lease while they work; a job whose lease expires (because its worker or the
+whole server died) is claimed again by the next worker that looks.
+"""
+
+import json
+import sqlite3
+import time
+from typing import Collection
+
+from db import connection, dict_from_row
+from db.writer import run_write
+
+JOB_STATUSES = ["queued", "running", "done", "failed"]
+# Attempts before a job (and its research item) is marked failed
+MAX_ATTEMPTS = 3
+# Seconds before the first retry; doubles with each further attempt
+RETRY_DELAY = 10
+
+
+def get_job(job_id: int) -> dict | None:
+    """Get a job by ID."""
+    with connection() as conn:
+        cursor = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return dict_from_row(cursor.fetchone())
+
+
+def get_latest_job_for_item(research_item_id: int) -> dict | None:
+    """Get the most recent job for a research item."""
+    with connection() as conn:
+        cursor = conn.execute(
+            "SELECT * FROM jobs WHERE research_item_id = ? ORDER BY id DESC LIMIT 1",
+            (research_item_id,),
+        )
+        return dict_from_row(cursor.fetchone())
+
+
+def enqueue(
+    kind: str,
+    research_item_id: int,
+    payload: dict | None = None,
+    mark_pending: bool = True,
+) -> int:
+    """Queue a job for a research item. Returns the job ID.
+
+    The item shows as pending until the job is done, unless mark_pending is
+    False (for jobs that usually leave the item as it is).
+    """
+
+    def insert(conn: sqlite3.Connection) -> int:
+        cursor = conn.execute(
+            """INSERT INTO jobs (kind, research_item_id, payload_json)
+               VALUES (?, ?, ?)""",
+            (kind, research_item_id, json.dumps(payload or {})),
+        )
+        if mark_pending:
+            conn.execute(
+                "UPDATE research_items SET status = 'pending' WHERE id = ?",
+                (research_item_id,),
+            )
+        return cursor.lastrowid
+
+    return run_write(insert)
+
+
+def claim(
+    worker: str,
+    lease_seconds: float,
+    kinds: Collection[str] | None = None,
+    exclude_kinds: Collection[str] = (),
+) -> dict | None:
+    """Claim the oldest runnable job for a worker, or return None.
+
+    Runnable means queued and due, or running with an expired lease. Only
+    jobs of ``kinds`` (if given) and not of ``exclude_kinds`` are claimed.
+    Idle workers poll this, so it first looks for such a job on a read
+    connection, and only takes the write lock when there is one to claim.
+    """
+    now = time.time()
+    where = """((status = 'queued' AND run_after <= ?)
+                OR (status = 'running' AND lease_expires_at < ?))"""
+    params = [now, now]
+    if kinds is not None:
+        where += f" AND kind IN ({', '.join('?' * len(kinds))})"
+        params += kinds
+    if exclude_kinds:
+        where += f" AND kind NOT IN ({', '.join('?' * len(exclude_kinds))})"
+        params += exclude_kinds
+    with connection() as conn:
+        runnable = conn.execute(
+            f"SELECT 1 FROM jobs WHERE {where} LIMIT 1", params
+        ).fetchone()
+    if runnable is None:
+        return None
+
+    def claim_row(conn: sqlite3.Connection) -> dict | None:
+        cursor = conn.execute(
+            f"""UPDATE jobs
+                SET status = 'running', attempts = attempts + 1, worker = ?,
+                    lease_expires_at = ?, progress_json = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = (SELECT id FROM jobs WHERE {where} ORDER BY id LIMIT 1)
+                RETURNING *""",
+            (worker, now + lease_seconds, *params),
+        )
+        return dict_from_row(cursor.fetchone())
+
+    return run_write(claim_row)
+
+
+def renew_lease(job_id: int, worker: str, lease_seconds: float) -> bool:
+    """Extend a running job's lease. Returns False if the worker lost the job."""
+
+    def renew(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute(
+            """UPDATE jobs SET lease_expires_at = ?
+               WHERE id = ? AND worker = ? AND status = 'running'""",
+            (time.time() + lease_seconds, job_id, worker),
+        )
+        return cursor.rowcount > 0
+
+    return run_write(renew)
+
+
+def set_progress(
+    job_id: int, worker: str, done: int, total: int, partial_text: str = ""
+) -> bool:
+    """Record a running job's progress and the text extracted so far.
+
+    Returns False if the worker no longer holds the job.
+    """
+    progress = {"done": done, "total": total, "partial_text": partial_text}
+
+    def record(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute(
+            """UPDATE jobs SET progress_json = ?, updated_at = CURRENT_TIMESTAMP
+               WHERE id = ? AND worker = ? AND status = 'running'""",
+            (json.dumps(progress), job_id, worker),
+        )
+        return cursor.rowcount > 0
+
+    return run_write(record)
+
+
+def get_progress(job: dict) -> dict | None:
+    """Decode a job's progress, or None if it has not reported any."""
+    return json.loads(job["progress_json"]) if job.get("progress_json") else None
+
+
+def get_result(job: dict) -> dict | None:
+    """Decode a finished job's result, or None if it recorded none."""
+    return json.loads(job["result_json"]) if job.get("result_json") else None
+
+
+def complete(
+    job_id: int, worker: str, plain_text: str | None, result: dict | None = None
+) -> bool:
+    """Mark a job done and store the extracted text on its research item.
+
+    A plain_text of None leaves the item's text as it is, and touches the
+    item only to mark it ready if it is not already. result, if given,
+    records details of how the text was produced. Returns
+    False (changing nothing) if the worker no longer holds the job, e.g.
+    because its lease expired and another worker reclaimed it.
+    """
+
+    def finish(conn: sqlite3.Connection) -> bool:
+        row = conn.execute(
+            """UPDATE jobs
+               SET status = 'done', error = NULL, lease_expires_at = NULL,
+                   progress_json = NULL, result_json = ?,
+                   updated_at = CURRENT_TIMESTAMP
+               WHERE id = ? AND worker = ? AND status = 'running'
+               RETURNING research_item_id""",
+            (json.dumps(result) if result is not None else None, job_id, worker),
+        ).fetchone()
+        if row is None:
+            return False
+        if plain_text is None:
+            conn.execute(
+                """UPDATE research_items SET status = 'ready'
+                   WHERE id = ? AND status != 'ready'""",
+                (row["research_item_id"],),
+            )
+        else:
+            conn.execute(
+                """UPDATE research_items
+                   SET plain_text = ?, status = 'ready', updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ?""",
+                (plain_text, row["research_item_id"]),
+            )
+        return True
+
+    return run_write(finish)
+
+
+def fail(job_id: int, worker: str, error: str) -> str:
+    """Record a failed attempt. Returns the job's new status.
+
+    The job is retried with exponential backoff until it has used
+    MAX_ATTEMPTS, then it and its research item are marked failed. Returns
+    "lost" (changing nothing) if the worker no longer holds the job.
+    """
+
+    def record(conn: sqlite3.Connection) -> str:
+        row = conn.execute(
+            """SELECT attempts, research_item_id FROM jobs
+               WHERE id = ? AND worker = ? AND status = 'running'""",
+            (job_id, worker),
+        ).fetchone()
+        if not row:
+            return "lost"
+        if row["attempts"] < MAX_ATTEMPTS:
+            status = "queued"
+            run_after = time.time() + RETRY_DELAY * 2 ** (row["attempts"] - 1)
+        else:
+            status = "failed"
+            run_after = 0
+            conn.execute(
+                "UPDATE research_items SET status = 'failed' WHERE id = ?",
+                (row["research_item_id"],),
+            )
+        conn.execute(
+            """UPDATE jobs
+               SET status = ?, error = ?, run_after = ?, lease_expires_at = NULL,
+                   updated_at = CURRENT_TIMESTAMP
+               WHERE id = ?""",
+            (status, error, run_after, job_id),
+        )
+        return status
+
+    return run_write(record)
+
+
+def count_by_status() -> dict:
+    """Return the number of jobs in each status."""
+    with connection() as conn:
+        cursor = conn.execute("SELECT status, count(*) FROM jobs GROUP BY status")
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update({row[0]: row[1] for row in cursor.fetchall()})
+        return counts
@@ -1,41 +1,56 @@
 """Research model - CRUD operations for research items and quotes."""
 
-from pathlib import Path
-from db import get_db, dict_from_row
+import sqlite3
+from db import connection, dict_from_row
+from db.writer import run_write
 
-UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
 ITEM_TYPES = ["article", "note", "interview", "document", "other"]
 
+# Column projections for research item queries. Only "text" and "full" pull
+# the plain_text blob into Python; text_length is computed by SQLite.
+ITEM_PROJECTIONS = {
+    "metadata": """id, business_id, title, source_reference, original_file_path,
+                   blob_sha256, item_type, status, created_at, updated_at,
+                   length(plain_text) AS text_length""",
+    "text": "id, business_id, plain_text",
+    "full": "*, length(plain_text) AS text_length",
+}
 
-def ensure_upload_dir(business_id: int) -> Path:
-    """Ensure upload directory exists for a business."""
-    path = UPLOAD_DIR / str(business_id)
-    path.mkdir(parents=True, exist_ok=True)
-    return path
+
+def _item_columns(projection: str) -> str:
+    """Get the SELECT column list for a research item projection."""
+    try:
+        return ITEM_PROJECTIONS[projection]
+    except KeyError:
+        raise ValueError(f"Invalid projection: {projection}") from None
 
 
 # --- Research Items ---
 
 
-def get_items_for_business(business_id: int) -> list[dict]:
-    """Get all research items for a business."""
-    conn = get_db()
-    cursor = conn.execute(
-        "SELECT * FROM research_items WHERE business_id = ? ORDER BY created_at DESC",
-        (business_id,),
-    )
-    items = [dict_from_row(row) for row in cursor.fetchall()]
-    conn.close()
-    return items
+def get_items_for_business(business_id: int, projection: str = "full") -> list[dict]:
+    """Get all research items for a business.
+
+    ``projection`` is a key of ITEM_PROJECTIONS; use "metadata" when the
+    item text is not needed.
+    """
+    with connection() as conn:
+        cursor = conn.execute(
+            f"""SELECT {_item_columns(projection)} FROM research_items
+                WHERE business_id = ? ORDER BY created_at DESC""",
+            (business_id,),
+        )
+        return [dict_from_row(row) for row in cursor.fetchall()]
 
 
-def get_item_by_id(item_id: int) -> dict | None:
-    """Get a research item by ID."""
-    conn = get_db()
-    cursor = conn.execute("SELECT * FROM research_items WHERE id = ?", (item_id,))
-    item = dict_from_row(cursor.fetchone())
-    conn.close()
-    return item
+def get_item_by_id(item_id: int, projection: str = "full") -> dict | None:
+    """Get a research item by ID, limited to the columns of ``projection``."""
+    with connection() as conn:
+        cursor = conn.execute(
+            f"SELECT {_item_columns(projection)} FROM research_items WHERE id = ?",
+            (item_id,),
+        )
+        return dict_from_row(cursor.fetchone())
 
 
 def create_item(
@@ -45,56 +60,70 @@ def create_item(
     source_reference: str = "",
     plain_text: str = "",
     original_file_path: str = "",
+    extraction_job: str | None = None,
+    blob_sha256: str | None = None,
 ) -> int:
-    """Create a new research item. Returns the new item ID."""
+    """Create a new research item. Returns the new item ID.
+
+    blob_sha256 names the uploaded file the item came from (see blobs). If
+    extraction_job names a job kind, the item starts out 'pending' and the
+    job that will fill in its text is queued in the same transaction.
+    """
     if item_type not in ITEM_TYPES:
         raise ValueError(f"Invalid item type: {item_type}")
 
-    conn = get_db()
-    cursor = conn.execute(
-        """INSERT INTO research_items 
-           (business_id, title, item_type, source_reference, plain_text, original_file_path)
-           VALUES (?, ?, ?, ?, ?, ?)""",
-        (
-            business_id,
-            title,
-            item_type,
-            source_reference,
-            plain_text,
-            original_file_path,
-        ),
-    )
-    conn.commit()
-    item_id = cursor.lastrowid
-    conn.close()
-    return item_id
+    def insert(conn: sqlite3.Connection) -> int:
+        cursor = conn.execute(
+            """INSERT INTO research_items 
+               (business_id, title, item_type, source_reference, plain_text,
+                original_file_path, blob_sha256, status)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                business_id,
+                title,
+                item_type,
+                source_reference,
+                plain_text,
+                original_file_path,
+                blob_sha256,
+                "pending" if extraction_job else "ready",
+            ),
+        )
+        if extraction_job:
+            conn.execute(
+                "INSERT INTO jobs (kind, research_item_id) VALUES (?, ?)",
+                (extraction_job, cursor.lastrowid),
+            )
+        return cursor.lastrowid
+
+    return run_write(insert)
 
 
 def update_item(
     item_id: int, title: str, source_reference: str, plain_text: str
 ) -> bool:
     """Update a research item. Returns True if successful."""
-    conn = get_db()
-    cursor = conn.execute(
-        """UPDATE research_items 
-           SET title = ?, source_reference = ?, plain_text = ?, updated_at = CURRENT_TIMESTAMP
-           WHERE id = ?""",
-        (title, source_reference, plain_text, item_id),
-    )
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
-    return success
+
+    def update_row(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute(
+            """UPDATE research_items 
+               SET title = ?, source_reference = ?, plain_text = ?, updated_at = CURRENT_TIMESTAMP
+               WHERE id = ?""",
+            (title, source_reference, plain_text, item_id),
+        )
+        return cursor.rowcount > 0
+
+    return run_write(update_row)
 
 
 def delete_item(item_id: int) -> bool:
     """Delete a research item. Returns True if successful."""
-    conn = get_db()
-    cursor = conn.execute("DELETE FROM research_items WHERE id = ?", (item_id,))
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
-    return success
+
+    def delete_row(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute("DELETE FROM research_items WHERE id = ?", (item_id,))
+        return cursor.rowcount > 0
+
+    return run_write(delete_row)
 
 
 # --- Quotes ---
@@ -102,35 +131,55 @@ def delete_item(item_id: int) -> bool:
 
 def get_quotes_for_item(item_id: int) -> list[dict]:
     """Get all quotes for a research item."""
-    conn = get_db()
-    cursor = conn.execute(
-        "SELECT * FROM quotes WHERE research_item_id = ? ORDER BY start_offset",
-        (item_id,),
-    )
-    quotes = [dict_from_row(row) for row in cursor.fetchall()]
-    conn.close()
+    with connection() as conn:
+        cursor = conn.execute(
+            "SELECT * FROM quotes WHERE research_item_id = ? ORDER BY start_offset",
+            (item_id,),
+        )
+        return [dict_from_row(row) for row in cursor.fetchall()]
+
+
+def get_quotes_for_business(business_id: int) -> dict[int, list[dict]]:
+    """Get all quotes for a business's research items in a single query.
+
+    Returns a mapping of research item ID to that item's quotes, ordered by
+    start offset. Items without quotes are absent from the mapping.
+    """
+    with connection() as conn:
+        cursor = conn.execute(
+            """SELECT q.* FROM quotes q
+               JOIN research_items r ON r.id = q.research_item_id
+               WHERE r.business_id = ?
+               ORDER BY q.research_item_id, q.start_offset""",
+            (business_id,),
+        )
+        rows = cursor.fetchall()
+
+    quotes: dict[int, list[dict]] = {}
+    for row in rows:
+        quotes.setdefault(row["research_item_id"], []).append(dict_from_row(row))
     return quotes
 
 
 def create_quote(item_id: int, start_offset: int, end_offset: int, text: str) -> int:
     """Create a new quote. Returns the new quote ID."""
-    conn = get_db()
-    cursor = conn.execute(
-        """INSERT INTO quotes (research_item_id, start_offset, end_offset, text)
-           VALUES (?, ?, ?, ?)""",
-        (item_id, start_offset, end_offset, text),
-    )
-    conn.commit()
-    quote_id = cursor.lastrowid
-    conn.close()
-    return quote_id
+
+    def insert(conn: sqlite3.Connection) -> int:
+        cursor = conn.execute(
+            """INSERT INTO quotes (research_item_id, start_offset, end_offset, text)
+               VALUES (?, ?, ?, ?)""",
+            (item_id, start_offset, end_offset, text),
+        )
+        return cursor.lastrowid
+
+    return run_write(insert)
 
 
 def delete_quote(quote_id: int) -> bool:
     """Delete a quote. Returns True if successful."""
-    conn = get_db()
-    cursor = conn.execute("DELETE FROM quotes WHERE id = ?", (quote_id,))
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
-    return success
+
+    def delete_row(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute("DELETE FROM quotes WHERE id = ?", (quote_id,))
+        return cursor.rowcount > 0
+
+    return run_write(delete_row)
@@ -5,7 +5,7 @@ possible futures, and analysis for each intersection.
 """
 
 import json
-from db import get_db
+from db import connection
 
 
 def get_empty_data() -> dict:
@@ -22,10 +22,11 @@ def get_scenario_planning(business_id: int) -> dict:
     Returns:
         Dictionary with strategies, futures, and cells data
     """
-    db = get_db()
-    row = db.execute(
-        "SELECT data_json FROM scenario_planning WHERE business_id = ?", (business_id,)
-    ).fetchone()
+    with connection() as db:
+        row = db.execute(
+            "SELECT data_json FROM scenario_planning WHERE business_id = ?",
+            (business_id,),
+        ).fetchone()
 
     if row:
         return json.loads(row["data_json"])
@@ -39,15 +40,15 @@ def save_scenario_planning(business_id: int, data: dict) -> None:
         business_id: The business ID
         data: Dictionary with strategies, futures, and cells
     """
-    db = get_db()
     data_json = json.dumps(data)
 
-    db.execute(
-        """INSERT INTO scenario_planning (business_id, data_json, updated_at)
-           VALUES (?, ?, CURRENT_TIMESTAMP)
-           ON CONFLICT(business_id) DO UPDATE SET
-               data_json = excluded.data_json,
-               updated_at = CURRENT_TIMESTAMP""",
-        (business_id, data_json),
-    )
-    db.commit()
+    with connection() as db:
+        db.execute(
+            """INSERT INTO scenario_planning (business_id, data_json, updated_at)
+               VALUES (?, ?, CURRENT_TIMESTAMP)
+               ON CONFLICT(business_id) DO UPDATE SET
+                   data_json = excluded.data_json,
+                   updated_at = CURRENT_TIMESTAMP""",
+            (business_id, data_json),
+        )
+        db.commit()
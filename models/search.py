@@ -0,0 +1,118 @@
+"""Search model - full-text search over research items and quotes."""
+
+import re
+from db import connection
+
+# Markers wrapped around matched terms by snippet(); stripped before returning
+_HIGHLIGHT_START = "\x02"
+_HIGHLIGHT_END = "\x03"
+_SNIPPET_TOKENS = 24
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 MATCH expression.
+
+    Every word becomes a quoted term, so punctuation and FTS5 operators typed
+    by the user are matched literally. All terms must be present; the last
+    one also matches as a prefix so partially typed words find results.
+    """
+    terms = _TERM_PATTERN.findall(query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def parse_snippet(marked: str) -> tuple[str, list[list[int]]]:
+    """Strip highlight markers from a snippet.
+
+    Returns the clean snippet and [start, end) character offsets of each
+    highlighted span within it.
+    """
+    text = []
+    highlights = []
+    length = 0
+    start = None
+    for part in re.split(f"([{_HIGHLIGHT_START}{_HIGHLIGHT_END}])", marked):
+        if part == _HIGHLIGHT_START:
+            start = length
+        elif part == _HIGHLIGHT_END:
+            if start is not None:
+                highlights.append([start, length])
+            start = None
+        else:
+            text.append(part)
+            length += len(part)
+    return "".join(text), highlights
+
+
+def search_business(business_id: int, query: str, limit: int = 20) -> list[dict]:
+    """Search a business's research items and quotes.
+
+    Results are ordered by BM25 relevance (title matches weigh more than body
+    matches). Each has a "kind" of "item" or "quote", the research item it
+    belongs to, a snippet and highlight offsets into that snippet.
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    with connection() as conn:
+        # Rank first; snippets are expensive, so only build them for the top hits
+        hits = conn.execute(
+            """WITH item_hits AS (
+                   SELECT f.rowid AS id, r.id AS research_item_id, r.title, f.rank
+                   FROM research_items_fts f
+                   JOIN research_items r ON r.id = f.rowid
+                   WHERE research_items_fts MATCH :match AND r.business_id = :business_id
+                   ORDER BY f.rank LIMIT :limit
+               ),
+               quote_hits AS (
+                   SELECT f.rowid AS id, r.id AS research_item_id, r.title, f.rank
+                   FROM quotes_fts f
+                   JOIN quotes q ON q.id = f.rowid
+                   JOIN research_items r ON r.id = q.research_item_id
+                   WHERE quotes_fts MATCH :match AND r.business_id = :business_id
+                   ORDER BY f.rank LIMIT :limit
+               )
+               SELECT 'item' AS kind, * FROM item_hits
+               UNION ALL
+               SELECT 'quote' AS kind, * FROM quote_hits
+               ORDER BY rank LIMIT :limit""",
+            {"match": match, "business_id": business_id, "limit": limit},
+        ).fetchall()
+
+        snippets = {}
+        for kind, table in (("item", "research_items_fts"), ("quote", "quotes_fts")):
+            ids = [hit["id"] for hit in hits if hit["kind"] == kind]
+            if not ids:
+                continue
+            placeholders = ", ".join("?" * len(ids))
+            cursor = conn.execute(
+                f"""SELECT rowid, snippet({table}, -1, ?, ?, '…', ?) AS snippet
+                    FROM {table}
+                    WHERE {table} MATCH ? AND rowid IN ({placeholders})""",
+                (_HIGHLIGHT_START, _HIGHLIGHT_END, _SNIPPET_TOKENS, match, *ids),
+            )
+            for row in cursor:
+                snippets[kind, row["rowid"]] = row["snippet"]
+
+    results = []
+    for hit in hits:
+        snippet, highlights = parse_snippet(snippets.get((hit["kind"], hit["id"])) or "")
+        results.append(
+            {
+                "kind": hit["kind"],
+                "research_item_id": hit["research_item_id"],
+                "quote_id": hit["id"] if hit["kind"] == "quote" else None,
+                "title": hit["title"],
+                "snippet": snippet,
+                "highlights": highlights,
+                # FTS5 rank is lower-is-better; flip it so higher scores rank first
+                "score": -hit["rank"],
+            }
+        )
+    return results
@@ -1,41 +1,55 @@
 """Summary model - CRUD operations for summaries."""
 
+import os
 import markdown
+import sqlite3
+import tempfile
 from pathlib import Path
-from db import get_db, dict_from_row
+import db
+from db import connection, content_hash, dict_from_row, increment_counter
+from db.writer import run_write
+from services import pdf_renderer
 
 
 def get_summary(business_id: int) -> dict | None:
     """Get the summary for a business."""
-    conn = get_db()
-    cursor = conn.execute(
-        "SELECT * FROM summaries WHERE business_id = ?", (business_id,)
-    )
-    summary = dict_from_row(cursor.fetchone())
-    conn.close()
-    return summary
+    with connection() as conn:
+        cursor = conn.execute(
+            "SELECT * FROM summaries WHERE business_id = ?", (business_id,)
+        )
+        return dict_from_row(cursor.fetchone())
 
 
 def save_summary(business_id: int, markdown_content: str) -> int:
-    """Save or update a summary. Returns the summary ID."""
-    conn = get_db()
-
-    # Use upsert
-    cursor = conn.execute(
-        """INSERT INTO summaries (business_id, markdown_content)
-           VALUES (?, ?)
-           ON CONFLICT(business_id) 
-           DO UPDATE SET markdown_content = ?, updated_at = CURRENT_TIMESTAMP""",
-        (business_id, markdown_content, markdown_content),
-    )
-    conn.commit()
+    """Save or update a summary. Returns the summary ID.
 
-    # Get the ID
-    cursor = conn.execute(
-        "SELECT id FROM summaries WHERE business_id = ?", (business_id,)
-    )
-    summary_id = cursor.fetchone()["id"]
-    conn.close()
+    Saving unchanged content is a no-op (counted as an elided write).
+    """
+    markdown_hash = content_hash(markdown_content)
+
+    def upsert(conn: sqlite3.Connection) -> tuple[int, bool]:
+        # Use upsert; the WHERE clause skips updates that would change nothing
+        cursor = conn.execute(
+            """INSERT INTO summaries (business_id, markdown_content, content_hash)
+               VALUES (?, ?, ?)
+               ON CONFLICT(business_id) 
+               DO UPDATE SET markdown_content = excluded.markdown_content,
+                             content_hash = excluded.content_hash,
+                             updated_at = CURRENT_TIMESTAMP
+               WHERE summaries.content_hash IS NOT excluded.content_hash""",
+            (business_id, markdown_content, markdown_hash),
+        )
+        elided = cursor.rowcount == 0
+
+        # Get the ID
+        cursor = conn.execute(
+            "SELECT id FROM summaries WHERE business_id = ?", (business_id,)
+        )
+        return cursor.fetchone()["id"], elided
+
+    summary_id, elided = run_write(upsert)
+    if elided:
+        increment_counter("elided_writes.summary")
     return summary_id
 
 
@@ -46,59 +60,123 @@ def markdown_to_html(markdown_content: str) -> str:
     )
 
 
-def export_to_pdf(business_id: int, output_path: str | Path) -> Path:
-    """Export summary to PDF. Returns the output path."""
-    from weasyprint import HTML, CSS
-
-    summary = get_summary(business_id)
-    if not summary:
-        raise ValueError(f"No summary found for business {business_id}")
-
-    html_content = markdown_to_html(summary["markdown_content"])
-
-    # Wrap in basic HTML structure with styling
-    full_html = f"""
-    <!DOCTYPE html>
+# Exported PDFs are cached as files named by the hash of the markdown and the
+# stylesheet they were rendered from, so an unchanged summary is never
+# rendered twice. The least recently exported are removed past the size cap.
+PDF_CACHE_DIR = os.environ.get("SUMMARY_PDF_CACHE_DIR")
+PDF_CACHE_MAX_BYTES = (
+    int(os.environ.get("SUMMARY_PDF_CACHE_MAX_MB", "256")) * 1024 * 1024
+)
+
+STYLESHEET = """
+    body {
+        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+        line-height: 1.6;
+        max-width: 800px;
+        margin: 40px auto;
+        padding: 20px;
+        color: #333;
+    }
+    h1, h2, h3 { color: #1a1a2e; }
+    blockquote {
+        border-left: 4px solid #4361ee;
+        margin-left: 0;
+        padding-left: 20px;
+        color: #555;
+    }
+    table {
+        border-collapse: collapse;
+        width: 100%;
+        margin: 20px 0;
+    }
+    th, td {
+        border: 1px solid #ddd;
+        padding: 8px;
+        text-align: left;
+    }
+    th { background-color: #f4f4f4; }
+"""
+# Changes whenever the stylesheet does, invalidating cached PDFs
+STYLESHEET_VERSION = content_hash(STYLESHEET)[:16]
+
+
+def render_html(markdown_content: str) -> str:
+    """Render summary markdown as a standalone, styled HTML document."""
+    return f"""<!DOCTYPE html>
     <html>
     <head>
         <meta charset="utf-8">
-        <style>
-            body {{
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                line-height: 1.6;
-                max-width: 800px;
-                margin: 40px auto;
-                padding: 20px;
-                color: #333;
-            }}
-            h1, h2, h3 {{ color: #1a1a2e; }}
-            blockquote {{
-                border-left: 4px solid #4361ee;
-                margin-left: 0;
-                padding-left: 20px;
-                color: #555;
-            }}
-            table {{
-                border-collapse: collapse;
-                width: 100%;
-                margin: 20px 0;
-            }}
-            th, td {{
-                border: 1px solid #ddd;
-                padding: 8px;
-                text-align: left;
-            }}
-            th {{ background-color: #f4f4f4; }}
-        </style>
+        <style>{STYLESHEET}</style>
     </head>
     <body>
-        {html_content}
+        {markdown_to_html(markdown_content)}
     </body>
     </html>
     """
 
-    output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    HTML(string=full_html).write_pdf(output_path)
-    return output_path
+def render_pdf(markdown_content: str) -> bytes:
+    """Render summary markdown to PDF, in memory, in a renderer process."""
+    return pdf_renderer.render_pdf(render_html(markdown_content))
+
+
+def pdf_cache_dir() -> Path:
+    """Directory of cached summary PDFs (next to the database by default)."""
+    if PDF_CACHE_DIR:
+        return Path(PDF_CACHE_DIR)
+    return db.DATABASE_PATH.parent / "summary_pdfs"
+
+
+def pdf_cache_key(summary: dict) -> str:
+    """Identify a summary's PDF: the hash of its markdown and the stylesheet.
+
+    Also serves as the PDF's ETag.
+    """
+    markdown_hash = summary["content_hash"] or content_hash(summary["markdown_content"])
+    return content_hash(f"{markdown_hash}:{STYLESHEET_VERSION}")
+
+
+def _evict_pdfs(directory: Path, keep: Path) -> None:
+    files = []
+    for path in directory.glob("*.pdf"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files, key=lambda entry: entry[0]):
+        if total <= PDF_CACHE_MAX_BYTES:
+            break
+        if path != keep:
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def export_to_pdf(business_id: int) -> Path:
+    """Export a summary to PDF. Returns the path of the cached file.
+
+    The file is named by pdf_cache_key, and is only rendered if no PDF of
+    this markdown and stylesheet is cached. A render is written to a unique
+    temporary file and renamed into place, so concurrent exports never see
+    a partly written PDF.
+    """
+    summary = get_summary(business_id)
+    if not summary:
+        raise ValueError(f"No summary found for business {business_id}")
+
+    directory = pdf_cache_dir()
+    path = directory / f"{pdf_cache_key(summary)}.pdf"
+    if path.exists():
+        os.utime(path)  # recently used, for eviction
+        increment_counter("summary_pdf.cache_hits")
+        return path
+
+    pdf = render_pdf(summary["markdown_content"])
+    directory.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+        f.write(pdf)
+    os.replace(f.name, path)
+    increment_counter("summary_pdf.renders")
+    _evict_pdfs(directory, keep=path)
+    return path
@@ -0,0 +1,234 @@
+"""Uploads model - resumable, chunked file uploads (in the style of tus).
+
+An upload is created with the file's name and total length, then its bytes
+arrive as chunks appended at the current offset. A client that loses its
+connection asks for the offset and carries on from there. Once every byte
+is in, finishing the upload moves the file into blob storage.
+
+Each chunk is first written to a temporary file (and checked against its
+checksum, if one was sent). Only then is it copied into the upload's staging
+file, under an exclusive lock on that file, after which a short conditional
+update advances bytes_received. A chunk that fails, or arrives incomplete,
+therefore leaves the offset where it was, and the file copy never holds up
+the database writer.
+"""
+
+import base64
+import hashlib
+import os
+import secrets
+import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from db import connection, dict_from_row
+from db.writer import run_write
+from models import blobs
+
+MAX_LENGTH = int(os.environ.get("RESUMABLE_UPLOAD_MAX_MB", "2048")) * 1024 * 1024
+CHECKSUM_ALGORITHMS = {"md5", "sha1", "sha256", "sha512"}
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class OffsetMismatchError(Exception):
+    """Raised when a chunk does not start at the upload's current offset."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+class ChecksumMismatchError(ValueError):
+    """Raised when a chunk does not match the checksum sent with it."""
+
+
+def part_path(upload: dict) -> Path:
+    """Get the staging file holding the bytes received so far."""
+    return blobs.staging_dir() / f"{upload['id']}.part"
+
+
+@contextmanager
+def _locked_part(upload: dict) -> Iterator[BinaryIO]:
+    """Open an upload's staging file for writing, holding an exclusive lock
+    on it across processes. Raises FileNotFoundError if it is gone."""
+    with open(part_path(upload), "r+b") as part:
+        if os.name == "nt":
+            msvcrt.locking(part.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(part.fileno(), fcntl.LOCK_EX)
+        try:
+            yield part
+        finally:
+            if os.name == "nt":
+                part.seek(0)
+                msvcrt.locking(part.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(part.fileno(), fcntl.LOCK_UN)
+
+
+def _bytes_received(upload_id: str) -> int | None:
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT bytes_received FROM uploads WHERE id = ?", (upload_id,)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def get(upload_id: str) -> dict | None:
+    """Get an upload in progress. Returns None if it is unknown or expired
+    (its staging file was garbage collected)."""
+    with connection() as conn:
+        cursor = conn.execute("SELECT * FROM uploads WHERE id = ?", (upload_id,))
+        upload = dict_from_row(cursor.fetchone())
+    if upload is None or not part_path(upload).exists():
+        return None
+    return upload
+
+
+def create(business_id: int, filename: str, length: int) -> dict:
+    """Start an upload of ``length`` bytes. Returns the upload row."""
+    if not filename:
+        raise ValueError("A filename is required")
+    if not 0 < length <= MAX_LENGTH:
+        raise ValueError(f"Upload length must be between 1 and {MAX_LENGTH} bytes")
+    upload_id = secrets.token_urlsafe(16)
+    part_path({"id": upload_id}).touch()
+
+    def insert(conn: sqlite3.Connection) -> dict:
+        cursor = conn.execute(
+            """INSERT INTO uploads (id, business_id, filename, length)
+               VALUES (?, ?, ?, ?) RETURNING *""",
+            (upload_id, business_id, Path(filename).name, length),
+        )
+        return dict_from_row(cursor.fetchone())
+
+    return run_write(insert)
+
+
+def parse_checksum(header: str) -> tuple[str, bytes]:
+    """Parse an ``Upload-Checksum: <algorithm> <base64 digest>`` header."""
+    algorithm, _, encoded = header.strip().partition(" ")
+    if algorithm.lower() not in CHECKSUM_ALGORITHMS:
+        raise ValueError(f"Unsupported checksum algorithm: {algorithm}")
+    try:
+        return algorithm.lower(), base64.b64decode(encoded, validate=True)
+    except ValueError:
+        raise ValueError("Checksum is not valid base64") from None
+
+
+def append(
+    upload_id: str,
+    offset: int,
+    stream: BinaryIO,
+    checksum: tuple[str, bytes] | None = None,
+) -> dict | None:
+    """Append a chunk at ``offset``. Returns the updated upload.
+
+    Raises OffsetMismatchError if the upload is not at ``offset`` (another
+    chunk got there first, or the client has the wrong offset), and
+    ChecksumMismatchError if checksum is (algorithm, digest) and the chunk
+    does not match it. Returns None if the upload does not exist.
+    """
+    upload = get(upload_id)
+    if upload is None:
+        return None
+    if offset != upload["bytes_received"]:
+        raise OffsetMismatchError(upload["bytes_received"])
+
+    digest = hashlib.new(checksum[0]) if checksum else None
+    size = 0
+    with tempfile.TemporaryFile(dir=blobs.staging_dir()) as chunk:
+        while data := stream.read(blobs.CHUNK_SIZE):
+            size += len(data)
+            if offset + size > upload["length"]:
+                raise ValueError("Chunk runs past the declared upload length")
+            if digest:
+                digest.update(data)
+            chunk.write(data)
+        if digest and digest.digest() != checksum[1]:
+            raise ChecksumMismatchError(f"Chunk does not match its {checksum[0]}")
+
+        try:
+            with _locked_part(upload) as part:
+                # No other chunk can land while we hold the lock, so the
+                # offset read now is the one this chunk must start at
+                received = _bytes_received(upload_id)
+                if received is None:
+                    return None  # abandoned meanwhile
+                if received != offset:
+                    raise OffsetMismatchError(received)
+                # Anything past offset is left over from a chunk that never
+                # committed, and is overwritten
+                chunk.seek(0)
+                part.seek(offset)
+                shutil.copyfileobj(chunk, part, blobs.CHUNK_SIZE)
+                part.truncate()
+                part.flush()
+                os.fsync(part.fileno())
+
+                def advance(conn: sqlite3.Connection) -> dict | None:
+                    cursor = conn.execute(
+                        """UPDATE uploads SET bytes_received = ?,
+                               updated_at = CURRENT_TIMESTAMP
+                           WHERE id = ? AND bytes_received = ? RETURNING *""",
+                        (offset + size, upload_id, offset),
+                    )
+                    return dict_from_row(cursor.fetchone())
+
+                return run_write(advance)  # None if abandoned meanwhile
+        except FileNotFoundError:
+            return None  # expired and collected meanwhile
+
+
+def delete(upload_id: str) -> bool:
+    """Abandon an upload, removing its staged bytes."""
+
+    def delete_row(conn: sqlite3.Connection) -> dict | None:
+        cursor = conn.execute(
+            "DELETE FROM uploads WHERE id = ? RETURNING *", (upload_id,)
+        )
+        return dict_from_row(cursor.fetchone())
+
+    upload = run_write(delete_row)
+    if upload is None:
+        return False
+    part_path(upload).unlink(missing_ok=True)
+    return True
+
+
+def finish(upload_id: str) -> tuple[dict, str] | None:
+    """Move a fully received upload into blob storage.
+
+    Returns (blob, filename), or None if the upload does not exist. Raises
+    ValueError if bytes are still missing.
+    """
+    upload = get(upload_id)
+    if upload is None:
+        return None
+    if upload["bytes_received"] != upload["length"]:
+        raise ValueError(
+            f"Upload incomplete: {upload['bytes_received']} of {upload['length']} bytes"
+        )
+
+    def claim(conn: sqlite3.Connection) -> bool:
+        cursor = conn.execute("DELETE FROM uploads WHERE id = ?", (upload_id,))
+        return cursor.rowcount > 0
+
+    if not run_write(claim):
+        return None  # finished by a concurrent request
+    staged = part_path(upload)
+    digest = hashlib.sha256()
+    with open(staged, "rb") as f:
+        while data := f.read(blobs.CHUNK_SIZE):
+            digest.update(data)
+    blob = blobs.store_file(
+        staged, digest.hexdigest(), upload["length"], upload["filename"]
+    )
+    return blob, upload["filename"]
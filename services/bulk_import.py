@@ -0,0 +1,332 @@
+"""Bulk import (and refresh) of web articles as research items.
+
+Pages are downloaded by a thread pool, with at most PER_HOST_LIMIT requests
+in flight to any one host so a list of links to the same site does not
+hammer it. Text extraction is CPU-bound, so it runs in a pool of worker
+processes. Each research item is created as soon as its page is extracted.
+
+Refreshing revalidates a business's URL-sourced items against the URL cache
+(see extractor.fetch_article), so unchanged pages cost a 304 and no
+extraction.
+
+The web app does neither in the request: queue_import and queue_refresh put
+one background job per URL on the job queue (see job_runner). Imported items
+show as pending until their job has run.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from contextlib import contextmanager
+from typing import Iterator
+from urllib.parse import urlsplit
+
+from models import jobs, research
+from services import extractor
+
+FETCH_WORKERS = int(os.environ.get("BULK_FETCH_WORKERS", "8"))
+PER_HOST_LIMIT = int(os.environ.get("BULK_PER_HOST_LIMIT", "2"))
+# Worker processes for text extraction; 0 extracts in the fetch threads
+EXTRACT_PROCESSES = int(
+    os.environ.get("BULK_EXTRACT_PROCESSES", str(min(4, os.cpu_count() or 1)))
+)
+MAX_URLS = 500
+
+
+def parse_urls(text: str) -> list[str]:
+    """Pick the http(s) URLs out of pasted text, dropping duplicates.
+
+    URLs may be one per line or separated by whitespace or commas.
+    """
+    urls = []
+    for token in text.split():
+        token = token.strip().strip(",;")
+        if token.startswith(("http://", "https://")) and token not in urls:
+            urls.append(token)
+    if not urls:
+        raise ValueError("No http(s) URLs found")
+    if len(urls) > MAX_URLS:
+        raise ValueError(f"Too many URLs: {len(urls)} (limit {MAX_URLS})")
+    return urls
+
+
+class HostLimiter:
+    """Caps the number of concurrent requests to each host."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.setdefault(
+                host, threading.BoundedSemaphore(self.limit)
+            )
+        with semaphore:
+            yield
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_key: tuple | None = None
+_pool_lock = threading.Lock()
+
+
+def get_extract_pool(processes: int) -> ProcessPoolExecutor:
+    """Get this process's extraction worker pool, starting it on first use.
+
+    Workers are spawned rather than forked, since the parent runs threads
+    (the database writer, job workers) that a fork would copy mid-flight.
+    """
+    global _pool, _pool_key
+    key = (processes, os.getpid())
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None and _pool_key[1] == os.getpid():
+                _pool.shutdown()
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_key = key
+        return _pool
+
+
+def stop_extract_pool() -> None:
+    """Shut down this process's extraction pool, if it is running."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None and _pool_key[1] == os.getpid():
+            _pool.shutdown(cancel_futures=True)
+        _pool = None
+        _pool_key = None
+
+
+atexit.register(stop_extract_pool)
+
+# Shared by the job workers, so queued imports also respect PER_HOST_LIMIT
+_job_limiter = HostLimiter(PER_HOST_LIMIT)
+
+
+def import_urls(
+    business_id: int,
+    urls: list[str],
+    item_type: str = "article",
+    fetch_workers: int | None = None,
+    per_host: int | None = None,
+    processes: int | None = None,
+    on_result=None,
+) -> list[dict]:
+    """Download, extract and store each URL as a research item.
+
+    Returns one result per URL, in completion order: {"url", "status",
+    "item_id", "error"}, where status is "created" or "failed". on_result, if
+    given, is called with each result as it arrives.
+    """
+    if item_type not in research.ITEM_TYPES:
+        raise ValueError(f"Invalid item type: {item_type}")
+    fetch_workers = fetch_workers or FETCH_WORKERS
+    limiter = HostLimiter(per_host or PER_HOST_LIMIT)
+    processes = EXTRACT_PROCESSES if processes is None else processes
+
+    def fetch(url: str) -> str | None:
+        with limiter.slot(url):
+            return extractor.fetch_html(url)
+
+    results = []
+
+    def finish(url: str, item_id: int | None = None, error: str = "") -> None:
+        result = {
+            "url": url,
+            "status": "created" if item_id else "failed",
+            "item_id": item_id,
+            "error": error,
+        }
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool:
+        extract_pool: Executor = (
+            get_extract_pool(processes) if processes > 0 else fetch_pool
+        )
+        # future -> (url, stage); a fetched page moves on to extraction
+        pending = {fetch_pool.submit(fetch, url): (url, "fetch") for url in urls}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, stage = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    finish(url, error=f"{type(e).__name__}: {e}")
+                    continue
+                if stage == "fetch":
+                    if not value:
+                        finish(url, error="Download failed")
+                    else:
+                        extraction = extract_pool.submit(
+                            extractor.extract_article, value
+                        )
+                        pending[extraction] = (url, "extract")
+                elif not value["text"]:
+                    finish(url, error="No article text found")
+                else:
+                    item_id = research.create_item(
+                        business_id=business_id,
+                        title=value["title"] or url,
+                        item_type=item_type,
+                        source_reference=url,
+                        plain_text=value["text"],
+                    )
+                    finish(url, item_id)
+    return results
+
+
+def _url_items(business_id: int) -> list[dict]:
+    """Get a business's research items that were added from a URL."""
+    return [
+        item
+        for item in research.get_items_for_business(business_id, "metadata")
+        if (item["source_reference"] or "").startswith(("http://", "https://"))
+        and not item["original_file_path"]
+    ]
+
+
+def _check_item(item: dict, cache, limiter: HostLimiter) -> tuple[dict, str | None]:
+    """Re-fetch one item's page. Returns its result, and its new text if the
+    page changed (None otherwise)."""
+    url = item["source_reference"]
+    with limiter.slot(url):
+        article, changed = extractor.fetch_article(url, cache)
+    result = {"url": url, "item_id": item["id"], "error": ""}
+    if article is None or not article["text"]:
+        return {**result, "status": "failed", "error": "Download failed"}, None
+    current = research.get_item_by_id(item["id"], "text")
+    if not changed or current["plain_text"] == article["text"]:
+        return {**result, "status": "unchanged"}, None
+    return {**result, "status": "updated"}, article["text"]
+
+
+def refresh_business(
+    business_id: int,
+    cache=None,
+    fetch_workers: int | None = None,
+    per_host: int | None = None,
+    on_result=None,
+) -> list[dict]:
+    """Re-fetch every URL-sourced research item of a business.
+
+    Items whose page changed get the new text; their title is kept. Returns
+    one result per item, in completion order: {"url", "status", "item_id",
+    "error"}, where status is "updated", "unchanged" or "failed".
+    """
+    cache = cache if cache is not None else extractor.get_url_cache()
+    limiter = HostLimiter(per_host or PER_HOST_LIMIT)
+
+    def refresh(item: dict) -> dict:
+        result, text = _check_item(item, cache, limiter)
+        if text is not None:
+            research.update_item(item["id"], item["title"], result["url"], text)
+        return result
+
+    results = []
+    with ThreadPoolExecutor(max_workers=fetch_workers or FETCH_WORKERS) as pool:
+        futures = {pool.submit(refresh, item): item for item in _url_items(business_id)}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                item = futures[future]
+                result = {
+                    "url": item["source_reference"],
+                    "item_id": item["id"],
+                    "status": "failed",
+                    "error": f"{type(e).__name__}: {e}",
+                }
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+def queue_import(
+    business_id: int, urls: list[str], item_type: str = "article"
+) -> list[int]:
+    """Create a pending research item for each URL, with a job to import it.
+
+    Items are titled with their URL until the job replaces it with the
+    article's title. Returns the new item IDs.
+    """
+    if item_type not in research.ITEM_TYPES:
+        raise ValueError(f"Invalid item type: {item_type}")
+    return [
+        research.create_item(
+            business_id=business_id,
+            title=url,
+            item_type=item_type,
+            source_reference=url,
+            extraction_job="import_url",
+        )
+        for url in urls
+    ]
+
+
+def import_item(item_id: int) -> str:
+    """Download and extract a queued import's page. Returns its text.
+
+    Stores the article's title on the item. Raises ValueError if the page
+    cannot be downloaded or has no article text, so the job is retried.
+    """
+    item = research.get_item_by_id(item_id, "metadata")
+    if not item:
+        raise ValueError(f"Research item {item_id} not found")
+    url = item["source_reference"]
+    with _job_limiter.slot(url):
+        html = extractor.fetch_html(url)
+    if not html:
+        raise ValueError("Download failed")
+    if EXTRACT_PROCESSES > 0:
+        pool = get_extract_pool(EXTRACT_PROCESSES)
+        article = pool.submit(extractor.extract_article, html).result()
+    else:
+        article = extractor.extract_article(html)
+    if not article["text"]:
+        raise ValueError("No article text found")
+    title = article["title"] or item["title"]
+    research.update_item(item_id, title, url, article["text"])
+    return article["text"]
+
+
+def queue_refresh(business_id: int) -> int:
+    """Queue a refresh job for each URL-sourced research item of a business.
+
+    Returns the number of jobs queued.
+    """
+    items = _url_items(business_id)
+    for item in items:
+        # Most pages are unchanged, so items stay as they are meanwhile
+        jobs.enqueue("refresh_url", item["id"], mark_pending=False)
+    return len(items)
+
+
+def refresh_item(item_id: int) -> tuple[str | None, dict]:
+    """Refresh one item for its queued job. Returns its new text (None if
+    the page is unchanged or cannot be downloaded) and the result, which
+    says which."""
+    item = research.get_item_by_id(item_id, "metadata")
+    if not item:
+        raise ValueError(f"Research item {item_id} not found")
+    result, text = _check_item(item, extractor.get_url_cache(), _job_limiter)
+    return text, result
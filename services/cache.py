@@ -0,0 +1,123 @@
+"""Persistent, size-bounded LRU cache backed by its own SQLite file.
+
+Used for results that are expensive to recompute (e.g. Gemini extractions).
+The cache lives outside the main database so large cached values never bloat
+it or contend with application writes.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class DiskCache:
+    """A string-to-string cache that evicts least recently used entries.
+
+    Sizes are counted in bytes of UTF-8 encoded value. Once the total exceeds
+    max_bytes, the least recently read or written entries are dropped.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)"
+        )
+        self._total = self._conn.execute(
+            "SELECT coalesce(sum(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def get(self, key: str) -> str | None:
+        """Return a cached value (marking it recently used), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ? RETURNING value",
+                (time.time(), key),
+            ).fetchone()
+            self.stats["hits" if row else "misses"] += 1
+            return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value, evicting old entries to stay within max_bytes.
+
+        Values larger than the whole cache are not stored.
+        """
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                """INSERT INTO entries (key, value, size, last_access)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET value = excluded.value,
+                       size = excluded.size, last_access = excluded.last_access""",
+                (key, value, size, time.time()),
+            )
+            self._total += size - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict(keep=key)
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used entries until the cache fits again."""
+        # Other processes may share the file: size the excess from the table
+        self._total = self._conn.execute(
+            "SELECT coalesce(sum(size), 0) FROM entries"
+        ).fetchone()[0]
+        excess = self._total - self.max_bytes
+        victims = []
+        for victim, size in self._conn.execute(
+            "SELECT key, size FROM entries WHERE key != ? ORDER BY last_access",
+            (keep,),
+        ):
+            if excess <= 0:
+                break
+            victims.append(victim)
+            excess -= size
+        self._conn.executemany(
+            "DELETE FROM entries WHERE key = ?", [(victim,) for victim in victims]
+        )
+        self._total = excess + self.max_bytes
+        self.stats["evictions"] += len(victims)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            row = self._conn.execute(
+                "DELETE FROM entries WHERE key = ? RETURNING size", (key,)
+            ).fetchone()
+            if row:
+                self._total -= row[0]
+
+    def info(self) -> dict:
+        """Return hit/miss/eviction counters and current usage."""
+        with self._lock:
+            entries = self._conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+            return {
+                **self.stats,
+                "entries": entries,
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
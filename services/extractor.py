@@ -1,19 +1,49 @@
 """Content extraction service using Trafilatura."""
 
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import certifi
 import trafilatura
+import urllib3
+from trafilatura.downloads import DEFAULT_HEADERS, create_pool
+from trafilatura.settings import use_config
+from trafilatura.utils import decode_file
+
+import db
+from services.cache import DiskCache
+
+# Download settings for fetch_html (trafilatura's defaults, including its
+# protection against fetching private network addresses)
+FETCH_CONFIG = use_config()
+
+# Fetched articles are cached per URL with their ETag / Last-Modified, so
+# fetching a URL again is a conditional GET, and a 304 reuses the extracted
+# text. Entries not revalidated within URL_CACHE_TTL are dropped.
+URL_CACHE_PATH = os.environ.get("URL_CACHE_PATH")
+URL_CACHE_MAX_BYTES = int(os.environ.get("URL_CACHE_MAX_MB", "64")) * 1024 * 1024
+URL_CACHE_TTL = float(os.environ.get("URL_CACHE_TTL_DAYS", "30")) * 24 * 3600
 
 
-def extract_from_url(url: str) -> str:
+def extract_from_url(url: str, cache: DiskCache | None = None) -> str:
     """
     Download and extract main text content from a URL.
 
     Args:
         url: The URL to extract content from.
+        cache: Response cache to revalidate against (see fetch_article).
 
     Returns:
         Extracted text or empty string if extraction failed.
     """
     try:
+        if cache is not None:
+            article, _ = fetch_article(url, cache)
+            return article["text"] if article else ""
         downloaded = trafilatura.fetch_url(url)
         if downloaded:
             result = trafilatura.extract(downloaded)
@@ -21,3 +51,132 @@ def extract_from_url(url: str) -> str:
     except Exception as e:
         print(f"Error extracting content from {url}: {e}")
     return ""
+
+
+def fetch_html(url: str) -> str | None:
+    """Download a page. Returns its HTML, or None if the download failed."""
+    return trafilatura.fetch_url(url, config=FETCH_CONFIG)
+
+
+def extract_article(html: str) -> dict:
+    """Extract the title and main text from a page's HTML.
+
+    A module-level function of plain data in and out, so it can run in a
+    worker process.
+    """
+    metadata = trafilatura.extract_metadata(html)
+    return {
+        "title": metadata.title if metadata and metadata.title else "",
+        "text": trafilatura.extract(html) or "",
+    }
+
+
+_url_cache: DiskCache | None = None
+_url_cache_lock = threading.Lock()
+
+
+def get_url_cache() -> DiskCache:
+    """Get the process-wide URL response cache, opening it on first use."""
+    global _url_cache
+    path = (
+        Path(URL_CACHE_PATH)
+        if URL_CACHE_PATH
+        else db.DATABASE_PATH.parent / "url_cache.db"
+    )
+    with _url_cache_lock:
+        if _url_cache is None or _url_cache.path != path:
+            if _url_cache is not None:
+                _url_cache.close()
+            _url_cache = DiskCache(path, URL_CACHE_MAX_BYTES)
+        return _url_cache
+
+
+def url_cache_stats() -> dict:
+    """Return URL cache counters (empty if the cache is unused)."""
+    with _url_cache_lock:
+        return _url_cache.info() if _url_cache is not None else {}
+
+
+_pools: dict[bool, urllib3.PoolManager] = {}
+_pools_lock = threading.Lock()
+
+
+def _http_pool() -> urllib3.PoolManager:
+    """Get a connection pool honouring FETCH_CONFIG's SSRF protection."""
+    ssrf_protection = FETCH_CONFIG.getboolean(
+        "DEFAULT", "SSRF_PROTECTION", fallback=True
+    )
+    with _pools_lock:
+        if ssrf_protection not in _pools:
+            _pools[ssrf_protection] = create_pool(
+                ssrf_protection=ssrf_protection,
+                ca_certs=certifi.where(),
+                cert_reqs="CERT_REQUIRED",
+            )
+        return _pools[ssrf_protection]
+
+
+def fetch_article(url: str, cache: DiskCache) -> tuple[dict | None, bool]:
+    """Fetch and extract an article, revalidating any cached copy.
+
+    A cached URL is requested with If-None-Match / If-Modified-Since; on a
+    304 (or an identical body) the cached extraction is returned without
+    running trafilatura again. Returns (article, changed), where article is
+    {"title", "text", "etag", "last_modified", "body_sha256", "validated_at"}
+    or None if the download failed, and changed is False when the cached
+    article was still current.
+    """
+    key = f"url:{url}"
+    entry = cache.get(key)
+    cached = json.loads(entry) if entry else None
+    if cached and time.time() - cached["validated_at"] > URL_CACHE_TTL:
+        cache.delete(key)
+        cached = None
+
+    headers = dict(DEFAULT_HEADERS)
+    if cached and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached["last_modified"]:
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    max_redirects = FETCH_CONFIG.getint("DEFAULT", "MAX_REDIRECTS")
+    try:
+        response = _http_pool().request(
+            "GET",
+            url,
+            headers=headers,
+            timeout=FETCH_CONFIG.getint("DEFAULT", "DOWNLOAD_TIMEOUT"),
+            retries=urllib3.util.Retry(
+                total=max_redirects, redirect=max_redirects, connect=0
+            ),
+        )
+    except (urllib3.exceptions.HTTPError, OSError) as e:
+        print(f"Error fetching {url}: {e}")
+        return None, False
+
+    if response.status == 304 and cached:
+        db.increment_counter("url_cache.not_modified")
+        cached["validated_at"] = time.time()
+        cache.set(key, json.dumps(cached))
+        return cached, False
+    if response.status != 200 or not response.data:
+        return None, False
+
+    body_sha256 = hashlib.sha256(response.data).hexdigest()
+    if cached and cached["body_sha256"] == body_sha256:
+        # Same page from a server that sends no validators
+        db.increment_counter("url_cache.unchanged")
+        changed = False
+        article = cached
+    else:
+        db.increment_counter("url_cache.fetched")
+        changed = True
+        article = extract_article(decode_file(response.data))
+        article["body_sha256"] = body_sha256
+    article.update(
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        validated_at=time.time(),
+    )
+    cache.set(key, json.dumps(article))
+    return article, changed
@@ -1,61 +1,519 @@
 """Gemini API service for PDF and audio processing."""
 
+import hashlib
+import json
 import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import httpx
 from dotenv import load_dotenv
 from google import genai
+from google.genai import errors, types
+
+import db
+from services import transcript
+from services.cache import DiskCache
 
 load_dotenv()
 
+MODEL = "gemini-2.0-flash"
+
+PDF_PROMPT = (
+    "Extract all the text content from this PDF document. "
+    "Return only the extracted text, preserving paragraphs and structure. "
+    "Do not add any commentary or formatting."
+)
+AUDIO_PROMPT = (
+    "Transcribe this audio file. Return only the transcription text. "
+    "Include speaker labels if multiple speakers are detected (e.g., Speaker 1:, Speaker 2:). "
+    "Do not add any commentary."
+)
+AUDIO_SEGMENT_PROMPT = (
+    "Transcribe this audio clip. "
+    "Start each line with the time it begins, measured from the start of the "
+    "clip, in square brackets (e.g. [00:00]), then a speaker label "
+    "(Speaker 1:, Speaker 2:, or the speaker's name if it is stated). "
+    "Return only the transcription. Do not add any commentary."
+)
+
+# Extraction results are cached by (file hash, model, prompt version), so the
+# same document uploaded to several businesses is only sent to Gemini once.
+CACHE_PATH = os.environ.get("GEMINI_CACHE_PATH")
+CACHE_MAX_BYTES = int(os.environ.get("GEMINI_CACHE_MAX_MB", "256")) * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Connections kept open by the shared client's HTTP pool
+MAX_CONNECTIONS = int(os.environ.get("GEMINI_MAX_CONNECTIONS", "10"))
+# Uploaded files expire on Gemini's side (after 48 hours); stop reusing a
+# handle this many seconds before its expiry
+UPLOAD_EXPIRY_MARGIN = 3600
+DEFAULT_UPLOAD_LIFETIME = 48 * 3600
+
+# Long PDFs are extracted in page ranges of this many pages, with at most
+# PDF_CONCURRENCY ranges in flight; each range gets CHUNK_ATTEMPTS tries
+PDF_PAGES_PER_CHUNK = int(os.environ.get("GEMINI_PDF_PAGES_PER_CHUNK", "20"))
+PDF_CONCURRENCY = int(os.environ.get("GEMINI_PDF_CONCURRENCY", "4"))
+CHUNK_ATTEMPTS = 3
+CHUNK_RETRY_DELAY = 2.0
+
+# Long recordings are transcribed in windows of this many seconds, each
+# overlapping the next by AUDIO_SEGMENT_OVERLAP so no utterance is cut in two
+AUDIO_SEGMENT_SECONDS = int(os.environ.get("GEMINI_AUDIO_SEGMENT_SECONDS", "600"))
+AUDIO_SEGMENT_OVERLAP = 20
+AUDIO_CONCURRENCY = int(os.environ.get("GEMINI_AUDIO_CONCURRENCY", "4"))
+# Cuts the windows out of a recording; without it only WAV files are split,
+# and other recordings are transcribed in one pass
+FFMPEG = os.environ.get("FFMPEG_PATH", "ffmpeg")
+
+_client: genai.Client | None = None
+_client_key: tuple | None = None
+_client_lock = threading.Lock()
+
 
 def get_client() -> genai.Client:
-    """Get Gemini API client."""
+    """Get the process-wide Gemini API client.
+
+    The client (and its pooled HTTP connections) is created once per process
+    and API key, rather than per call.
+    """
+    global _client, _client_key
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         raise ValueError("GEMINI_API_KEY environment variable not set")
-    return genai.Client(api_key=api_key)
+    key = (api_key, os.getpid())
+    with _client_lock:
+        if _client is None or _client_key != key:
+            _client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    client_args={
+                        "limits": httpx.Limits(
+                            max_connections=MAX_CONNECTIONS,
+                            max_keepalive_connections=MAX_CONNECTIONS,
+                        )
+                    }
+                ),
+            )
+            _client_key = key
+        return _client
 
 
-def extract_text_from_pdf(file_path: str | Path) -> str:
-    """Extract text content from a PDF file using Gemini."""
-    client = get_client()
-    file_path = Path(file_path)
+def file_sha256(file_path: str | Path) -> str:
+    """Hash a file's contents without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-    # Upload file to Gemini
-    uploaded_file = client.files.upload(file=file_path)
-
-    # Request text extraction
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=[
-            uploaded_file,
-            "Extract all the text content from this PDF document. "
-            "Return only the extracted text, preserving paragraphs and structure. "
-            "Do not add any commentary or formatting.",
-        ],
+
+def prompt_version(prompt: str) -> str:
+    """Identify a prompt by its text, so editing a prompt invalidates its cache."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+_cache: DiskCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> DiskCache:
+    """Get the process-wide extraction cache, opening it on first use."""
+    global _cache
+    path = (
+        Path(CACHE_PATH) if CACHE_PATH else db.DATABASE_PATH.parent / "gemini_cache.db"
     )
+    with _cache_lock:
+        if _cache is None or _cache.path != path:
+            if _cache is not None:
+                _cache.close()
+            _cache = DiskCache(path, CACHE_MAX_BYTES)
+        return _cache
+
+
+def cache_stats() -> dict:
+    """Return extraction cache counters (empty if the cache is unused)."""
+    with _cache_lock:
+        return _cache.info() if _cache is not None else {}
+
+
+def _upload_key(file_hash: str) -> str:
+    return f"upload:{file_hash}"
 
-    return response.text
 
+def get_uploaded_file(client, file_path: Path, file_hash: str):
+    """Return a handle to the file on Gemini's side, uploading it if needed.
 
-def transcribe_audio(file_path: str | Path) -> str:
-    """Transcribe audio file using Gemini."""
+    Uploads are registered by content hash with their remote name and expiry,
+    so later prompts against the same document (re-extraction, a different
+    question) reuse the remote copy instead of re-sending the bytes. Returns
+    (handle, reused).
+    """
+    cache = get_cache()
+    entry = cache.get(_upload_key(file_hash))
+    if entry:
+        remote = json.loads(entry)
+        if remote["expires_at"] - UPLOAD_EXPIRY_MARGIN > time.time():
+            db.increment_counter("gemini.uploads_reused")
+            handle = types.Part.from_uri(
+                file_uri=remote["uri"], mime_type=remote["mime_type"]
+            )
+            return handle, True
+
+    uploaded = client.files.upload(file=file_path)
+    db.increment_counter("gemini.uploads")
+    expires_at = (
+        uploaded.expiration_time.timestamp()
+        if uploaded.expiration_time
+        else time.time() + DEFAULT_UPLOAD_LIFETIME
+    )
+    cache.set(
+        _upload_key(file_hash),
+        json.dumps(
+            {
+                "name": uploaded.name,
+                "uri": uploaded.uri,
+                "mime_type": uploaded.mime_type,
+                "expires_at": expires_at,
+            }
+        ),
+    )
+    return uploaded, False
+
+
+def forget_uploaded_file(file_hash: str) -> None:
+    """Drop a registered upload (e.g. after Gemini no longer recognises it)."""
+    get_cache().delete(_upload_key(file_hash))
+
+
+def _generate_with_file(file_path: Path, file_hash: str, prompt: str) -> str:
+    """Run a prompt against a file, reusing its remote upload if there is one."""
     client = get_client()
+    handle, reused = get_uploaded_file(client, file_path, file_hash)
+    try:
+        response = client.models.generate_content(
+            model=MODEL, contents=[handle, prompt]
+        )
+    except errors.ClientError:
+        if not reused:
+            raise
+        # The remote file was deleted or expired early: upload it again
+        forget_uploaded_file(file_hash)
+        handle, _ = get_uploaded_file(client, file_path, file_hash)
+        response = client.models.generate_content(
+            model=MODEL, contents=[handle, prompt]
+        )
+    return response.text
+
+
+def _generate_from_file(
+    file_path: str | Path, prompt: str, content_id: str | None = None
+) -> str:
+    """Run a prompt against a file, reusing a cached result when possible.
+
+    content_id identifies the file's contents for the result cache and the
+    upload registry; it defaults to the file's SHA-256.
+    """
+    file_path = Path(file_path)
+    content_id = content_id or file_sha256(file_path)
+    key = f"{content_id}:{MODEL}:{prompt_version(prompt)}"
+    cache = get_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    text = _generate_with_file(file_path, content_id, prompt)
+    if text:
+        cache.set(key, text)
+    return text
+
+
+def _with_retries(func, attempts: int, delay: float):
+    """Call func(), retrying with exponential backoff on failure."""
+    for attempt in range(attempts):
+        try:
+            return func()
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(delay * 2**attempt)
+
+
+def _map_in_order(func, items: list, concurrency: int, on_result=None) -> list:
+    """Call func on each item in a thread pool; return results in item order.
+
+    on_result, if given, is called with the results so far (None for items
+    still in flight) each time one finishes.
+    """
+    results = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(func, item): i for i, item in enumerate(items)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if on_result:
+                on_result(results)
+    return results
+
+
+def _finished_prefix(results: list) -> list:
+    """Return the leading results that have all finished."""
+    prefix = []
+    for result in results:
+        if result is None:
+            break
+        prefix.append(result)
+    return prefix
+
+
+def pdf_page_count(file_path: str | Path) -> int | None:
+    """Count a PDF's pages, or return None if pypdf cannot parse it."""
+    from pypdf import PdfReader
+    from pypdf.errors import PyPdfError
+
+    try:
+        return len(PdfReader(file_path).pages)
+    except (PyPdfError, ValueError):
+        return None
+
+
+def page_ranges(page_count: int, pages_per_chunk: int) -> list[tuple[int, int]]:
+    """Cover pages 1..page_count with (first, last) ranges, 1-based, inclusive."""
+    return [
+        (start + 1, min(start + pages_per_chunk, page_count))
+        for start in range(0, page_count, pages_per_chunk)
+    ]
+
+
+def split_pdf(
+    file_path: str | Path, ranges: list[tuple[int, int]], output_dir: Path
+) -> list[Path]:
+    """Write each (first, last) page range of a PDF to its own file."""
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(file_path)
+    paths = []
+    for first, last in ranges:
+        writer = PdfWriter()
+        for page in reader.pages[first - 1 : last]:
+            writer.add_page(page)
+        chunk_path = output_dir / f"pages-{first}-{last}.pdf"
+        with open(chunk_path, "wb") as f:
+            writer.write(f)
+        paths.append(chunk_path)
+    return paths
+
+
+def extract_page_ranges(
+    file_path: str | Path,
+    ranges: list[tuple[int, int]],
+    concurrency: int | None = None,
+    on_result=None,
+    file_hash: str | None = None,
+) -> list[str]:
+    """Extract the text of each (first, last) page range of a PDF with Gemini.
+
+    Ranges are extracted concurrently (at most concurrency at a time). Each
+    is cached and retried on its own, so a failure only repeats the ranges
+    that have not succeeded yet. on_result is passed to _map_in_order.
+    file_hash is the file's SHA-256, if already known.
+    """
+    concurrency = concurrency or PDF_CONCURRENCY
+    file_hash = file_hash or file_sha256(file_path)
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks = list(zip(ranges, split_pdf(file_path, ranges, Path(tmp))))
+
+        def extract_range(chunk: tuple[tuple[int, int], Path]) -> str:
+            (first, last), chunk_path = chunk
+            return _with_retries(
+                lambda: _generate_from_file(
+                    chunk_path, PDF_PROMPT, f"{file_hash}:pages{first}-{last}"
+                ),
+                CHUNK_ATTEMPTS,
+                CHUNK_RETRY_DELAY,
+            )
+
+        return _map_in_order(extract_range, chunks, concurrency, on_result)
+
+
+def extract_text_from_pdf(
+    file_path: str | Path,
+    pages_per_chunk: int | None = None,
+    concurrency: int | None = None,
+    on_progress=None,
+    file_hash: str | None = None,
+) -> str:
+    """Extract text content from a PDF file using Gemini.
+
+    PDFs longer than pages_per_chunk are split into page ranges that are
+    extracted concurrently (see extract_page_ranges) and stitched back
+    together in page order.
+
+    on_progress(done, total, partial_text) is called as ranges finish, with
+    the text of the leading ranges that are complete. file_hash is the
+    file's SHA-256, if already known.
+    """
+    pages_per_chunk = pages_per_chunk or PDF_PAGES_PER_CHUNK
     file_path = Path(file_path)
 
-    # Upload file to Gemini
-    uploaded_file = client.files.upload(file=file_path)
-
-    # Request transcription
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=[
-            uploaded_file,
-            "Transcribe this audio file. Return only the transcription text. "
-            "Include speaker labels if multiple speakers are detected (e.g., Speaker 1:, Speaker 2:). "
-            "Do not add any commentary.",
-        ],
+    # Short (or locally unreadable) PDFs go to Gemini whole
+    page_count = pdf_page_count(file_path)
+    if page_count is None or page_count <= pages_per_chunk:
+        return _generate_from_file(file_path, PDF_PROMPT, file_hash)
+
+    def join(texts: list[str]) -> str:
+        return "\n\n".join(text.strip() for text in texts)
+
+    def report(results: list) -> None:
+        if on_progress:
+            done = sum(result is not None for result in results)
+            on_progress(done, len(results), join(_finished_prefix(results)))
+
+    ranges = page_ranges(page_count, pages_per_chunk)
+    return join(extract_page_ranges(file_path, ranges, concurrency, report, file_hash))
+
+
+def audio_duration(file_path: str | Path) -> float | None:
+    """Return a recording's length in seconds, or None if it can't be read."""
+    import mutagen
+
+    try:
+        audio = mutagen.File(file_path)
+    except mutagen.MutagenError:
+        return None
+    if audio is None or not getattr(audio.info, "length", None):
+        return None
+    return audio.info.length
+
+
+def _split_wav(
+    file_path: Path, segments: list[transcript.Segment], output_dir: Path
+) -> list[Path]:
+    paths = []
+    with wave.open(str(file_path), "rb") as source:
+        rate = source.getframerate()
+        for i, segment in enumerate(segments):
+            source.setpos(int(segment.start * rate))
+            frames = source.readframes(int((segment.end - segment.start) * rate))
+            clip_path = output_dir / f"segment-{i}.wav"
+            with wave.open(str(clip_path), "wb") as clip:
+                clip.setparams(source.getparams())
+                clip.writeframes(frames)
+            paths.append(clip_path)
+    return paths
+
+
+def split_audio(
+    file_path: str | Path, segments: list[transcript.Segment], output_dir: Path
+) -> list[Path] | None:
+    """Write each segment of a recording to its own file.
+
+    Uses ffmpeg, copying the audio stream without re-encoding, if it is
+    installed; otherwise only WAV files can be cut. Returns None if the
+    recording cannot be split here.
+    """
+    file_path = Path(file_path)
+    ffmpeg = shutil.which(FFMPEG)
+    if ffmpeg is None:
+        if file_path.suffix.lower() != ".wav":
+            return None
+        try:
+            return _split_wav(file_path, segments, output_dir)
+        except (wave.Error, EOFError):
+            return None
+
+    paths = []
+    for i, segment in enumerate(segments):
+        clip_path = output_dir / f"segment-{i}{file_path.suffix.lower()}"
+        try:
+            subprocess.run(
+                [
+                    ffmpeg,
+                    "-v",
+                    "error",
+                    "-y",
+                    "-ss",
+                    f"{segment.start:.3f}",
+                    "-t",
+                    f"{segment.end - segment.start:.3f}",
+                    "-i",
+                    str(file_path),
+                    "-c",
+                    "copy",
+                    str(clip_path),
+                ],
+                check=True,
+                capture_output=True,
+            )
+        except subprocess.CalledProcessError:
+            return None
+        paths.append(clip_path)
+    return paths
+
+
+def transcribe_audio(
+    file_path: str | Path,
+    segment_seconds: int | None = None,
+    concurrency: int | None = None,
+    on_progress=None,
+    file_hash: str | None = None,
+) -> str:
+    """Transcribe audio file using Gemini.
+
+    Recordings longer than segment_seconds are cut into overlapping windows
+    (see split_audio), which are uploaded and transcribed concurrently. The
+    windows are stitched into one timestamped transcript with the overlaps
+    removed and speaker labels made consistent (see services.transcript).
+    A recording that cannot be cut here is transcribed in one pass.
+
+    on_progress(done, total, partial_text) is called as windows finish, with
+    the stitched transcript of the leading windows that are complete.
+    file_hash is the file's SHA-256, if already known.
+    """
+    segment_seconds = segment_seconds or AUDIO_SEGMENT_SECONDS
+    concurrency = concurrency or AUDIO_CONCURRENCY
+    file_path = Path(file_path)
+    file_hash = file_hash or file_sha256(file_path)
+
+    duration = audio_duration(file_path)
+    if duration is None or duration <= segment_seconds:
+        return _generate_from_file(file_path, AUDIO_PROMPT, file_hash)
+
+    segments = transcript.plan_segments(
+        duration, segment_seconds, AUDIO_SEGMENT_OVERLAP
     )
+    with tempfile.TemporaryDirectory() as tmp:
+        clip_paths = split_audio(file_path, segments, Path(tmp))
+        if clip_paths is None:
+            return _generate_from_file(file_path, AUDIO_PROMPT, file_hash)
 
-    return response.text
+        def transcribe_segment(clip: tuple[transcript.Segment, Path]) -> str:
+            segment, clip_path = clip
+            content_id = f"{file_hash}:audio{segment.start:g}-{segment.end:g}"
+            text = _with_retries(
+                lambda: _generate_from_file(
+                    clip_path, AUDIO_SEGMENT_PROMPT, content_id
+                ),
+                CHUNK_ATTEMPTS,
+                CHUNK_RETRY_DELAY,
+            )
+            return transcript.shift(text, segment.start)
+
+        def stitch(texts: list[str]) -> str:
+            lines = transcript.stitch(
+                segments[: len(texts)], texts, AUDIO_SEGMENT_OVERLAP
+            )
+            return transcript.render(lines)
+
+        def report(results: list) -> None:
+            if on_progress:
+                done = sum(result is not None for result in results)
+                on_progress(done, len(results), stitch(_finished_prefix(results)))
+
+        clips = list(zip(segments, clip_paths))
+        return stitch(_map_in_order(transcribe_segment, clips, concurrency, report))
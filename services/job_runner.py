@@ -0,0 +1,235 @@
+"""Background worker pool for jobs (text extraction for files and URLs).
+
+Workers are threads: extraction spends its time waiting on the Gemini API,
+not on the CPU. Every worker polls the jobs table, so jobs queued by any
+process (or left running by a crashed one) are picked up. :func:`notify`
+wakes idle workers in this process immediately.
+"""
+
+import atexit
+import os
+import socket
+import threading
+import traceback
+from pathlib import Path
+
+from models import jobs, research
+
+WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# Jobs that fetch web pages run on workers of their own, so a large URL
+# import neither waits behind file extraction nor holds it up. Their
+# requests to any one host are capped by bulk_import.PER_HOST_LIMIT.
+URL_JOB_KINDS = ("import_url", "refresh_url")
+URL_WORKERS = int(os.environ.get("URL_JOB_WORKERS", "8"))
+# A running job's lease; workers renew it every third of this while working
+LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "60"))
+# How often idle workers look for jobs queued by other processes
+POLL_INTERVAL = 1.0
+
+AUDIO_EXTENSIONS = [".mp3", ".wav", ".m4a", ".ogg", ".flac"]
+
+
+def _item_file(job: dict) -> tuple[Path, str | None]:
+    """Get the job's file and its content hash (None for legacy uploads)."""
+    item = research.get_item_by_id(job["research_item_id"], "metadata")
+    if not item or not item["original_file_path"]:
+        raise ValueError(f"Research item {job['research_item_id']} has no file")
+    return Path(item["original_file_path"]), item["blob_sha256"]
+
+
+def extract_pdf(job: dict, on_progress) -> tuple[str, dict]:
+    from services import pdf_text
+
+    path, file_hash = _item_file(job)
+    return pdf_text.extract_text(path, on_progress=on_progress, file_hash=file_hash)
+
+
+def transcribe_audio(job: dict, on_progress) -> str:
+    from services import gemini
+
+    path, file_hash = _item_file(job)
+    return gemini.transcribe_audio(path, on_progress=on_progress, file_hash=file_hash)
+
+
+def import_url(job: dict, on_progress) -> str:
+    from services import bulk_import
+
+    return bulk_import.import_item(job["research_item_id"])
+
+
+def refresh_url(job: dict, on_progress) -> tuple[str | None, dict]:
+    from services import bulk_import
+
+    return bulk_import.refresh_item(job["research_item_id"])
+
+
+# Job kind -> function(job, on_progress) returning the research item's plain
+# text (None to leave it as it is), or (plain text, result) to record a
+# result dict on the job; on_progress(done, total, partial_text) reports
+# partial results
+HANDLERS = {
+    "extract_pdf": extract_pdf,
+    "transcribe_audio": transcribe_audio,
+    "import_url": import_url,
+    "refresh_url": refresh_url,
+}
+
+
+def job_kind_for_file(file_path: Path) -> str | None:
+    """Return the extraction job kind for an uploaded file, if any."""
+    ext = file_path.suffix.lower()
+    if ext == ".pdf":
+        return "extract_pdf"
+    if ext in AUDIO_EXTENSIONS:
+        return "transcribe_audio"
+    return None
+
+
+def run_job(job: dict, worker: str) -> str:
+    """Run a claimed job to completion. Returns the job's final status, or
+    "lost" if its lease expired and another worker took it over."""
+    if job["attempts"] > jobs.MAX_ATTEMPTS:
+        # Reclaimed after its worker died on the final attempt
+        return jobs.fail(job["id"], worker, job["error"] or "Worker lost the job")
+
+    handler = HANDLERS.get(job["kind"])
+    if handler is None:
+        return jobs.fail(job["id"], worker, f"Unknown job kind: {job['kind']}")
+
+    # Keep the lease alive for as long as the handler runs
+    done = threading.Event()
+
+    def heartbeat():
+        while not done.wait(LEASE_SECONDS / 3):
+            if not jobs.renew_lease(job["id"], worker, LEASE_SECONDS):
+                return
+
+    def report_progress(done: int, total: int, partial_text: str = "") -> None:
+        jobs.set_progress(job["id"], worker, done, total, partial_text)
+
+    renewer = threading.Thread(target=heartbeat, daemon=True)
+    renewer.start()
+    try:
+        output = handler(job, report_progress)
+    except Exception as e:
+        traceback.print_exc()
+        return jobs.fail(job["id"], worker, f"{type(e).__name__}: {e}")
+    finally:
+        done.set()
+        renewer.join()
+    plain_text, result = output if isinstance(output, tuple) else (output, None)
+    if not jobs.complete(job["id"], worker, plain_text, result):
+        return "lost"  # reclaimed by another worker; its result stands
+    return "done"
+
+
+def run_next(
+    worker: str = "inline",
+    kinds: tuple[str, ...] | None = None,
+    exclude_kinds: tuple[str, ...] = (),
+) -> str | None:
+    """Claim and run one job (of ``kinds``, if given, and not of
+    ``exclude_kinds``). Returns its final status, or None if idle."""
+    job = jobs.claim(worker, LEASE_SECONDS, kinds, exclude_kinds)
+    if job is None:
+        return None
+    return run_job(job, worker)
+
+
+class WorkerPool:
+    """Threads that claim and run jobs until stopped."""
+
+    def __init__(
+        self,
+        size: int,
+        kinds: tuple[str, ...] | None = None,
+        exclude_kinds: tuple[str, ...] = (),
+        name: str = "job-worker",
+    ):
+        self.pid = os.getpid()
+        self.kinds = kinds
+        self.exclude_kinds = exclude_kinds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        prefix = f"{socket.gethostname()}:{self.pid}:{name}"
+        self._threads = [
+            threading.Thread(
+                target=self._run, args=(f"{prefix}:{i}",), name=f"{name}-{i}"
+            )
+            for i in range(size)
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self, worker: str) -> None:
+        while not self._stop.is_set():
+            try:
+                status = run_next(worker, self.kinds, self.exclude_kinds)
+            except Exception:
+                traceback.print_exc()
+                status = None
+            if status is None:
+                self._wake.wait(POLL_INTERVAL)
+                self._wake.clear()
+
+
+_pool: WorkerPool | None = None
+_url_pool: WorkerPool | None = None
+_pool_lock = threading.Lock()
+
+
+def start_workers(
+    size: int | None = None, url_size: int | None = None
+) -> WorkerPool | None:
+    """Start this process's worker pools (once): ``size`` workers for file
+    jobs and ``url_size`` for URL jobs. Returns the file job pool, or None
+    if workers are disabled."""
+    global _pool, _url_pool
+    size = WORKERS if size is None else size
+    url_size = URL_WORKERS if url_size is None else url_size
+    if size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            # With no URL workers, the file job workers run URL jobs too
+            _pool = WorkerPool(
+                size, exclude_kinds=URL_JOB_KINDS if url_size > 0 else ()
+            )
+            _url_pool = (
+                WorkerPool(url_size, kinds=URL_JOB_KINDS, name="url-worker")
+                if url_size > 0
+                else None
+            )
+        return _pool
+
+
+def stop_workers() -> None:
+    """Stop this process's worker pools, if they are running."""
+    global _pool, _url_pool
+    with _pool_lock:
+        for pool in (_pool, _url_pool):
+            if pool is not None and pool.pid == os.getpid():
+                pool.stop()
+        _pool = None
+        _url_pool = None
+
+
+atexit.register(stop_workers)
+
+
+def notify() -> None:
+    """Wake this process's idle workers after queuing a job."""
+    with _pool_lock:
+        for pool in (_pool, _url_pool):
+            if pool is not None and pool.pid == os.getpid():
+                pool.notify()
@@ -0,0 +1,177 @@
+"""PDF rendering in a pool of warm WeasyPrint worker processes.
+
+Importing WeasyPrint and configuring its fonts takes seconds, and rendering
+is CPU-bound, so renders run in dedicated worker processes rather than on the
+request thread. Each worker imports WeasyPrint and renders a throwaway page
+as it starts, so the first real export pays no start-up cost. Render jobs
+queue for the next free worker; RENDER_PROCESSES of them run at once.
+
+Every job has a timeout, and every worker an address-space cap. A job past
+its timeout has its pool's processes killed (the pool is replaced on the
+next render); a job over the memory cap fails with a MemoryError or takes
+its worker down. Either way the caller gets a RenderError instead of a
+stalled or swapping server.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+
+import db
+
+# Worker processes; 0 renders on the calling thread instead
+RENDER_PROCESSES = int(
+    os.environ.get("PDF_RENDER_PROCESSES", str(min(4, os.cpu_count() or 1)))
+)
+# Longest a render may take, waiting in the queue included
+RENDER_TIMEOUT = float(os.environ.get("PDF_RENDER_TIMEOUT_S", "60"))
+# Address space cap per worker (0 for none); ignored where unsupported
+RENDER_MEMORY_MB = int(os.environ.get("PDF_RENDER_MEMORY_MB", "2048"))
+
+
+class RenderError(Exception):
+    """Raised when a render times out, runs out of memory, or crashes."""
+
+
+def html_to_pdf(html: str) -> bytes:
+    """Render an HTML document to PDF bytes with WeasyPrint."""
+    from weasyprint import HTML
+
+    return HTML(string=html).write_pdf()
+
+
+def _init_worker(memory_mb: int) -> None:
+    if memory_mb > 0:
+        try:
+            import resource
+
+            limit = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass  # e.g. Windows: no cap, but the timeout still applies
+    try:
+        html_to_pdf("<p>warm-up</p>")  # imports WeasyPrint, loads fonts
+    except Exception as e:
+        # A broken install surfaces on the first real render instead
+        print(f"PDF renderer could not warm up: {e}")
+
+
+def _ready() -> None:
+    pass
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_key: tuple | None = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool(
+    processes: int | None = None, memory_mb: int | None = None
+) -> ProcessPoolExecutor:
+    """Get this process's renderer pool, starting it on first use.
+
+    Workers are spawned rather than forked, since the parent runs threads
+    (the database writer, job workers) that a fork would copy mid-flight.
+    """
+    global _pool, _pool_key
+    processes = processes or RENDER_PROCESSES
+    memory_mb = RENDER_MEMORY_MB if memory_mb is None else memory_mb
+    key = (processes, memory_mb, os.getpid())
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None and _pool_key[2] == os.getpid():
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(memory_mb,),
+            )
+            _pool_key = key
+        return _pool
+
+
+def start_render_pool() -> ProcessPoolExecutor | None:
+    """Start and warm this process's renderer workers now, rather than on the
+    first export. Returns None if rendering runs in-process."""
+    if RENDER_PROCESSES <= 0:
+        return None
+    pool = get_render_pool()
+    for _ in range(RENDER_PROCESSES):
+        pool.submit(_ready)  # each spawns a worker, which warms up
+    return pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Kill a pool's workers (e.g. one stuck in a render) and forget it."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _pool_key = None
+    # The executor cannot cancel a running call; terminating is the only way
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def stop_render_pool() -> None:
+    """Shut down this process's renderer pool, if it is running."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None and _pool_key[2] == os.getpid():
+            _pool.shutdown(cancel_futures=True)
+        _pool = None
+        _pool_key = None
+
+
+atexit.register(stop_render_pool)
+
+
+def run(
+    func: Callable,
+    *args,
+    timeout: float | None = None,
+    processes: int | None = None,
+):
+    """Run ``func(*args)`` in a renderer worker and return its result.
+
+    func must be a module-level function, so a worker can import it. Raises
+    RenderError if it takes longer than ``timeout`` seconds (default
+    RENDER_TIMEOUT), exceeds the memory cap or kills its worker.
+    """
+    processes = RENDER_PROCESSES if processes is None else processes
+    if processes <= 0:
+        return func(*args)
+    timeout = RENDER_TIMEOUT if timeout is None else timeout
+
+    pool = get_render_pool(processes)
+    try:
+        return pool.submit(func, *args).result(timeout=timeout)
+    except TimeoutError:
+        db.increment_counter("pdf_render.timeouts")
+        _discard_pool(pool)
+        raise RenderError(f"PDF rendering took longer than {timeout:g}s") from None
+    except MemoryError:
+        db.increment_counter("pdf_render.out_of_memory")
+        raise RenderError("PDF rendering ran out of memory") from None
+    except BrokenProcessPool:
+        db.increment_counter("pdf_render.crashes")
+        _discard_pool(pool)
+        raise RenderError("PDF renderer process died (out of memory?)") from None
+
+
+def render_pdf(html: str, timeout: float | None = None) -> bytes:
+    """Render an HTML document to PDF in a warm worker process."""
+    return run(html_to_pdf, html, timeout=timeout)
+
+
+def renderer_stats() -> dict:
+    """Return the configured worker count and whether this process's pool runs."""
+    with _pool_lock:
+        running = _pool is not None and _pool_key[2] == os.getpid()
+    return {"processes": RENDER_PROCESSES, "running": running}
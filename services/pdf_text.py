@@ -0,0 +1,121 @@
+"""Local-first PDF text extraction, with Gemini as the fallback.
+
+Most PDFs are born-digital and carry a text layer that pypdf can read in
+milliseconds. Only pages whose local text looks empty or scanned (fewer than
+MIN_CHARS_PER_PAGE readable characters) are sent to Gemini, grouped into
+contiguous page ranges. The result records which path each page took.
+"""
+
+import os
+from pathlib import Path
+
+import db
+
+# A page with fewer readable characters than this is treated as scanned
+MIN_CHARS_PER_PAGE = int(os.environ.get("PDF_MIN_CHARS_PER_PAGE", "100"))
+# Text layers that are mostly unreadable glyphs (e.g. broken font encodings)
+# are no better than none
+MIN_READABLE_FRACTION = 0.8
+
+LOCAL = "local"
+GEMINI = "gemini"
+
+
+def read_pages(file_path: str | Path) -> list[str] | None:
+    """Return each page's text layer, or None if pypdf cannot parse the file."""
+    from pypdf import PdfReader
+
+    # Damaged files surface as all sorts of exceptions from deep inside
+    # pypdf (KeyError, TypeError, RecursionError, ...), not just PyPdfError
+    try:
+        reader = PdfReader(file_path)
+        return [page.extract_text() or "" for page in reader.pages]
+    except Exception as e:
+        print(f"pypdf could not read {file_path}: {type(e).__name__}: {e}")
+        return None
+
+
+def looks_scanned(text: str) -> bool:
+    """Judge whether a page's local text is too thin to trust."""
+    chars = [c for c in text if not c.isspace()]
+    if len(chars) < MIN_CHARS_PER_PAGE:
+        return True
+    readable = sum(c.isprintable() and c != "\ufffd" for c in chars)
+    return readable / len(chars) < MIN_READABLE_FRACTION
+
+
+def fallback_ranges(sources: list[str], max_pages: int) -> list[tuple[int, int]]:
+    """Group the pages marked GEMINI into (first, last) runs of at most max_pages."""
+    ranges: list[tuple[int, int]] = []
+    for page, source in enumerate(sources, 1):
+        if source != GEMINI:
+            continue
+        if ranges and ranges[-1][1] == page - 1 and page - ranges[-1][0] < max_pages:
+            ranges[-1] = (ranges[-1][0], page)
+        else:
+            ranges.append((page, page))
+    return ranges
+
+
+def extract_text(
+    file_path: str | Path, on_progress=None, file_hash: str | None = None
+) -> tuple[str, dict]:
+    """Extract a PDF's text, reading it locally where the text layer is usable.
+
+    Returns (text, result), where result["pages"] lists the path each page
+    took ("local" or "gemini"). A PDF pypdf cannot read goes to Gemini whole
+    and result["pages"] is None.
+
+    on_progress(done, total, partial_text) is called as Gemini ranges finish.
+    file_hash, if known, saves hashing the file again for Gemini's cache.
+    """
+    from services import gemini
+
+    pages = read_pages(file_path)
+    if pages is None:
+        db.increment_counter("pdf.files_unreadable")
+        text = gemini.extract_text_from_pdf(
+            file_path, on_progress=on_progress, file_hash=file_hash
+        )
+        return text, {"pages": None}
+
+    sources = [GEMINI if looks_scanned(text) else LOCAL for text in pages]
+    ranges = fallback_ranges(sources, gemini.PDF_PAGES_PER_CHUNK)
+    db.increment_counter("pdf.pages_local", sources.count(LOCAL))
+    db.increment_counter("pdf.pages_gemini", sources.count(GEMINI))
+
+    # The document in page order: local page text, or the index of the
+    # Gemini range that starts at that page
+    range_starts = {first: i for i, (first, _) in enumerate(ranges)}
+    parts: list[str | int] = []
+    for page, (text, source) in enumerate(zip(pages, sources), 1):
+        if source == LOCAL:
+            parts.append(text.strip())
+        elif page in range_starts:
+            parts.append(range_starts[page])
+
+    def assemble(results: list) -> str:
+        """Join the parts up to the first Gemini range still in flight."""
+        texts = []
+        for part in parts:
+            if isinstance(part, int):
+                if results[part] is None:
+                    break
+                part = results[part].strip()
+            if part:
+                texts.append(part)
+        return "\n\n".join(texts)
+
+    def report(results: list) -> None:
+        if on_progress:
+            done = sum(result is not None for result in results)
+            on_progress(done, len(results), assemble(results))
+
+    results = (
+        gemini.extract_page_ranges(
+            file_path, ranges, on_result=report, file_hash=file_hash
+        )
+        if ranges
+        else []
+    )
+    return assemble(results), {"pages": sources}
@@ -0,0 +1,195 @@
+"""Stitching of transcripts produced for overlapping audio segments.
+
+Long recordings are transcribed as overlapping time windows. Each window's
+transcript is a list of timestamped lines ("[MM:SS] Speaker 1: text"). This
+module parses those lines, drops the duplicated half of every overlap, and
+renames speakers so that a voice keeps the same label across windows, even
+though each window was labelled independently.
+"""
+
+import re
+from difflib import SequenceMatcher
+from typing import NamedTuple
+
+LINE_PATTERN = re.compile(
+    r"^\s*\[(?:(\d+):)?(\d{1,2}):(\d{2})(?:\.\d+)?\]\s*"
+    r"(?:\*{0,2}([^:\[\]*]{1,40}?)\*{0,2}:\s+)?(.*)$"
+)
+GENERIC_SPEAKER = re.compile(r"^speaker\s*(\d+)$", re.IGNORECASE)
+# Minimum similarity for two overlap lines to count as the same utterance
+MATCH_RATIO = 0.6
+
+
+class TranscriptLine(NamedTuple):
+    seconds: float
+    speaker: str | None
+    text: str
+
+
+class Segment(NamedTuple):
+    start: float
+    end: float
+
+
+def plan_segments(
+    duration: float, segment_seconds: float, overlap: float
+) -> list[Segment]:
+    """Cover [0, duration] with windows that overlap their neighbours."""
+    if segment_seconds <= overlap:
+        raise ValueError("Segment length must be longer than the overlap")
+    segments = []
+    start = 0.0
+    while True:
+        end = min(start + segment_seconds, duration)
+        segments.append(Segment(start, end))
+        if end >= duration:
+            return segments
+        start = end - overlap
+
+
+def format_timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def parse_lines(text: str, segment: Segment) -> list[TranscriptLine]:
+    """Parse a segment's transcript into timestamped lines.
+
+    Untimed lines continue the previous line. If every timestamp falls before
+    the segment starts, the model has counted from the segment rather than
+    from the start of the file, so the segment's start is added back.
+    """
+    lines: list[TranscriptLine] = []
+    for raw in text.splitlines():
+        if not raw.strip():
+            continue
+        match = LINE_PATTERN.match(raw)
+        if match:
+            hours, minutes, secs, speaker, body = match.groups()
+            seconds = int(hours or 0) * 3600 + int(minutes) * 60 + int(secs)
+            lines.append(
+                TranscriptLine(
+                    float(seconds), speaker.strip() if speaker else None, body.strip()
+                )
+            )
+        elif lines:
+            last = lines[-1]
+            lines[-1] = last._replace(text=f"{last.text} {raw.strip()}")
+        else:
+            lines.append(TranscriptLine(segment.start, None, raw.strip()))
+
+    if segment.start and lines and all(line.seconds < segment.start for line in lines):
+        lines = [line._replace(seconds=line.seconds + segment.start) for line in lines]
+    return lines
+
+
+def shift(text: str, seconds: float) -> str:
+    """Move a clip's transcript to the clip's place in the whole recording,
+    adding ``seconds`` to every timestamp."""
+    lines = parse_lines(text, Segment(0.0, 0.0))
+    return render([line._replace(seconds=line.seconds + seconds) for line in lines])
+
+
+def _similar(a: str, b: str) -> bool:
+    return SequenceMatcher(None, a.lower(), b.lower()).ratio() >= MATCH_RATIO
+
+
+def _speaker_map(
+    previous: list[TranscriptLine],
+    current: list[TranscriptLine],
+    overlap: Segment,
+    labels: set[str],
+) -> dict[str, str]:
+    """Map the current segment's speaker labels onto labels already in use.
+
+    Lines spoken during the overlap appear in both segments; each matching
+    pair is a vote that the two labels are the same voice. Labels without
+    votes keep their name if it is a real name, and generic labels
+    ("Speaker 2") that are not matched get the next unused number.
+    """
+    votes: dict[str, dict[str, int]] = {}
+    theirs = [
+        line
+        for line in previous
+        if overlap.start <= line.seconds <= overlap.end and line.speaker
+    ]
+    for line in current:
+        if not (line.speaker and overlap.start <= line.seconds <= overlap.end):
+            continue
+        for other in theirs:
+            if _similar(line.text, other.text):
+                counts = votes.setdefault(line.speaker, {})
+                counts[other.speaker] = counts.get(other.speaker, 0) + 1
+                break
+
+    mapping: dict[str, str] = {}
+    claimed: set[str] = set()
+    for label, counts in sorted(votes.items(), key=lambda v: -max(v[1].values())):
+        target = max(counts, key=counts.get)
+        if target not in claimed:
+            mapping[label] = target
+            claimed.add(target)
+
+    numbers = [int(m.group(1)) for m in map(GENERIC_SPEAKER.match, labels) if m]
+    next_number = max(numbers, default=0) + 1
+    for line in current:
+        label = line.speaker
+        if not label or label in mapping:
+            continue
+        if GENERIC_SPEAKER.match(label):
+            mapping[label] = f"Speaker {next_number}"
+            next_number += 1
+        else:
+            mapping[label] = label
+    return mapping
+
+
+def stitch(
+    segments: list[Segment], transcripts: list[str], overlap: float
+) -> list[TranscriptLine]:
+    """Merge per-segment transcripts into one, in time order.
+
+    Each overlap is cut at its midpoint: lines before the cut come from the
+    earlier segment, lines after it from the later one.
+    """
+    merged: list[TranscriptLine] = []
+    previous: list[TranscriptLine] = []
+    labels: set[str] = set()
+    for i, (segment, text) in enumerate(zip(segments, transcripts)):
+        lines = parse_lines(text, segment)
+        if i == 0:
+            mapping = {}
+            for line in lines:
+                if line.speaker and line.speaker not in mapping:
+                    match = GENERIC_SPEAKER.match(line.speaker)
+                    mapping[line.speaker] = (
+                        f"Speaker {match.group(1)}" if match else line.speaker
+                    )
+        else:
+            shared = Segment(segment.start, segments[i - 1].end)
+            mapping = _speaker_map(previous, lines, shared, labels)
+        lines = [
+            line._replace(speaker=mapping.get(line.speaker, line.speaker))
+            for line in lines
+        ]
+        labels.update(line.speaker for line in lines if line.speaker)
+
+        low = segment.start + overlap / 2 if i > 0 else float("-inf")
+        high = segment.end - overlap / 2 if i < len(segments) - 1 else float("inf")
+        merged.extend(line for line in lines if low <= line.seconds < high)
+        previous = lines
+    return merged
+
+
+def render(lines: list[TranscriptLine]) -> str:
+    """Format stitched lines as "[MM:SS] Speaker: text", one per line."""
+    return "\n".join(
+        f"[{format_timestamp(line.seconds)}] "
+        + (f"{line.speaker}: " if line.speaker else "")
+        + line.text
+        for line in lines
+    )
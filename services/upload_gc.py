@@ -0,0 +1,296 @@
+"""Garbage collection of upload files that nothing references any more.
+
+Deleting a business or research item removes rows only. A collection pass
+walks the upload directory and picks out orphans:
+
+- blob files whose ref_count has been 0 for GRACE_PERIOD (the blob row is
+  dropped with them), and files under blobs/ with no row at all,
+- files under the legacy ``uploads/<business_id>/`` layout that no research
+  item's original_file_path names, including old summary.pdf exports,
+- staging files left behind by interrupted uploads, including resumable
+  uploads no chunk has arrived for within GRACE_PERIOD (which expires them).
+
+Orphans are moved to ``uploads/quarantine/`` and deleted once they have sat
+there for another GRACE_PERIOD; one whose reference reappears in the meantime
+is moved back. Files modified within GRACE_PERIOD are never touched, so
+uploads in progress are safe. Anything else under uploads/ is left alone.
+
+The background collector walks the tree incrementally, looking at no more than
+GC_BATCH files per pass and resuming where the previous pass stopped.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Iterator
+
+import db
+from db.writer import run_write
+from models import blobs, uploads
+
+# Seconds between background passes (0 disables the collector)
+GC_INTERVAL = float(os.environ.get("UPLOAD_GC_INTERVAL_S", "3600"))
+# Files looked at per background pass
+GC_BATCH = int(os.environ.get("UPLOAD_GC_BATCH", "1000"))
+# How long an orphan must be untouched before quarantine, and then how long
+# it stays in quarantine before it is deleted
+GRACE_PERIOD = float(os.environ.get("UPLOAD_GC_GRACE_HOURS", "24")) * 3600
+
+QUARANTINE = "quarantine"
+BLOBS = "blobs"
+STAGING = "tmp"
+
+
+def iter_files(root: Path, after: tuple[str, ...] = ()) -> Iterator[tuple]:
+    """Yield the files under root as path parts, in sorted order.
+
+    Only files sorting after ``after`` are yielded; directories entirely
+    before it are not listed. The quarantine directory is skipped.
+    """
+
+    def walk(directory: Path, prefix: tuple) -> Iterator[tuple]:
+        try:
+            entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            parts = prefix + (entry.name,)
+            if entry.is_dir(follow_symlinks=False):
+                if parts == (QUARANTINE,) or parts < after[: len(parts)]:
+                    continue
+                yield from walk(Path(entry.path), parts)
+            elif entry.is_file(follow_symlinks=False) and parts > after:
+                yield parts
+
+    yield from walk(root, ())
+
+
+def _referenced_paths() -> set[str]:
+    with db.connection() as conn:
+        rows = conn.execute(
+            """SELECT original_file_path FROM research_items
+               WHERE original_file_path IS NOT NULL AND original_file_path != ''"""
+        ).fetchall()
+    return {os.path.realpath(row[0]) for row in rows}
+
+
+def _blob_in_use(sha256: str, relative: str, grace: float) -> bool:
+    with db.connection() as conn:
+        row = conn.execute(
+            """SELECT 1 FROM blobs WHERE sha256 = ? AND path = ?
+               AND (ref_count > 0 OR updated_at > datetime('now', ?))""",
+            (sha256, relative, f"-{int(grace)} seconds"),
+        ).fetchone()
+    return row is not None
+
+
+def _is_orphan(parts: tuple, references: set[str], grace: float) -> bool:
+    """Decide whether nothing refers to the upload file at ``parts``."""
+    relative = "/".join(parts)
+    if parts[0] == BLOBS:
+        return not _blob_in_use(parts[-1].split(".")[0], relative, grace)
+    if parts[0] == STAGING:
+        return True
+    if parts[0].isdigit() and len(parts) > 1:
+        # including summary.pdf, which exports no longer write (see summary)
+        return os.path.realpath(blobs.UPLOAD_DIR / relative) not in references
+    return False  # not ours
+
+
+def _drop_blob_row(sha256: str, grace: float) -> bool:
+    """Delete a blob row if it is still unreferenced and was last used
+    before the grace period. Returns True if it was deleted (or is absent)."""
+
+    def delete_row(conn: sqlite3.Connection) -> bool:
+        conn.execute(
+            """DELETE FROM blobs WHERE sha256 = ? AND ref_count <= 0
+               AND updated_at <= datetime('now', ?)""",
+            (sha256, f"-{int(grace)} seconds"),
+        )
+        row = conn.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,))
+        return row.fetchone() is None
+
+    return run_write(delete_row)
+
+
+def _remove_empty_dirs(directory: Path, stop: Path) -> None:
+    while directory != stop and stop in directory.parents:
+        try:
+            directory.rmdir()
+        except OSError:
+            return
+        directory = directory.parent
+
+
+def _quarantine(parts: tuple, grace: float) -> bool:
+    """Move an orphan into quarantine. Returns False if it was kept."""
+    source = blobs.UPLOAD_DIR.joinpath(*parts)
+    target = blobs.UPLOAD_DIR.joinpath(QUARANTINE, *parts)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Move before dropping the blob row: an upload of the same content that
+    # races with this finds the row but no file, and puts the file back
+    os.replace(source, target)
+    if parts[0] == BLOBS and not _drop_blob_row(parts[-1].split(".")[0], grace):
+        if source.exists():
+            target.unlink()
+        else:
+            os.replace(target, source)
+        return False
+    if parts[0] == STAGING and parts[-1].endswith(".part"):
+        uploads.delete(parts[-1].removesuffix(".part"))  # an expired upload
+    os.utime(target)  # the quarantine grace period starts now
+    if parts[0].isdigit():
+        _remove_empty_dirs(source.parent, blobs.UPLOAD_DIR)
+    return True
+
+
+def _purge(report: dict, grace: float, dry_run: bool) -> None:
+    """Delete quarantined files past the grace period (restoring any that
+    are referenced again)."""
+    root = blobs.UPLOAD_DIR / QUARANTINE
+    references = _referenced_paths()
+    now = time.time()
+    for parts in iter_files(root):
+        path = root.joinpath(*parts)
+        stat = path.stat()
+        if now - stat.st_mtime < grace:
+            continue
+        original = blobs.UPLOAD_DIR.joinpath(*parts)
+        if not _is_orphan(parts, references, grace) and not original.exists():
+            if not dry_run:
+                original.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(path, original)
+            report["restored"] += 1
+            continue
+        if not dry_run:
+            path.unlink()
+            _remove_empty_dirs(path.parent, root)
+        report["deleted"] += 1
+        report["bytes_reclaimed"] += stat.st_size
+
+
+def collect(
+    after: str = "",
+    limit: int | None = None,
+    grace: float | None = None,
+    dry_run: bool = False,
+    on_orphan=None,
+) -> dict:
+    """Run one collection pass over the upload directory.
+
+    Looks at up to ``limit`` files (all if None) sorting after the relative
+    path ``after``. Returns {"scanned", "quarantined", "restored", "deleted",
+    "bytes_reclaimed", "cursor"}, where cursor is the path to resume after,
+    or "" once the walk reached the end. on_orphan, if given, is called
+    with each orphan's relative path and size. With dry_run nothing is moved
+    or deleted; the report counts what would have been.
+    """
+    grace = GRACE_PERIOD if grace is None else grace
+    report = {
+        "scanned": 0,
+        "quarantined": 0,
+        "restored": 0,
+        "deleted": 0,
+        "bytes_reclaimed": 0,
+        "cursor": "",
+    }
+    _purge(report, grace, dry_run)
+
+    references = _referenced_paths()
+    now = time.time()
+    cursor = tuple(after.split("/")) if after else ()
+    for parts in iter_files(blobs.UPLOAD_DIR, cursor):
+        if limit is not None and report["scanned"] >= limit:
+            report["cursor"] = "/".join(cursor)
+            break
+        cursor = parts
+        report["scanned"] += 1
+        path = blobs.UPLOAD_DIR.joinpath(*parts)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if now - stat.st_mtime < grace or not _is_orphan(parts, references, grace):
+            continue
+        if on_orphan:
+            on_orphan("/".join(parts), stat.st_size)
+        if dry_run or _quarantine(parts, grace):
+            report["quarantined"] += 1
+
+    db.increment_counter("uploads.gc_quarantined", report["quarantined"])
+    db.increment_counter("uploads.gc_deleted", report["deleted"])
+    db.increment_counter("uploads.gc_bytes_reclaimed", report["bytes_reclaimed"])
+    return report
+
+
+class Collector:
+    """A background thread running incremental collection passes."""
+
+    def __init__(self, interval: float, batch: int):
+        self.pid = os.getpid()
+        self.interval = interval
+        self.batch = batch
+        self.cursor = ""
+        self.stats = {"passes": 0, "sweeps": 0}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="upload-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_pass()
+            except Exception:
+                traceback.print_exc()
+
+    def run_pass(self) -> dict:
+        """Collect the next batch of files, wrapping around at the end."""
+        report = collect(after=self.cursor, limit=self.batch)
+        self.cursor = report["cursor"]
+        self.stats["passes"] += 1
+        self.stats["sweeps"] += not self.cursor
+        return report
+
+
+_collector: Collector | None = None
+_collector_lock = threading.Lock()
+
+
+def start_collector(interval: float | None = None) -> Collector | None:
+    """Start this process's collector (once). Returns None if disabled."""
+    global _collector
+    interval = GC_INTERVAL if interval is None else interval
+    if interval <= 0:
+        return None
+    with _collector_lock:
+        if _collector is None or _collector.pid != os.getpid():
+            _collector = Collector(interval, GC_BATCH)
+        return _collector
+
+
+def stop_collector() -> None:
+    """Stop this process's collector, if it is running."""
+    global _collector
+    with _collector_lock:
+        if _collector is not None and _collector.pid == os.getpid():
+            _collector.stop()
+        _collector = None
+
+
+atexit.register(stop_collector)
+
+
+def collector_stats() -> dict:
+    """Return whether this process's collector runs, and its pass counts."""
+    with _collector_lock:
+        running = _collector is not None and _collector.pid == os.getpid()
+        stats = dict(_collector.stats) if running else {}
+    return {"running": running, **stats}
@@ -93,6 +93,10 @@ function debounce(func, wait) {
 
 const debouncedAutoSave = debounce((form) => handleAutoSave(form), 1000);
 
+// Last data the server acknowledged for each form, and its version. Once a
+// form has a baseline, autosaves send only a JSON Patch of what changed.
+const savedAnalyses = new WeakMap();
+
 function handleAutoSave(form) {
     const businessId = form.dataset.businessId;
     const analysisId = form.dataset.analysisId;
@@ -101,26 +105,30 @@ function handleAutoSave(form) {
     // Collect form data based on analysis type
     const data = collectFormData(form, slug);
 
-    // Use ID-based endpoint if analysis ID is available, otherwise use legacy slug-based
-    let url, method;
-    if (analysisId) {
-        url = `/business/${businessId}/analysis/${analysisId}`;
-        method = 'PUT';
-    } else {
+    let request;
+    if (!analysisId) {
         // Legacy: use slug-based endpoint
-        url = `/business/${businessId}/analysis/${slug}`;
-        method = 'POST';
+        request = sendAnalysis(`/business/${businessId}/analysis/${slug}`, 'POST', data);
+    } else {
+        const url = `/business/${businessId}/analysis/${analysisId}`;
+        const saved = savedAnalyses.get(form);
+        if (saved) {
+            const ops = diffJson(saved.data, data);
+            if (ops.length === 0) return Promise.resolve({ success: true });
+            // Fall back to a full save if the patch is rejected (e.g. a version conflict)
+            request = sendAnalysis(url, 'PATCH', ops, { 'If-Match': `"${saved.version}"` })
+                .catch(() => sendAnalysis(url, 'PUT', data));
+        } else {
+            request = sendAnalysis(url, 'PUT', data);
+        }
     }
 
-    // Save to server
-    return fetch(url, {
-        method: method,
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(data)
-    })
-        .then(res => res.json())
+    return request
         .then(result => {
             if (result.success) {
+                if (analysisId) {
+                    savedAnalyses.set(form, { data, version: result.version });
+                }
                 // Show save status indicator
                 const statusId = analysisId ? `status-${analysisId}` : `status-${slug}`;
                 const statusIndicator = document.getElementById(statusId);
@@ -140,6 +148,63 @@ function handleAutoSave(form) {
         });
 }
 
+function sendAnalysis(url, method, body, headers = {}) {
+    const contentType = method === 'PATCH' ? 'application/json-patch+json' : 'application/json';
+    return fetch(url, {
+        method: method,
+        headers: { 'Content-Type': contentType, ...headers },
+        body: JSON.stringify(body)
+    }).then(res => {
+        if (!res.ok) throw new Error(`${method} ${url} failed: HTTP ${res.status}`);
+        return res.json();
+    });
+}
+
+// Build a JSON Patch (RFC 6902) that turns `before` into `after`
+function diffJson(before, after, path = '', ops = []) {
+    if (before === after) return ops;
+
+    const bothArrays = Array.isArray(before) && Array.isArray(after);
+    const bothObjects = isPlainObject(before) && isPlainObject(after);
+
+    if (bothArrays) {
+        const common = Math.min(before.length, after.length);
+        for (let i = 0; i < common; i++) {
+            diffJson(before[i], after[i], `${path}/${i}`, ops);
+        }
+        for (let i = common; i < after.length; i++) {
+            ops.push({ op: 'add', path: `${path}/-`, value: after[i] });
+        }
+        // Remove from the end so earlier indices stay valid
+        for (let i = before.length - 1; i >= common; i--) {
+            ops.push({ op: 'remove', path: `${path}/${i}` });
+        }
+    } else if (bothObjects) {
+        Object.keys(before).forEach(key => {
+            if (!(key in after)) ops.push({ op: 'remove', path: `${path}/${escapePointer(key)}` });
+        });
+        Object.keys(after).forEach(key => {
+            const childPath = `${path}/${escapePointer(key)}`;
+            if (key in before) {
+                diffJson(before[key], after[key], childPath, ops);
+            } else {
+                ops.push({ op: 'add', path: childPath, value: after[key] });
+            }
+        });
+    } else if (JSON.stringify(before) !== JSON.stringify(after)) {
+        ops.push({ op: 'replace', path: path, value: after });
+    }
+    return ops;
+}
+
+function isPlainObject(value) {
+    return value !== null && typeof value === 'object' && !Array.isArray(value);
+}
+
+function escapePointer(key) {
+    return key.replace(/~/g, '~0').replace(/\//g, '~1');
+}
+
 function collectFormData(form, slug) {
     switch (slug) {
         case 'pestel':
@@ -57,12 +57,146 @@ function toggleItemContent(itemId) {
     const content = document.getElementById(`content-${itemId}`);
     if (content.style.display === 'none') {
         content.style.display = 'block';
-        initQuoteHighlighter(itemId);
+        loadItemText(itemId)
+            .then(() => initQuoteHighlighter(itemId))
+            .catch(() => { });
     } else {
         content.style.display = 'none';
     }
 }
 
+// Research text is fetched on first expansion rather than embedded in the page.
+// The endpoint sends an ETag, so re-fetches after a reload revalidate with a 304.
+function loadItemText(itemId) {
+    const container = document.querySelector(`.text-container[data-item-id="${itemId}"]`);
+    if (!container || container.dataset.textLoaded) return Promise.resolve();
+
+    const textContent = container.querySelector('.text-content');
+    return fetch(container.dataset.textUrl)
+        .then(res => {
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            return res.json();
+        })
+        .then(data => {
+            textContent.textContent = data.plain_text || '';
+            container.dataset.textLoaded = 'true';
+        })
+        .catch(err => {
+            textContent.textContent = 'Error loading text';
+            console.error(err);
+            throw err;
+        });
+}
+
+// ===== Pending Extraction =====
+// Items whose text is still being extracted in the background poll their
+// status until the job finishes, then show the new text on next expansion.
+// Long files are extracted in parts: the badge counts finished parts, and an
+// expanded item shows the partial text as it grows.
+const STATUS_POLL_INTERVAL = 3000;
+
+document.querySelectorAll('.item-status.pending[data-status-url]').forEach(badge => {
+    pollItemStatus(badge);
+});
+
+function pollItemStatus(badge) {
+    const item = badge.closest('.research-item');
+    const content = item.querySelector('.item-content');
+    const expanded = content && content.style.display !== 'none';
+    const url = expanded ? `${badge.dataset.statusUrl}?partial=1` : badge.dataset.statusUrl;
+    fetch(url)
+        .then(res => {
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            return res.json();
+        })
+        .then(data => {
+            if (data.status === 'pending') {
+                const progress = data.job && data.job.progress;
+                if (progress) {
+                    badge.textContent = `Extracting text\u2026 ${progress.done}/${progress.total}`;
+                    if (progress.partial_text !== undefined) {
+                        item.querySelector('.text-content').textContent = progress.partial_text;
+                    }
+                }
+                setTimeout(() => pollItemStatus(badge), STATUS_POLL_INTERVAL);
+                return;
+            }
+            if (data.status === 'failed') {
+                badge.classList.replace('pending', 'failed');
+                badge.textContent = 'Extraction failed';
+                if (data.job && data.job.error) badge.title = data.job.error;
+            } else {
+                badge.remove();
+            }
+            item.querySelector('.item-chars').textContent = (data.text_length || 0).toLocaleString();
+            const container = item.querySelector('.text-container');
+            delete container.dataset.textLoaded;
+        })
+        .catch(err => {
+            console.error(err);
+            setTimeout(() => pollItemStatus(badge), STATUS_POLL_INTERVAL * 5);
+        });
+}
+
+// ===== Research Search =====
+const researchSearchInput = document.getElementById('research-search');
+if (researchSearchInput) {
+    researchSearchInput.addEventListener('input', debounce(() => {
+        searchResearch(researchSearchInput.value.trim());
+    }, 300));
+}
+
+function searchResearch(query) {
+    const resultsEl = document.getElementById('research-search-results');
+    if (!query) {
+        resultsEl.style.display = 'none';
+        resultsEl.innerHTML = '';
+        return;
+    }
+
+    const url = `${researchSearchInput.dataset.searchUrl}?q=${encodeURIComponent(query)}`;
+    fetch(url)
+        .then(res => res.json())
+        .then(data => {
+            // Ignore responses for queries the user has already typed past
+            if (data.query !== researchSearchInput.value.trim()) return;
+            resultsEl.innerHTML = '';
+            if (data.results.length === 0) {
+                resultsEl.innerHTML = '<p class="hint">No matches</p>';
+            }
+            data.results.forEach(result => {
+                const el = document.createElement('div');
+                el.className = 'search-result';
+                el.innerHTML = `
+                    <div class="search-result-title">${result.kind === 'quote' ? '❝ ' : ''}${escapeHtml(result.title)}</div>
+                    <div class="search-result-snippet">${highlightSnippet(result.snippet, result.highlights)}</div>
+                `;
+                el.addEventListener('click', () => openResearchItem(result.research_item_id));
+                resultsEl.appendChild(el);
+            });
+            resultsEl.style.display = 'flex';
+        })
+        .catch(err => console.error('Error searching research:', err));
+}
+
+function highlightSnippet(snippet, highlights) {
+    let html = '';
+    let lastEnd = 0;
+    for (const [start, end] of highlights) {
+        html += escapeHtml(snippet.slice(lastEnd, start));
+        html += `<mark>${escapeHtml(snippet.slice(start, end))}</mark>`;
+        lastEnd = end;
+    }
+    return html + escapeHtml(snippet.slice(lastEnd));
+}
+
+function openResearchItem(itemId) {
+    const content = document.getElementById(`content-${itemId}`);
+    if (!content) return;
+    if (content.style.display === 'none') toggleItemContent(itemId);
+    content.closest('.research-item').scrollIntoView({ behavior: 'smooth', block: 'start' });
+}
+
 function showEditResearchModal(itemId) {
     // Find the item data
     const item = window.researchItems.find(i => i.id === itemId);
@@ -192,6 +326,106 @@ function saveSummary(isAutosave = false) {
         });
 }
 
+// ===== Resumable Uploads =====
+// A file picked in the add-research form is sent in chunks (see
+// models/uploads.py). A failed chunk is retried from the offset the server
+// reports, and an upload cut off by a reload resumes where it stopped when
+// the same file is picked again.
+const UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024;
+const UPLOAD_RETRIES = 5;
+
+const addResearchForm = document.getElementById('add-research-form');
+if (addResearchForm) {
+    addResearchForm.addEventListener('submit', (e) => {
+        const file = addResearchForm.querySelector('input[type="file"]').files[0];
+        if (!file) return;  // no file: submit the form as usual
+        e.preventDefault();
+        submitWithResumableUpload(addResearchForm, file);
+    });
+}
+
+async function submitWithResumableUpload(form, file) {
+    const button = form.querySelector('button[type="submit"]');
+    const label = button.textContent;
+    button.disabled = true;
+    try {
+        const uploadUrl = await resumableUpload(form.dataset.uploadsUrl, file, sent => {
+            button.textContent = `Uploading\u2026 ${Math.floor(100 * sent / file.size)}%`;
+        });
+        const fields = new FormData(form);
+        fields.delete('file');
+        const res = await fetch(`${uploadUrl}/complete`, { method: 'POST', body: fields });
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.error || `HTTP ${res.status}`);
+        window.location.href = data.redirect;
+        window.location.reload();
+    } catch (err) {
+        console.error(err);
+        showNotification(`Upload failed: ${err.message}`, 'error');
+        button.disabled = false;
+        button.textContent = label;
+    }
+}
+
+async function resumableUpload(uploadsUrl, file, onProgress) {
+    const key = `upload:${uploadsUrl}:${file.name}:${file.size}:${file.lastModified}`;
+    let uploadUrl = localStorage.getItem(key);
+    let offset = uploadUrl ? await uploadOffset(uploadUrl) : null;
+    if (offset === null) {
+        const res = await fetch(uploadsUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, length: file.size })
+        });
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.error || `HTTP ${res.status}`);
+        uploadUrl = data.url;
+        offset = 0;
+        localStorage.setItem(key, uploadUrl);
+    }
+
+    let failures = 0;
+    while (offset < file.size) {
+        onProgress(offset);
+        try {
+            offset = await sendChunk(uploadUrl, offset, file.slice(offset, offset + UPLOAD_CHUNK_SIZE));
+            failures = 0;
+        } catch (err) {
+            if (++failures > UPLOAD_RETRIES) throw err;
+            await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** failures));
+            offset = await uploadOffset(uploadUrl).catch(() => offset);
+            if (offset === null) {
+                localStorage.removeItem(key);
+                throw new Error('the upload expired, please try again');
+            }
+        }
+    }
+    localStorage.removeItem(key);
+    return uploadUrl;
+}
+
+async function uploadOffset(uploadUrl) {
+    const res = await fetch(uploadUrl, { method: 'HEAD', cache: 'no-store' });
+    if (res.status === 404) return null;
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    return Number(res.headers.get('Upload-Offset'));
+}
+
+async function sendChunk(uploadUrl, offset, chunk) {
+    const headers = {
+        'Content-Type': 'application/offset+octet-stream',
+        'Upload-Offset': String(offset)
+    };
+    if (window.crypto && crypto.subtle) {
+        const digest = new Uint8Array(await crypto.subtle.digest('SHA-256', await chunk.arrayBuffer()));
+        headers['Upload-Checksum'] = `sha256 ${btoa(String.fromCharCode(...digest))}`;
+    }
+    const res = await fetch(uploadUrl, { method: 'PATCH', headers, body: chunk });
+    // 409: the server has a different offset (e.g. an earlier attempt did land)
+    if (!res.ok && res.status !== 409) throw new Error(`HTTP ${res.status}`);
+    return Number(res.headers.get('Upload-Offset'));
+}
+
 // ===== Notifications =====
 function showNotification(message, type = 'info') {
     const notification = document.createElement('div');
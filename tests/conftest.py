@@ -0,0 +1,161 @@
+"""Shared pytest fixtures."""
+
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import db
+from db import bootstrap, storage, writer
+
+# Tests bring up their own databases; importing the app must not touch data/
+os.environ.setdefault("DB_BOOTSTRAP", "0")
+# Tests run jobs explicitly with job_runner.run_next()
+os.environ.setdefault("JOB_WORKERS", "0")
+# and never collect garbage under the real uploads/ directory
+os.environ.setdefault("UPLOAD_GC_INTERVAL_S", "0")
+# Tests that render start their own renderer pool
+os.environ.setdefault("PDF_RENDER_PROCESSES", "0")
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point the app at a fresh, fully migrated database file."""
+    monkeypatch.setattr(db, "DATABASE_PATH", tmp_path / "test.db")
+    db.reset_pool()
+    bootstrap.ensure_schema()
+    yield db.DATABASE_PATH
+    writer.stop_writer()
+    storage.stop_checkpointer()
+    db.reset_pool()
+
+
+@pytest.fixture
+def client(temp_db):
+    """Flask test client backed by the temporary database."""
+    from app import app
+
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """Record every SQL statement executed on newly opened connections."""
+    executed: list[str] = []
+    open_connection = db.get_db
+
+    def traced_get_db():
+        conn = open_connection()
+        conn.set_trace_callback(executed.append)
+        return conn
+
+    monkeypatch.setattr(db, "get_db", traced_get_db)
+    db.reset_pool()
+    return executed
+
+
+ARTICLE_HTML = """<html><head><title>{title}</title></head><body><article>
+<h1>{title}</h1>{paragraphs}</article></body></html>"""
+
+
+class ArticleServer:
+    """A local web server of test articles, recording concurrent requests.
+
+    Pages are registered in ``pages`` as path -> HTML; other paths are 404s.
+    Every response is delayed by ``delay`` seconds. With ``validators`` set,
+    pages carry an ETag and conditional requests for unchanged pages get a
+    304.
+    """
+
+    def __init__(self):
+        self.pages: dict[str, str] = {}
+        self.delay = 0.0
+        self.validators = False
+        self.requests: list[tuple[str, str]] = []  # (host, path)
+        self.statuses: list[int] = []
+        self.max_in_flight: dict[str, int] = {}
+        self._in_flight: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.port = self.httpd.server_port
+
+    def url(self, path: str, host: str = "127.0.0.1") -> str:
+        return f"http://{host}:{self.port}{path}"
+
+    def add_article(self, path: str, title: str) -> None:
+        paragraph = f"<p>{title} is discussed at length in this article. " * 8
+        self.pages[path] = ARTICLE_HTML.format(
+            title=title, paragraphs=(paragraph + "</p>") * 4
+        )
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                host = self.headers.get("Host", "")
+                with server._lock:
+                    server.requests.append((host, self.path))
+                    server._in_flight[host] = server._in_flight.get(host, 0) + 1
+                    server.max_in_flight[host] = max(
+                        server.max_in_flight.get(host, 0), server._in_flight[host]
+                    )
+                try:
+                    time.sleep(server.delay)
+                finally:
+                    # Before responding: a client may send its next request
+                    # as soon as it has read this response
+                    with server._lock:
+                        server._in_flight[host] -= 1
+                self.respond()
+
+            def respond(self):
+                html = server.pages.get(self.path)
+                if html is None:
+                    server.statuses.append(404)
+                    self.send_error(404)
+                    return
+                body = html.encode("utf-8")
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                if server.validators and self.headers.get("If-None-Match") == etag:
+                    server.statuses.append(304)
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                server.statuses.append(200)
+                self.send_response(200)
+                if server.validators:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def article_server(monkeypatch):
+    """Serve test articles over HTTP on localhost."""
+    from trafilatura.settings import use_config
+
+    from services import extractor
+
+    # Trafilatura refuses private addresses by default
+    config = use_config()
+    config.set("DEFAULT", "SSRF_PROTECTION", "False")
+    monkeypatch.setattr(extractor, "FETCH_CONFIG", config)
+
+    server = ArticleServer()
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
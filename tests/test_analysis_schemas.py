@@ -62,6 +62,12 @@ class TestAnalysisSchemas:
                     f"{template.slug} get_empty_data() missing required field '{field}'"
                 )
 
+    def test_empty_data_validates_against_schema(self, all_templates):
+        """get_empty_data() must pass the template's own validation."""
+        for template in all_templates:
+            errors = template.validate_data(template.get_empty_data())
+            assert errors == [], f"{template.slug} empty data is invalid: {errors}"
+
     def test_schema_property_types_are_valid(self, all_templates):
         """Schema properties must have valid JSON Schema types."""
         valid_types = {
@@ -0,0 +1,125 @@
+"""Tests for content-addressed upload storage."""
+
+import io
+
+import pytest
+
+import db
+from models import blobs, business, research
+from services import job_runner, pdf_text
+
+
+@pytest.fixture
+def upload_dir(temp_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(blobs, "UPLOAD_DIR", tmp_path / "uploads")
+    return blobs.UPLOAD_DIR
+
+
+def stored_files(upload_dir):
+    return sorted(p for p in (upload_dir / "blobs").rglob("*") if p.is_file())
+
+
+def test_identical_content_is_stored_once(upload_dir):
+    first = blobs.store(io.BytesIO(b"same bytes"), "a.pdf")
+    second = blobs.store(io.BytesIO(b"same bytes"), "renamed.PDF")
+
+    assert first["sha256"] == second["sha256"]
+    assert first["path"] == second["path"]
+    assert blobs.path_for(first).read_bytes() == b"same bytes"
+    assert blobs.path_for(first).suffix == ".pdf"
+    assert len(stored_files(upload_dir)) == 1
+    # Staging files do not linger
+    assert list(blobs.staging_dir().iterdir()) == []
+    assert blobs.usage() == {"blobs": 1, "bytes": len(b"same bytes")}
+
+
+def test_same_name_different_content_does_not_overwrite(upload_dir):
+    first = blobs.store(io.BytesIO(b"version one"), "report.pdf")
+    second = blobs.store(io.BytesIO(b"version two"), "report.pdf")
+
+    assert first["path"] != second["path"]
+    assert blobs.path_for(first).read_bytes() == b"version one"
+    assert blobs.path_for(second).read_bytes() == b"version two"
+
+
+def test_reusing_a_blob_restarts_its_grace_period(upload_dir):
+    blob = blobs.store(io.BytesIO(b"unreferenced"), "a.pdf")
+    with db.connection() as conn:
+        conn.execute(
+            "UPDATE blobs SET updated_at = datetime('now', '-2 days') WHERE sha256 = ?",
+            (blob["sha256"],),
+        )
+        conn.commit()
+
+    again = blobs.store(io.BytesIO(b"unreferenced"), "b.pdf")
+    assert again["path"] == blob["path"]
+    with db.connection() as conn:
+        (fresh,) = conn.execute(
+            "SELECT updated_at > datetime('now', '-1 hour') FROM blobs WHERE sha256 = ?",
+            (blob["sha256"],),
+        ).fetchone()
+    assert fresh
+
+
+def test_ref_count_follows_research_items(upload_dir):
+    business_id = business.create("Acme", "", "company", "")
+    blob = blobs.store(io.BytesIO(b"shared"), "deck.pdf")
+    assert blob["ref_count"] == 0
+
+    ids = [
+        research.create_item(business_id, title, "document", blob_sha256=blob["sha256"])
+        for title in ("Deck", "Deck again")
+    ]
+    assert blobs.get(blob["sha256"])["ref_count"] == 2
+
+    research.delete_item(ids[0])
+    assert blobs.get(blob["sha256"])["ref_count"] == 1
+    research.delete_item(ids[1])
+    assert blobs.get(blob["sha256"])["ref_count"] == 0
+
+
+def test_duplicate_uploads_share_a_blob(client, upload_dir):
+    business_id = business.create("Acme", "", "company", "")
+    for title in ("Report", "Report (again)"):
+        response = client.post(
+            f"/business/{business_id}/research",
+            data={
+                "title": title,
+                "type": "document",
+                "file": (io.BytesIO(b"%PDF-1.4 report"), "report.pdf"),
+            },
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 302
+
+    items = research.get_items_for_business(business_id, "metadata")
+    assert len({item["blob_sha256"] for item in items}) == 1
+    blob = blobs.get(items[0]["blob_sha256"])
+    assert blob["ref_count"] == 2
+    assert items[0]["original_file_path"] == str(blobs.path_for(blob))
+    assert len(stored_files(upload_dir)) == 1
+
+
+def test_extraction_job_passes_content_hash(client, upload_dir, monkeypatch):
+    business_id = business.create("Acme", "", "company", "")
+    client.post(
+        f"/business/{business_id}/research",
+        data={
+            "title": "Report",
+            "type": "document",
+            "file": (io.BytesIO(b"%PDF-1.4 report"), "report.pdf"),
+        },
+        content_type="multipart/form-data",
+    )
+    seen = {}
+
+    def extract_text(file_path, on_progress=None, file_hash=None):
+        seen["path"], seen["hash"] = file_path, file_hash
+        return "text", {"pages": None}
+
+    monkeypatch.setattr(pdf_text, "extract_text", extract_text)
+    assert job_runner.run_next() == "done"
+
+    item = research.get_items_for_business(business_id, "metadata")[0]
+    assert seen["hash"] == item["blob_sha256"]
+    assert str(seen["path"]) == item["original_file_path"]
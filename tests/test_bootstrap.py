@@ -0,0 +1,94 @@
+"""Tests for startup-time schema initialization."""
+
+import multiprocessing
+import os
+
+import pytest
+
+import db
+from db import bootstrap, migrations, writer
+
+
+def test_current_schema_is_skipped(temp_db):
+    """Once the fingerprint is stored, startup does no work."""
+    assert bootstrap.ensure_schema() is False
+    with db.connection() as conn:
+        assert bootstrap.get_stored_fingerprint(conn) == bootstrap.schema_fingerprint()
+
+
+def test_new_migration_changes_fingerprint(temp_db, monkeypatch):
+    """Registering a migration invalidates the stored fingerprint."""
+    applied = []
+
+    def migration_999_test(conn):
+        applied.append(True)
+
+    monkeypatch.setattr(
+        migrations, "MIGRATIONS", [*migrations.MIGRATIONS, (999, migration_999_test)]
+    )
+    assert bootstrap.ensure_schema() is True
+    assert applied == [True]
+    assert bootstrap.ensure_schema() is False
+    assert applied == [True]
+
+
+def _bootstrap_in_child(path, results):
+    db.DATABASE_PATH = path
+    results.put(bootstrap.ensure_schema())
+
+
+@pytest.mark.skipif(os.name != "posix", reason="uses fork")
+def test_concurrent_processes_initialize_once(tmp_path, monkeypatch):
+    """Workers starting together leave exactly one to run the migrations."""
+    path = tmp_path / "shared.db"
+    monkeypatch.setattr(db, "DATABASE_PATH", path)
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [
+        context.Process(target=_bootstrap_in_child, args=(path, results))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    assert sorted(results.get(timeout=5) for _ in workers) == [
+        False,
+        False,
+        False,
+        True,
+    ]
+    assert bootstrap.ensure_schema() is False
+
+
+def test_init_db_command_initializes(tmp_path, monkeypatch):
+    """Importing the app leaves the schema to init-db (or the first request)."""
+    from app import app
+
+    monkeypatch.setenv("DB_BOOTSTRAP", "1")
+    monkeypatch.setattr(db, "DATABASE_PATH", tmp_path / "fresh.db")
+    db.reset_pool()
+    runner = app.test_cli_runner()
+    try:
+        assert "Database initialized." in runner.invoke(args=["init-db"]).output
+        assert "already current" in runner.invoke(args=["init-db"]).output
+    finally:
+        db.reset_pool()
+
+
+def test_first_request_initializes(tmp_path, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setenv("DB_BOOTSTRAP", "1")
+    monkeypatch.setattr(db, "DATABASE_PATH", tmp_path / "fresh.db")
+    monkeypatch.setattr(app_module, "_services_pid", None)
+    db.reset_pool()
+    try:
+        assert app_module.app.test_client().get("/").status_code == 200
+        with db.connection() as conn:
+            assert bootstrap.get_stored_fingerprint(conn) is not None
+    finally:
+        writer.stop_writer()
+        db.reset_pool()
@@ -0,0 +1,139 @@
+"""Tests for bulk URL import, run against a local HTTP server."""
+
+import io
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from models import business, jobs, research
+from services import bulk_import, job_runner
+
+
+@pytest.fixture
+def business_id(temp_db):
+    return business.create("Acme", "", "company", "")
+
+
+def test_parse_urls():
+    text = "https://a.test/1\n  http://b.test/2, https://a.test/1\nnot-a-url"
+    assert bulk_import.parse_urls(text) == ["https://a.test/1", "http://b.test/2"]
+    with pytest.raises(ValueError):
+        bulk_import.parse_urls("nothing here")
+
+
+def test_import_creates_items_and_reports_failures(business_id, article_server):
+    for n in range(3):
+        article_server.add_article(f"/news/{n}", f"Pump market report {n}")
+    article_server.pages["/empty"] = "<html><body></body></html>"
+    urls = [article_server.url(f"/news/{n}") for n in range(3)]
+    urls += [article_server.url("/missing"), article_server.url("/empty")]
+    seen = []
+
+    results = bulk_import.import_urls(
+        business_id, urls, processes=0, on_result=seen.append
+    )
+
+    assert seen == results
+    by_url = {result["url"]: result for result in results}
+    assert by_url[urls[3]]["error"] == "Download failed"
+    assert by_url[urls[4]]["error"] == "No article text found"
+    items = research.get_items_for_business(business_id)
+    assert sorted(item["title"] for item in items) == [
+        f"Pump market report {n}" for n in range(3)
+    ]
+    assert {item["source_reference"] for item in items} == set(urls[:3])
+    assert all("discussed at length" in item["plain_text"] for item in items)
+
+
+def test_requests_per_host_are_limited(business_id, article_server):
+    article_server.delay = 0.05
+    urls = []
+    for n in range(6):
+        article_server.add_article(f"/a/{n}", f"Article {n}")
+        # The same server under two host names counts as two hosts
+        urls.append(article_server.url(f"/a/{n}", host="127.0.0.1"))
+        urls.append(article_server.url(f"/a/{n}", host="localhost"))
+
+    bulk_import.import_urls(business_id, urls, fetch_workers=8, per_host=2, processes=0)
+
+    assert len(article_server.requests) == 12
+    assert set(article_server.max_in_flight.values()) == {2}
+
+
+def test_extraction_runs_in_worker_processes(business_id, article_server):
+    article_server.add_article("/report", "Annual report")
+
+    try:
+        results = bulk_import.import_urls(
+            business_id, [article_server.url("/report")], processes=1
+        )
+    finally:
+        bulk_import.stop_extract_pool()
+
+    assert results[0]["status"] == "created"
+    assert research.get_item_by_id(results[0]["item_id"])["title"] == "Annual report"
+
+
+def test_bulk_import_endpoint(client, business_id, article_server, monkeypatch):
+    monkeypatch.setattr(bulk_import, "EXTRACT_PROCESSES", 0)
+    article_server.add_article("/one", "First")
+    article_server.add_article("/two", "Second")
+    urls = [article_server.url("/one"), article_server.url("/two")]
+
+    response = client.post(
+        f"/business/{business_id}/research/bulk",
+        data={
+            "urls": urls[0],
+            "url_file": (io.BytesIO(urls[1].encode()), "urls.txt"),
+            "type": "article",
+        },
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 302
+    # Nothing is fetched in the request; the items wait for their jobs
+    assert article_server.requests == []
+    items = research.get_items_for_business(business_id, "metadata")
+    assert {(item["title"], item["status"]) for item in items} == {
+        (url, "pending") for url in urls
+    }
+
+    assert [job_runner.run_next() for _ in urls] == ["done", "done"]
+    items = research.get_items_for_business(business_id)
+    assert {item["title"] for item in items} == {"First", "Second"}
+    assert all("discussed at length" in item["plain_text"] for item in items)
+
+    response = client.post(f"/business/{business_id}/research/bulk", data={})
+    assert response.status_code == 400
+
+
+def test_queued_import_of_missing_page_fails(business_id, article_server, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_ATTEMPTS", 1)
+    (item_id,) = bulk_import.queue_import(business_id, [article_server.url("/gone")])
+
+    assert job_runner.run_next() == "failed"
+    assert (
+        jobs.get_latest_job_for_item(item_id)["error"] == "ValueError: Download failed"
+    )
+    assert research.get_item_by_id(item_id)["status"] == "failed"
+
+
+def test_queued_import_extracts_in_worker_process(
+    business_id, article_server, monkeypatch
+):
+    """Extraction workers are spawned, re-importing the main module; under
+    ``python app.py`` that is app.py, which must import cleanly there."""
+    main = types.ModuleType("__main__")
+    main.__file__ = str(Path(__file__).resolve().parent.parent / "app.py")
+    monkeypatch.setitem(sys.modules, "__main__", main)
+    monkeypatch.setenv("PDF_RENDER_PROCESSES", "1")  # as when serving
+    monkeypatch.setattr(bulk_import, "EXTRACT_PROCESSES", 1)
+    article_server.add_article("/report", "Annual report")
+    (item_id,) = bulk_import.queue_import(business_id, [article_server.url("/report")])
+
+    try:
+        assert job_runner.run_next() == "done"
+    finally:
+        bulk_import.stop_extract_pool()
+    assert research.get_item_by_id(item_id)["title"] == "Annual report"
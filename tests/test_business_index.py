@@ -0,0 +1,114 @@
+"""Tests for the paginated business index and its activity counters."""
+
+import pytest
+
+import db
+from models import analysis, business, research
+
+
+def _set_updated_at(business_ids, value):
+    with db.connection() as conn:
+        conn.executemany(
+            "UPDATE businesses SET updated_at = ? WHERE id = ?",
+            [(value, business_id) for business_id in business_ids],
+        )
+        conn.commit()
+
+
+def test_pages_cover_every_business_once(temp_db):
+    """Keyset pages follow (updated_at, id) order, including timestamp ties."""
+    ids = [business.create(f"B{i}", "", "company", "") for i in range(7)]
+    _set_updated_at(ids[:4], "2024-01-01 00:00:00")
+    _set_updated_at(ids[4:], "2024-06-01 00:00:00")
+
+    seen = []
+    after = None
+    while True:
+        page, after = business.get_page(after, limit=3)
+        seen.extend(row["id"] for row in page)
+        if after is None:
+            break
+
+    assert seen == ids[4:][::-1] + ids[:4][::-1]
+
+
+def test_invalid_cursor_is_rejected(temp_db, client):
+    with pytest.raises(ValueError, match="Invalid page cursor"):
+        business.get_page("not-a-cursor")
+    assert client.get("/?after=not-a-cursor").status_code == 400
+
+
+def test_index_shows_activity(temp_db, client):
+    business_id = business.create("Acme", "", "company", "")
+    research.create_item(business_id, "Interview", "interview", plain_text="x")
+    response = client.get("/")
+    assert response.status_code == 200
+    text = " ".join(response.get_data(as_text=True).split())
+    assert "1 research item · 0 quotes · 0 analyses" in text
+
+
+def test_page_query_uses_index(temp_db):
+    with db.connection() as conn:
+        plan = conn.execute(
+            """EXPLAIN QUERY PLAN SELECT * FROM businesses
+               WHERE (updated_at, id) < (?, ?)
+               ORDER BY updated_at DESC, id DESC LIMIT 25""",
+            ("2024-01-01", 1),
+        ).fetchall()
+    details = " ".join(row["detail"] for row in plan)
+    assert "idx_businesses_updated" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_counters_follow_child_rows(temp_db):
+    business_id = business.create("Acme", "", "company", "")
+    first = research.create_item(business_id, "Interview", "interview", plain_text="x")
+    second = research.create_item(business_id, "Notes", "note", plain_text="y")
+    for _ in range(3):
+        research.create_quote(first, 0, 1, "x")
+    quote_id = research.create_quote(second, 0, 1, "y")
+    analysis_id = analysis.create_analysis(business_id, "vrio", "VRIO")
+
+    counts = business.get_by_id(business_id)
+    assert (
+        counts["research_item_count"],
+        counts["quote_count"],
+        counts["analysis_count"],
+    ) == (2, 4, 1)
+
+    research.delete_quote(quote_id)
+    research.delete_item(first)  # cascades to its three quotes
+    analysis.delete_analysis(analysis_id)
+    counts = business.get_by_id(business_id)
+    assert (
+        counts["research_item_count"],
+        counts["quote_count"],
+        counts["analysis_count"],
+    ) == (1, 0, 0)
+
+
+def test_child_changes_bump_updated_at(temp_db):
+    business_id = business.create("Acme", "", "company", "")
+    analysis_id = analysis.create_analysis(business_id, "vrio", "VRIO")
+    _set_updated_at([business_id], "2000-01-01 00:00:00")
+
+    analysis.save_analysis_by_id(analysis_id, {"resources": [{"name": "Brand"}]})
+    assert business.get_by_id(business_id)["updated_at"] > "2000-01-01 00:00:00"
+
+
+def test_migration_backfills_counters(temp_db):
+    """Counters are recomputed for rows that existed before the triggers."""
+    from db import migrations
+
+    business_id = business.create("Acme", "", "company", "")
+    research.create_item(business_id, "Interview", "interview", plain_text="x")
+    with db.connection() as conn:
+        conn.execute(
+            "UPDATE businesses SET research_item_count = 0 WHERE id = ?",
+            (business_id,),
+        )
+        conn.commit()
+        migrations.set_schema_version(conn, 5)
+    migrations.run_migrations()
+
+    assert business.get_by_id(business_id)["research_item_count"] == 1
@@ -0,0 +1,130 @@
+"""Tests for segmented audio transcription, run against a fake client."""
+
+import re
+import wave
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from services import gemini, transcript
+
+
+RATE = 1000  # frames per second of the test recordings
+
+
+def write_wav(path, seconds):
+    with wave.open(str(path), "wb") as audio:
+        audio.setnchannels(1)
+        audio.setsampwidth(1)
+        audio.setframerate(RATE)
+        audio.writeframes(b"\x80" * int(seconds * RATE))
+    return path
+
+
+class SegmentClient:
+    """Transcribes each uploaded clip as one line every ten seconds."""
+
+    def __init__(self):
+        self.files = self
+        self.models = self
+        self.clip_seconds = {}
+        self.prompts = []
+
+    def upload(self, file):
+        name = f"files/{Path(file).name}"
+        with wave.open(str(file), "rb") as audio:
+            self.clip_seconds[name] = audio.getnframes() / audio.getframerate()
+        return SimpleNamespace(
+            name=name,
+            uri=f"https://gemini.test/{name}",
+            mime_type="audio/wav",
+            expiration_time=None,
+        )
+
+    def generate_content(self, model, contents):
+        handle, prompt = contents
+        self.prompts.append(prompt)
+        lines = [
+            f"[{transcript.format_timestamp(t)}] Speaker 1: Clip sentence {t}."
+            for t in range(0, int(self.clip_seconds[handle.name]) + 1, 10)
+        ]
+        return SimpleNamespace(text="\n".join(lines))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    client = SegmentClient()
+    monkeypatch.setattr(gemini, "get_client", lambda: client)
+    monkeypatch.setattr(gemini, "CACHE_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(gemini, "FFMPEG", "no-such-ffmpeg")
+    yield client
+    monkeypatch.setattr(gemini, "_cache", None)
+
+
+def test_long_recording_is_transcribed_in_segments(tmp_path, client):
+    audio = write_wav(tmp_path / "interview.wav", 250)
+    progress = []
+
+    text = gemini.transcribe_audio(
+        audio,
+        segment_seconds=100,
+        concurrency=3,
+        on_progress=lambda *args: progress.append(args),
+    )
+
+    # Each window is cut out and uploaded on its own
+    assert sorted(client.clip_seconds.values()) == [90.0, 100.0, 100.0]
+    assert client.prompts == [gemini.AUDIO_SEGMENT_PROMPT] * 3
+    stamps = re.findall(r"^\[(\d+):(\d+)\]", text, re.MULTILINE)
+    assert [int(m) * 60 + int(s) for m, s in stamps] == list(range(0, 251, 10))
+
+    assert [(done, total) for done, total, _ in progress] == [(1, 3), (2, 3), (3, 3)]
+    assert progress[-1][2] == text
+
+
+def test_recording_that_cannot_be_cut_is_sent_whole(tmp_path, client, monkeypatch):
+    audio = tmp_path / "interview.mp3"
+    audio.write_bytes(b"ID3 fake audio")
+    monkeypatch.setattr(gemini, "audio_duration", lambda path: 250.0)
+    client.upload = lambda file: SimpleNamespace(
+        name="files/1", uri="u", mime_type="audio/mpeg", expiration_time=None
+    )
+    client.generate_content = lambda model, contents: SimpleNamespace(
+        text=f"Speaker 1: {contents[1][:10]}"
+    )
+
+    assert gemini.transcribe_audio(audio, segment_seconds=100) == (
+        f"Speaker 1: {gemini.AUDIO_PROMPT[:10]}"
+    )
+
+
+def test_ffmpeg_cuts_windows_without_reencoding(tmp_path, monkeypatch):
+    commands = []
+
+    def run(command, check, capture_output):
+        commands.append(command)
+        Path(command[-1]).write_bytes(b"clip")
+
+    monkeypatch.setattr(gemini.shutil, "which", lambda name: "/usr/bin/ffmpeg")
+    monkeypatch.setattr(gemini.subprocess, "run", run)
+    segments = transcript.plan_segments(250, 100, 20)
+
+    paths = gemini.split_audio(tmp_path / "talk.MP3", segments, tmp_path)
+
+    assert [path.name for path in paths] == [f"segment-{i}.mp3" for i in range(3)]
+    assert [command[4:8] for command in commands] == [
+        ["-ss", "0.000", "-t", "100.000"],
+        ["-ss", "80.000", "-t", "100.000"],
+        ["-ss", "160.000", "-t", "90.000"],
+    ]
+    assert all(command[-3:-1] == ["-c", "copy"] for command in commands)
+
+
+def test_short_recording_is_sent_whole(tmp_path, client):
+    audio = write_wav(tmp_path / "memo.wav", 30)
+    client.generate_content = lambda model, contents: SimpleNamespace(
+        text="Speaker 1: Hi."
+    )
+
+    assert gemini.transcribe_audio(audio, segment_seconds=300) == "Speaker 1: Hi."
@@ -0,0 +1,141 @@
+"""Tests for the Gemini extraction cache, run against a local fake client."""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors
+
+from services import gemini
+from services.cache import DiskCache
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeClient:
+    """Records uploads and generate_content calls instead of calling Gemini."""
+
+    def __init__(self):
+        self.uploads = []
+        self.prompts = []
+        self.files = self
+        self.models = self
+
+        self.missing = set()  # remote URIs that Gemini has "deleted"
+
+    def upload(self, file):
+        self.uploads.append(file)
+        return SimpleNamespace(
+            name=f"files/{len(self.uploads)}",
+            uri=f"https://gemini.test/files/{len(self.uploads)}",
+            mime_type="application/pdf",
+            expiration_time=datetime.now(timezone.utc) + timedelta(hours=48),
+        )
+
+    def generate_content(self, model, contents):
+        handle, prompt = contents
+        uri = getattr(handle, "uri", None) or handle.file_data.file_uri
+        if uri in self.missing:
+            raise errors.ClientError(404, {"error": {"message": "File not found"}})
+        self.prompts.append((model, prompt))
+        return FakeResponse(f"text of {uri} #{len(self.prompts)}")
+
+
+@pytest.fixture
+def fake_client(tmp_path, monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(gemini, "get_client", lambda: client)
+    monkeypatch.setattr(gemini, "CACHE_PATH", str(tmp_path / "cache.db"))
+    yield client
+    monkeypatch.setattr(gemini, "_cache", None)
+
+
+def test_same_contents_hit_the_cache(tmp_path, fake_client):
+    """Identical files are sent once, whatever they are called."""
+    first = tmp_path / "annual-report.pdf"
+    copy = tmp_path / "report-copy.pdf"
+    first.write_bytes(b"%PDF-1.4 annual report")
+    copy.write_bytes(b"%PDF-1.4 annual report")
+
+    text = gemini.extract_text_from_pdf(first)
+    assert gemini.extract_text_from_pdf(copy) == text
+    assert len(fake_client.uploads) == 1
+    assert gemini.cache_stats()["hits"] == 1
+
+    # A different prompt is a different cache entry, but the file is not
+    # uploaded again
+    gemini.transcribe_audio(first)
+    assert len(fake_client.uploads) == 1
+    assert len(fake_client.prompts) == 2
+
+
+def test_expired_upload_is_sent_again(tmp_path, fake_client, monkeypatch):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    gemini.extract_text_from_pdf(path)
+
+    # Within the expiry margin the registered handle is no longer trusted
+    monkeypatch.setattr(gemini, "UPLOAD_EXPIRY_MARGIN", 49 * 3600)
+    gemini.transcribe_audio(path)
+    assert len(fake_client.uploads) == 2
+
+
+def test_missing_remote_file_is_reuploaded(tmp_path, fake_client):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    gemini.extract_text_from_pdf(path)
+    fake_client.missing.add("https://gemini.test/files/1")
+
+    assert gemini.transcribe_audio(path).startswith(
+        "text of https://gemini.test/files/2"
+    )
+    assert len(fake_client.uploads) == 2
+
+
+def test_client_is_shared(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(gemini, "_client", None)
+    assert gemini.get_client() is gemini.get_client()
+
+    monkeypatch.setenv("GEMINI_API_KEY", "other-key")
+    assert gemini.get_client()._api_client.api_key == "other-key"
+    monkeypatch.setattr(gemini, "_client", None)
+
+
+def test_cache_persists_across_instances(tmp_path):
+    cache = DiskCache(tmp_path / "cache.db", max_bytes=1024)
+    cache.set("key", "value")
+    cache.close()
+
+    reopened = DiskCache(tmp_path / "cache.db", max_bytes=1024)
+    assert reopened.get("key") == "value"
+    assert reopened.info()["bytes"] == 5
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path / "cache.db", max_bytes=30)
+    cache.set("a", "x" * 10)
+    cache.set("b", "x" * 10)
+    cache.set("c", "x" * 10)
+    assert cache.get("a") is not None  # "b" is now least recently used
+
+    cache.set("d", "x" * 10)
+    assert cache.get("b") is None
+    assert all(cache.get(key) for key in "acd")
+    assert cache.info()["evictions"] == 1
+    assert cache.info()["bytes"] <= 30
+
+    cache.set("huge", "x" * 31)  # larger than the cache: not stored
+    assert cache.get("huge") is None
+
+
+def test_file_hash_is_streamed(tmp_path, monkeypatch):
+    monkeypatch.setattr(gemini, "HASH_CHUNK_SIZE", 4)
+    path = tmp_path / "audio.mp3"
+    path.write_bytes(b"0123456789")
+    import hashlib
+
+    assert gemini.file_sha256(path) == hashlib.sha256(b"0123456789").hexdigest()
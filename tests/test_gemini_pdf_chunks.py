@@ -0,0 +1,114 @@
+"""Tests for page-range extraction of long PDFs, run against a fake client."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from pypdf import PdfWriter
+
+from services import gemini
+
+
+class RangeClient:
+    """Answers each upload with the name of the page-range file it was given."""
+
+    def __init__(self, delay=0.0, failures=None):
+        self.files = self
+        self.models = self
+        self.delay = delay
+        self.failures = dict(failures or {})  # file name -> failures left
+        self.names = {}
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def upload(self, file):
+        uri = f"https://gemini.test/files/{len(self.names) + 1}"
+        self.names[uri] = file.name
+        return SimpleNamespace(
+            name=uri, uri=uri, mime_type="application/pdf", expiration_time=None
+        )
+
+    def generate_content(self, model, contents):
+        handle, _ = contents
+        uri = getattr(handle, "uri", None) or handle.file_data.file_uri
+        name = self.names[uri]
+        with self._lock:
+            self.calls.append(name)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            with self._lock:
+                if self.failures.get(name):
+                    self.failures[name] -= 1
+                    raise RuntimeError("503 service unavailable")
+            return SimpleNamespace(text=f"text of {name}\n")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def use_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(gemini, "CACHE_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(gemini, "CHUNK_RETRY_DELAY", 0)
+
+    def install(client):
+        monkeypatch.setattr(gemini, "get_client", lambda: client)
+        return client
+
+    yield install
+    monkeypatch.setattr(gemini, "_cache", None)
+
+
+def make_pdf(path, pages):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+def test_ranges_are_extracted_concurrently_and_stitched_in_order(tmp_path, use_client):
+    client = use_client(RangeClient(delay=0.05))
+    pdf = make_pdf(tmp_path / "long.pdf", 9)
+
+    text = gemini.extract_text_from_pdf(pdf, pages_per_chunk=2, concurrency=3)
+
+    assert text.split("\n\n") == [
+        "text of pages-1-2.pdf",
+        "text of pages-3-4.pdf",
+        "text of pages-5-6.pdf",
+        "text of pages-7-8.pdf",
+        "text of pages-9-9.pdf",
+    ]
+    assert client.max_in_flight == 3
+
+
+def test_failed_range_is_retried_alone(tmp_path, use_client):
+    client = use_client(RangeClient(failures={"pages-3-4.pdf": 2}))
+    pdf = make_pdf(tmp_path / "long.pdf", 6)
+
+    text = gemini.extract_text_from_pdf(pdf, pages_per_chunk=2)
+
+    assert "text of pages-3-4.pdf" in text
+    assert client.calls.count("pages-3-4.pdf") == 3
+    assert client.calls.count("pages-1-2.pdf") == 1
+
+    # Completed ranges are cached: a second run makes no calls
+    gemini.extract_text_from_pdf(pdf, pages_per_chunk=2)
+    assert len(client.calls) == 5
+
+
+def test_short_pdf_is_sent_whole(tmp_path, use_client):
+    client = use_client(RangeClient())
+    pdf = make_pdf(tmp_path / "short.pdf", 3)
+
+    assert gemini.extract_text_from_pdf(pdf, pages_per_chunk=5) == (
+        "text of short.pdf\n"
+    )
+    assert client.calls == ["short.pdf"]
@@ -0,0 +1,223 @@
+"""Tests for the background extraction job queue."""
+
+import io
+import threading
+import time
+
+import pytest
+
+import db
+from models import blobs, business, jobs, research
+from services import job_runner
+
+
+@pytest.fixture
+def pending_item(temp_db):
+    business_id = business.create("Acme", "", "company", "")
+    item_id = research.create_item(
+        business_id,
+        "Interview",
+        "interview",
+        original_file_path="/uploads/interview.mp3",
+        extraction_job="transcribe_audio",
+    )
+    return item_id
+
+
+def test_job_completion_fills_in_text(pending_item, monkeypatch):
+    monkeypatch.setitem(
+        job_runner.HANDLERS,
+        "transcribe_audio",
+        lambda job, on_progress: "Speaker 1: hello",
+    )
+    assert research.get_item_by_id(pending_item)["status"] == "pending"
+
+    assert job_runner.run_next() == "done"
+    assert job_runner.run_next() is None
+
+    item = research.get_item_by_id(pending_item)
+    assert (item["status"], item["plain_text"]) == ("ready", "Speaker 1: hello")
+    job = jobs.get_latest_job_for_item(pending_item)
+    assert (job["status"], job["attempts"]) == ("done", 1)
+
+
+def test_failing_job_retries_then_fails(pending_item, monkeypatch):
+    def boom(job, on_progress):
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setitem(job_runner.HANDLERS, "transcribe_audio", boom)
+    monkeypatch.setattr(jobs, "RETRY_DELAY", 0)
+
+    statuses = [job_runner.run_next() for _ in range(jobs.MAX_ATTEMPTS)]
+    assert statuses == ["queued"] * (jobs.MAX_ATTEMPTS - 1) + ["failed"]
+    job = jobs.get_latest_job_for_item(pending_item)
+    assert job["error"] == "RuntimeError: quota exceeded"
+    assert research.get_item_by_id(pending_item)["status"] == "failed"
+
+
+def test_retry_waits_for_backoff(pending_item, monkeypatch):
+    monkeypatch.setitem(
+        job_runner.HANDLERS, "transcribe_audio", lambda job, on_progress: 1 / 0
+    )
+    assert job_runner.run_next() == "queued"
+    assert job_runner.run_next() is None  # not due yet
+
+
+def test_expired_lease_is_reclaimed(pending_item, monkeypatch):
+    """A job left running by a crashed worker is picked up again."""
+    job = jobs.claim("crashed-worker", lease_seconds=60)
+    assert jobs.claim("other-worker", lease_seconds=60) is None
+
+    with db.connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET lease_expires_at = ? WHERE id = ?",
+            (time.time() - 1, job["id"]),
+        )
+        conn.commit()
+
+    monkeypatch.setitem(
+        job_runner.HANDLERS, "transcribe_audio", lambda job, on_progress: "text"
+    )
+    reclaimed = jobs.claim("new-worker", lease_seconds=60)
+    assert (reclaimed["id"], reclaimed["attempts"]) == (job["id"], 2)
+    assert job_runner.run_job(reclaimed, "new-worker") == "done"
+
+
+def test_stale_worker_cannot_overwrite_result(pending_item):
+    """A worker whose lease was taken over cannot complete or fail the job."""
+    job = jobs.claim("slow-worker", lease_seconds=60)
+    with db.connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET lease_expires_at = ? WHERE id = ?",
+            (time.time() - 1, job["id"]),
+        )
+        conn.commit()
+    reclaimed = jobs.claim("new-worker", lease_seconds=60)
+    assert jobs.complete(reclaimed["id"], "new-worker", "fresh text")
+
+    assert not jobs.complete(job["id"], "slow-worker", "stale text")
+    assert jobs.fail(job["id"], "slow-worker", "timed out") == "lost"
+    item = research.get_item_by_id(pending_item)
+    assert (item["status"], item["plain_text"]) == ("ready", "fresh text")
+    assert jobs.get_latest_job_for_item(pending_item)["status"] == "done"
+
+
+def test_idle_claim_does_not_take_write_lock(temp_db, monkeypatch):
+    calls = []
+    monkeypatch.setattr(jobs, "run_write", lambda func: calls.append(func))
+    assert jobs.claim("idle-worker", lease_seconds=60) is None
+    assert calls == []
+
+
+def test_worker_pool_runs_queued_jobs(pending_item, monkeypatch):
+    monkeypatch.setitem(
+        job_runner.HANDLERS, "transcribe_audio", lambda job, on_progress: "text"
+    )
+    pool = job_runner.WorkerPool(2)
+    try:
+        pool.notify()
+        deadline = time.time() + 5
+        while research.get_item_by_id(pending_item)["status"] == "pending":
+            assert time.time() < deadline
+            time.sleep(0.01)
+    finally:
+        pool.stop()
+    assert research.get_item_by_id(pending_item)["plain_text"] == "text"
+
+
+def test_upload_creates_pending_item(client, temp_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(blobs, "UPLOAD_DIR", tmp_path / "uploads")
+    business_id = business.create("Acme", "", "company", "")
+    response = client.post(
+        f"/business/{business_id}/research",
+        data={
+            "title": "Report",
+            "type": "document",
+            "file": (io.BytesIO(b"%PDF-1.4"), "report.pdf"),
+        },
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 302
+
+    item = research.get_items_for_business(business_id, "metadata")[0]
+    assert item["status"] == "pending"
+    status = client.get(f"/research/{item['id']}/status").get_json()
+    assert status["status"] == "pending"
+    assert status["job"]["kind"] == "extract_pdf"
+    assert status["job"]["status"] == "queued"
+    assert client.get("/research/999/status").status_code == 404
+
+
+def test_running_job_reports_partial_text(pending_item, client, monkeypatch):
+    seen = {}
+
+    def transcribe(job, on_progress):
+        on_progress(1, 3, "[00:00] Speaker 1: Hello")
+        status = client.get(f"/research/{pending_item}/status").get_json()
+        seen["progress"] = status["job"]["progress"]
+        seen["partial"] = client.get(
+            f"/research/{pending_item}/status?partial=1"
+        ).get_json()["job"]["progress"]
+        return "[00:00] Speaker 1: Hello, and welcome."
+
+    monkeypatch.setitem(job_runner.HANDLERS, "transcribe_audio", transcribe)
+    assert job_runner.run_next() == "done"
+
+    assert seen["progress"] == {"done": 1, "total": 3}
+    assert seen["partial"]["partial_text"] == "[00:00] Speaker 1: Hello"
+    # Finished jobs drop their partial text; the item holds the full text
+    assert jobs.get_progress(jobs.get_latest_job_for_item(pending_item)) is None
+
+
+def test_workers_start_with_the_first_request_not_cli(client, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(job_runner, "WORKERS", 1)
+    monkeypatch.setattr(app_module, "_services_pid", None)
+    runner = app_module.app.test_cli_runner()
+    assert runner.invoke(args=["gc-uploads", "--dry-run"]).exit_code == 0
+    assert job_runner._pool is None
+
+    try:
+        client.get("/")
+        assert job_runner._pool is not None
+    finally:
+        job_runner.stop_workers()
+
+
+def test_url_jobs_do_not_hold_up_file_jobs(temp_db, monkeypatch):
+    release = threading.Event()
+
+    def import_url(job, on_progress):
+        release.wait(5)
+        return "article"
+
+    monkeypatch.setitem(job_runner.HANDLERS, "import_url", import_url)
+    monkeypatch.setitem(
+        job_runner.HANDLERS, "transcribe_audio", lambda job, on_progress: "text"
+    )
+    business_id = business.create("Acme", "", "company", "")
+    for n in range(4):
+        research.create_item(
+            business_id, f"Page {n}", "article", extraction_job="import_url"
+        )
+    # Queued behind the URL jobs, but run by a worker of its own
+    item_id = research.create_item(
+        business_id, "Interview", "interview", extraction_job="transcribe_audio"
+    )
+
+    job_runner.start_workers(size=1, url_size=2)
+    try:
+        deadline = time.time() + 5
+        while research.get_item_by_id(item_id)["status"] == "pending":
+            assert time.time() < deadline
+            time.sleep(0.01)
+        # Both URL workers are busy; neither took the file job
+        while jobs.count_by_status()["running"] < 2:
+            assert time.time() < deadline
+            time.sleep(0.01)
+        assert jobs.count_by_status()["running"] == 2
+    finally:
+        release.set()
+        job_runner.stop_workers()
+    assert research.get_item_by_id(item_id)["plain_text"] == "text"
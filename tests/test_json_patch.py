@@ -0,0 +1,107 @@
+"""Tests for JSON Patch support and PATCH saves of analyses."""
+
+import pytest
+
+from models import analysis, business
+from services.json_patch import JsonPatchError, apply_patch
+
+
+def test_apply_patch_operations():
+    """All RFC 6902 operations apply in order."""
+    document = {"a": {"b": [1, 2]}, "c/d": "x", "e~f": 1}
+    patched = apply_patch(
+        document,
+        [
+            {"op": "add", "path": "/a/b/-", "value": 3},
+            {"op": "add", "path": "/a/b/0", "value": 0},
+            {"op": "replace", "path": "/c~1d", "value": "y"},
+            {"op": "remove", "path": "/e~0f"},
+            {"op": "copy", "from": "/a/b", "path": "/copied"},
+            {"op": "move", "from": "/copied", "path": "/moved"},
+            {"op": "test", "path": "/moved/3", "value": 3},
+        ],
+    )
+    assert patched == {"a": {"b": [0, 1, 2, 3]}, "c/d": "y", "moved": [0, 1, 2, 3]}
+    assert document == {"a": {"b": [1, 2]}, "c/d": "x", "e~f": 1}
+
+
+@pytest.mark.parametrize(
+    "operations",
+    [
+        {"op": "add"},
+        [{"op": "bogus", "path": "/a"}],
+        [{"op": "replace", "path": "/missing", "value": 1}],
+        [{"op": "remove", "path": "/list/5"}],
+        [{"op": "add", "path": "/list/01", "value": 1}],
+        [{"op": "test", "path": "/list/0", "value": "nope"}],
+        [{"op": "move", "from": "/list", "path": "/list/0"}],
+        [{"op": "add", "path": "no-slash", "value": 1}],
+    ],
+)
+def test_apply_patch_rejects_invalid(operations):
+    """Malformed or inapplicable patches raise JsonPatchError."""
+    with pytest.raises(JsonPatchError):
+        apply_patch({"list": [1]}, operations)
+
+
+@pytest.fixture
+def vrio_analysis(temp_db):
+    business_id = business.create("Acme", "", "company", "")
+    analysis_id = analysis.create_analysis(business_id, "vrio", "VRIO")
+    return business_id, analysis_id
+
+
+def _patch(client, business_id, analysis_id, operations, version=None):
+    headers = {"If-Match": f'"{version}"'} if version is not None else {}
+    return client.patch(
+        f"/business/{business_id}/analysis/{analysis_id}",
+        json=operations,
+        headers=headers,
+    )
+
+
+def test_patch_route_applies_and_bumps_version(client, vrio_analysis):
+    """A valid patch is saved and the version increments."""
+    business_id, analysis_id = vrio_analysis
+    resource = {"name": "Brand", "valuable": 5}
+
+    response = _patch(
+        client,
+        business_id,
+        analysis_id,
+        [{"op": "add", "path": "/resources/-", "value": resource}],
+        version=1,
+    )
+
+    assert response.status_code == 200
+    assert response.get_json() == {"success": True, "version": 2}
+    saved = analysis.get_analysis_by_id(analysis_id)
+    assert saved["data"] == {"resources": [resource]}
+    assert saved["version"] == 2
+
+
+def test_patch_route_errors(client, vrio_analysis):
+    """Conflicts, invalid patches and schema violations leave data untouched."""
+    business_id, analysis_id = vrio_analysis
+    add_invalid = [
+        {"op": "add", "path": "/resources/-", "value": {"name": "X", "rare": 9}}
+    ]
+
+    conflict = _patch(client, business_id, analysis_id, [], version=7)
+    assert conflict.status_code == 412
+    assert conflict.get_json()["version"] == 1
+
+    invalid = _patch(client, business_id, analysis_id, add_invalid)
+    assert invalid.status_code == 422
+    assert invalid.get_json()["details"] == ["/resources/0/rare: must be at most 5"]
+
+    bad_path = _patch(
+        client, business_id, analysis_id, [{"op": "remove", "path": "/nope"}]
+    )
+    assert bad_path.status_code == 400
+
+    assert _patch(client, business_id + 1, analysis_id, []).status_code == 404
+
+    saved = analysis.get_analysis_by_id(analysis_id)
+    assert saved["data"] == {"resources": []}
+    assert saved["version"] == 1
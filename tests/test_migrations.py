@@ -0,0 +1,148 @@
+"""Tests for chunked, resumable migrations."""
+
+from contextlib import contextmanager
+
+import pytest
+
+import db
+from db import migrations
+
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    """A version 0 database: analyses without names, plus scenario planning rows."""
+    monkeypatch.setattr(db, "DATABASE_PATH", tmp_path / "legacy.db")
+    db.reset_pool()
+    conn = db.get_db()
+    conn.execute("""
+        CREATE TABLE analyses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            business_id INTEGER NOT NULL,
+            template_type TEXT NOT NULL,
+            data_json TEXT NOT NULL DEFAULT '{}',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(business_id, template_type)
+        )
+    """)
+    conn.close()
+    db.init_db()
+
+    conn = db.get_db()
+    for i in range(5):
+        business_id = conn.execute(
+            "INSERT INTO businesses (name, type) VALUES (?, 'company')", (f"B{i}",)
+        ).lastrowid
+        conn.execute(
+            "INSERT INTO analyses (business_id, template_type) VALUES (?, 'pestel')",
+            (business_id,),
+        )
+        conn.execute(
+            "INSERT INTO scenario_planning (business_id, data_json) VALUES (?, ?)",
+            (business_id, f'{{"n": {i}}}'),
+        )
+    conn.commit()
+    conn.close()
+    yield db.DATABASE_PATH
+    db.reset_pool()
+
+
+def _rows(sql):
+    conn = db.get_db()
+    try:
+        return [dict(row) for row in conn.execute(sql)]
+    finally:
+        conn.close()
+
+
+def test_chunked_migrations_apply(legacy_db):
+    migrations.run_migrations(batch_size=2)
+
+    names = _rows("SELECT name FROM analyses WHERE template_type = 'pestel'")
+    assert [row["name"] for row in names] == ["PESTEL Analysis"] * 5
+    scenarios = _rows(
+        "SELECT data_json FROM analyses WHERE template_type = 'scenario_planning'"
+    )
+    assert len(scenarios) == 5
+    assert _rows("SELECT * FROM migration_progress") == []
+
+
+def test_interrupted_migration_resumes(legacy_db, monkeypatch):
+    """A failure mid-copy keeps committed chunks; the next run picks up after them."""
+    apply_chunk = migrations.BatchedStep.apply_chunk
+    calls = []
+
+    def failing_apply_chunk(self, conn, lo, batch_size):
+        calls.append(lo)
+        if len(calls) == 3:
+            raise RuntimeError("interrupted")
+        return apply_chunk(self, conn, lo, batch_size)
+
+    monkeypatch.setattr(migrations.BatchedStep, "apply_chunk", failing_apply_chunk)
+    with pytest.raises(RuntimeError):
+        migrations.run_migrations(batch_size=2)
+
+    assert _rows("SELECT version, step, cursor FROM migration_progress") == [
+        {"version": 1, "step": 1, "cursor": 4}
+    ]
+    assert len(_rows("SELECT id FROM analyses_new")) == 4
+
+    monkeypatch.setattr(migrations.BatchedStep, "apply_chunk", apply_chunk)
+    migrations.run_migrations(batch_size=2)
+    assert len(_rows("SELECT id FROM analyses WHERE name IS NOT NULL")) == 10
+    assert _rows("SELECT * FROM migration_progress") == []
+
+
+def test_writes_during_copy_survive_the_swap(legacy_db, monkeypatch):
+    """Rows written by the app between chunks are not lost when the tables swap."""
+    transaction = migrations._transaction
+    chunks = []
+
+    @contextmanager
+    def app_writes_between_chunks(conn):
+        chunks.append(conn)
+        if len(chunks) == 3:  # after "create" and the first chunk of 2 rows
+            app = db.get_db()
+            app.execute("UPDATE analyses SET data_json = '{\"v\": 2}' WHERE id = 1")
+            app.execute("DELETE FROM analyses WHERE id = 2")
+            app.execute(
+                "INSERT INTO analyses (business_id, template_type) VALUES (1, 'vrio')"
+            )
+            app.commit()
+            app.close()
+        with transaction(conn):
+            yield
+
+    monkeypatch.setattr(migrations, "_transaction", app_writes_between_chunks)
+    migrations.run_migrations(batch_size=2)
+
+    rows = _rows(
+        "SELECT id, name, data_json FROM analyses WHERE template_type != "
+        "'scenario_planning' ORDER BY id"
+    )
+    assert [row["id"] for row in rows] == [1, 3, 4, 5, 6]
+    assert rows[0]["data_json"] == '{"v": 2}'
+    assert rows[-1]["name"] == "VRIO Analysis"
+    # The mirror triggers went with the old table
+    assert (
+        _rows("SELECT name FROM sqlite_master WHERE name LIKE 'analyses_mirror%'") == []
+    )
+
+
+def test_dry_run_changes_nothing(legacy_db):
+    plan = migrations.plan_migrations(batch_size=2)
+
+    first = plan[0]
+    assert first["name"] == "migration_001_add_analysis_name"
+    assert [(name, rows) for name, rows, _ in first["steps"]] == [
+        ("create analyses_new", None),
+        ("copy analyses", 5),
+        ("swap tables", None),
+    ]
+    assert all(seconds >= 0 for _, _, seconds in first["steps"])
+    # Migration 2 needs migration 1's schema, so only its rows are estimated
+    assert plan[1]["steps"] == [("copy scenario_planning", 5, None)]
+
+    columns = _rows("PRAGMA table_info(analyses)")
+    assert "name" not in [column["name"] for column in columns]
+    assert _rows("SELECT name FROM sqlite_master WHERE name = 'analyses_new'") == []
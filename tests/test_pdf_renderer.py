@@ -0,0 +1,82 @@
+"""Tests for the PDF renderer process pool."""
+
+import os
+import sys
+import time
+import types
+from pathlib import Path
+
+import pytest
+
+from services import pdf_renderer
+
+
+def worker_pid(_=None):
+    return os.getpid()
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+def crash():
+    os._exit(1)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(pdf_renderer, "RENDER_PROCESSES", 1)
+    monkeypatch.setattr(pdf_renderer, "RENDER_MEMORY_MB", 512)
+    yield
+    pdf_renderer.stop_render_pool()
+
+
+def test_jobs_run_in_a_reused_worker(pool):
+    first = pdf_renderer.run(worker_pid)
+    assert first != os.getpid()
+    assert pdf_renderer.run(worker_pid) == first
+    assert pdf_renderer.renderer_stats() == {"processes": 1, "running": True}
+
+
+def test_timeout_kills_the_worker(pool):
+    stuck = pdf_renderer.run(worker_pid)
+    start = time.monotonic()
+    with pytest.raises(pdf_renderer.RenderError, match="longer than 0.5s"):
+        pdf_renderer.run(sleep, 30, timeout=0.5)
+    assert time.monotonic() - start < 5
+    # The next job gets a fresh worker
+    assert pdf_renderer.run(worker_pid) != stuck
+
+
+@pytest.mark.skipif(os.name == "nt", reason="no address space limits")
+def test_memory_cap(pool):
+    assert pdf_renderer.run(allocate, 16) == 16 * 1024 * 1024
+    with pytest.raises(pdf_renderer.RenderError, match="memory"):
+        pdf_renderer.run(allocate, 1024)
+
+
+def test_crashed_worker_is_replaced(pool):
+    with pytest.raises(pdf_renderer.RenderError, match="died"):
+        pdf_renderer.run(crash)
+    assert pdf_renderer.run(sleep, 0) == 0
+
+
+def test_zero_processes_renders_in_process():
+    assert pdf_renderer.run(worker_pid, processes=0) == os.getpid()
+
+
+def test_workers_spawn_when_app_is_the_main_module(pool, monkeypatch):
+    """Spawned workers re-import the main module; under ``python app.py``
+    that is app.py, whose import must not start services of its own."""
+    app_path = Path(__file__).resolve().parent.parent / "app.py"
+    main = types.ModuleType("__main__")
+    main.__file__ = str(app_path)
+    monkeypatch.setitem(sys.modules, "__main__", main)
+    monkeypatch.setenv("PDF_RENDER_PROCESSES", "1")
+
+    assert pdf_renderer.run(worker_pid) != os.getpid()
@@ -0,0 +1,159 @@
+"""Tests for local-first PDF text extraction."""
+
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+import db
+from models import business, jobs, research
+from services import gemini, job_runner, pdf_text
+
+
+def make_pdf(path, pages):
+    """Write a PDF whose pages carry the given text (None for a scanned page)."""
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    for text in pages:
+        page = writer.add_blank_page(width=612, height=792)
+        if text is None:
+            continue
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 11 Tf 72 720 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(stream)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+def page_text(n):
+    return f"Page {n} of the annual report. " * 6
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    """Replace Gemini range extraction; records the ranges it was asked for."""
+    calls = []
+
+    def extract_page_ranges(
+        file_path, ranges, concurrency=None, on_result=None, file_hash=None
+    ):
+        calls.append(list(ranges))
+        results = [None] * len(ranges)
+        for i, (first, last) in enumerate(ranges):
+            results[i] = f"Scanned pages {first}-{last}"
+            if on_result:
+                on_result(results)
+        return results
+
+    monkeypatch.setattr(gemini, "extract_page_ranges", extract_page_ranges)
+    return calls
+
+
+def test_looks_scanned():
+    assert pdf_text.looks_scanned("")
+    assert pdf_text.looks_scanned("Figure 3")
+    assert not pdf_text.looks_scanned(page_text(1))
+    assert pdf_text.looks_scanned("\ufffd" * 200)
+
+
+def test_fallback_ranges_group_contiguous_pages():
+    L, G = pdf_text.LOCAL, pdf_text.GEMINI
+    sources = [L, G, G, G, L, G, L, G, G]
+    assert pdf_text.fallback_ranges(sources, max_pages=2) == [
+        (2, 3),
+        (4, 4),
+        (6, 6),
+        (8, 9),
+    ]
+
+
+def test_born_digital_pdf_never_calls_gemini(tmp_path, fake_gemini):
+    pdf = make_pdf(tmp_path / "report.pdf", [page_text(1), page_text(2)])
+
+    text, result = pdf_text.extract_text(pdf)
+
+    assert fake_gemini == []
+    assert result == {"pages": ["local", "local"]}
+    assert text == f"{page_text(1).strip()}\n\n{page_text(2).strip()}"
+
+
+def test_scanned_pages_fall_back_to_gemini(tmp_path, fake_gemini):
+    pdf = make_pdf(
+        tmp_path / "mixed.pdf", [page_text(1), None, None, page_text(4), None]
+    )
+    progress = []
+
+    text, result = pdf_text.extract_text(
+        pdf, on_progress=lambda *args: progress.append(args)
+    )
+
+    assert fake_gemini == [[(2, 3), (5, 5)]]
+    assert result["pages"] == ["local", "gemini", "gemini", "local", "gemini"]
+    assert text.split("\n\n") == [
+        page_text(1).strip(),
+        "Scanned pages 2-3",
+        page_text(4).strip(),
+        "Scanned pages 5-5",
+    ]
+    assert [(done, total) for done, total, _ in progress] == [(1, 2), (2, 2)]
+    assert "Scanned pages 5-5" not in progress[0][2]
+
+
+@pytest.mark.parametrize(
+    "trailer",
+    [
+        # A /Prev that is not an offset makes pypdf raise TypeError
+        b"/Size 9 /Prev /Garbage",
+        # An incomplete /Encrypt dictionary makes pypdf raise KeyError
+        b"/Size 9 /Encrypt << /Filter /Standard /V 2 /R 3 >>",
+    ],
+)
+def test_corrupt_pdf_falls_back_to_whole_file(
+    tmp_path, monkeypatch, fake_gemini, trailer
+):
+    pdf = make_pdf(tmp_path / "broken.pdf", [page_text(1), page_text(2)])
+    pdf.write_bytes(pdf.read_bytes().replace(b"/Size 9", trailer, 1))
+    calls = []
+
+    def extract_text_from_pdf(file_path, on_progress=None, file_hash=None):
+        calls.append(file_path)
+        return "Whole file"
+
+    monkeypatch.setattr(gemini, "extract_text_from_pdf", extract_text_from_pdf)
+    unreadable = db.get_counters().get("pdf.files_unreadable", 0)
+
+    text, result = pdf_text.extract_text(pdf)
+
+    assert (text, result) == ("Whole file", {"pages": None})
+    assert calls == [pdf]
+    assert fake_gemini == []
+    assert db.get_counters()["pdf.files_unreadable"] == unreadable + 1
+
+
+def test_extraction_job_records_page_sources(temp_db, tmp_path, fake_gemini):
+    pdf = make_pdf(tmp_path / "mixed.pdf", [page_text(1), None])
+    business_id = business.create("Acme", "", "company", "")
+    item_id = research.create_item(
+        business_id,
+        "Report",
+        "document",
+        original_file_path=str(pdf),
+        extraction_job="extract_pdf",
+    )
+
+    assert job_runner.run_next() == "done"
+
+    job = jobs.get_latest_job_for_item(item_id)
+    assert jobs.get_result(job) == {"pages": ["local", "gemini"]}
+    assert research.get_item_by_id(item_id)["plain_text"].endswith("Scanned pages 2-2")
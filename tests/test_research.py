@@ -0,0 +1,113 @@
+"""Tests for the research model."""
+
+import pytest
+
+from models import business, research
+
+
+def _seed(item_count: int) -> int:
+    business_id = business.create("Acme", "", "company", "")
+    for i in range(item_count):
+        item_id = research.create_item(
+            business_id, f"Item {i}", "note", plain_text="alpha beta gamma"
+        )
+        research.create_quote(item_id, 6, 10, "beta")
+        research.create_quote(item_id, 0, 5, "alpha")
+    return business_id
+
+
+def test_get_quotes_for_business_groups_by_item(temp_db):
+    """Quotes are grouped per item and ordered by start offset."""
+    business_id = _seed(2)
+    other_id = _seed(1)
+
+    quotes = research.get_quotes_for_business(business_id)
+
+    items = research.get_items_for_business(business_id)
+    assert set(quotes) == {item["id"] for item in items}
+    for item in items:
+        assert [q["text"] for q in quotes[item["id"]]] == ["alpha", "beta"]
+        assert quotes[item["id"]] == research.get_quotes_for_item(item["id"])
+    assert not set(quotes) & set(research.get_quotes_for_business(other_id))
+
+
+def test_get_quotes_for_business_empty(temp_db):
+    """A business without quotes gets an empty mapping."""
+    business_id = business.create("Empty", "", "company", "")
+    assert research.get_quotes_for_business(business_id) == {}
+
+
+def _selects_for_business_page(client, statements, item_count: int) -> int:
+    business_id = _seed(item_count)
+    statements.clear()
+    response = client.get(f"/business/{business_id}")
+    assert response.status_code == 200
+    return sum(1 for sql in statements if sql.lstrip().upper().startswith("SELECT"))
+
+
+def test_business_page_query_count_is_constant(client, statements):
+    """Rendering the business page does not issue a query per research item."""
+    few = _selects_for_business_page(client, statements, 1)
+    many = _selects_for_business_page(client, statements, 25)
+    assert few == many
+
+
+def test_business_page_does_not_embed_text(client):
+    """Research text is served by its own endpoint, not the business page."""
+    business_id = business.create("Acme", "", "company", "")
+    research.create_item(business_id, "Transcript", "interview", plain_text="secret words")
+
+    page = client.get(f"/business/{business_id}").get_data(as_text=True)
+
+    assert "Transcript" in page
+    assert "secret words" not in page
+
+
+def test_research_text_endpoint_supports_etag(client):
+    """Repeat fetches revalidate to a 304 until the text changes."""
+    business_id = business.create("Acme", "", "company", "")
+    item_id = research.create_item(business_id, "Note", "note", plain_text="hello")
+
+    first = client.get(f"/research/{item_id}/text")
+    assert first.status_code == 200
+    assert first.get_json() == {"id": item_id, "plain_text": "hello"}
+    etag = first.headers["ETag"]
+
+    repeat = client.get(f"/research/{item_id}/text", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+
+    research.update_item(item_id, "Note", "", "hello again")
+    changed = client.get(f"/research/{item_id}/text", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.get_json()["plain_text"] == "hello again"
+
+    assert client.get("/research/999999/text").status_code == 404
+
+
+def test_item_projections(temp_db):
+    """Projections select only their columns; text_length is computed in SQL."""
+    business_id = business.create("Acme", "", "company", "")
+    item_id = research.create_item(business_id, "Note", "note", plain_text="héllo")
+
+    metadata = research.get_item_by_id(item_id, "metadata")
+    assert "plain_text" not in metadata
+    assert metadata["business_id"] == business_id
+    assert metadata["text_length"] == 5
+
+    assert research.get_item_by_id(item_id, "text") == {
+        "id": item_id,
+        "business_id": business_id,
+        "plain_text": "héllo",
+    }
+
+    full = research.get_item_by_id(item_id)
+    assert full["plain_text"] == "héllo" and full["text_length"] == 5
+
+    [listed] = research.get_items_for_business(business_id, "metadata")
+    assert listed == metadata
+
+
+def test_invalid_projection(temp_db):
+    """Unknown projections are rejected."""
+    with pytest.raises(ValueError):
+        research.get_item_by_id(1, "everything")
@@ -1,6 +1,7 @@
 """Tests for the scenario planning model."""
 
 import json
+from contextlib import nullcontext
 from unittest.mock import patch, MagicMock
 from models import scenario_planning
 
@@ -25,7 +26,7 @@ def test_get_scenario_planning_returns_empty_for_new_business():
     mock_db = MagicMock()
     mock_db.execute.return_value.fetchone.return_value = None
 
-    with patch("models.scenario_planning.get_db", return_value=mock_db):
+    with patch("models.scenario_planning.connection", return_value=nullcontext(mock_db)):
         result = scenario_planning.get_scenario_planning(999)
 
     assert result == scenario_planning.get_empty_data()
@@ -45,7 +46,7 @@ def test_get_scenario_planning_returns_existing_data():
         "data_json": json.dumps(test_data)
     }
 
-    with patch("models.scenario_planning.get_db", return_value=mock_db):
+    with patch("models.scenario_planning.connection", return_value=nullcontext(mock_db)):
         result = scenario_planning.get_scenario_planning(1)
 
     assert result == test_data
@@ -64,7 +65,7 @@ def test_save_scenario_planning_inserts_new_data():
 
     mock_db = MagicMock()
 
-    with patch("models.scenario_planning.get_db", return_value=mock_db):
+    with patch("models.scenario_planning.connection", return_value=nullcontext(mock_db)):
         scenario_planning.save_scenario_planning(1, test_data)
 
     mock_db.execute.assert_called_once()
@@ -92,7 +93,7 @@ def test_save_scenario_planning_updates_existing_data():
 
     mock_db = MagicMock()
 
-    with patch("models.scenario_planning.get_db", return_value=mock_db):
+    with patch("models.scenario_planning.connection", return_value=nullcontext(mock_db)):
         scenario_planning.save_scenario_planning(1, test_data)
 
     # Verify upsert SQL is used
@@ -0,0 +1,99 @@
+"""Tests for full-text search over research."""
+
+from models import business, research, search
+
+
+def test_build_match_query_quotes_terms():
+    """User input is reduced to quoted terms with a trailing prefix match."""
+    assert search.build_match_query('pricing "power" OR NEAR(x') == (
+        '"pricing" "power" "OR" "NEAR" "x"*'
+    )
+    assert search.build_match_query("  ?! ") == ""
+
+
+def test_parse_snippet_offsets():
+    """Highlight markers become offsets into the clean snippet."""
+    text, highlights = search.parse_snippet("a \x02big\x03 deal \x02here\x03")
+    assert text == "a big deal here"
+    assert [text[s:e] for s, e in highlights] == ["big", "here"]
+
+
+def test_search_ranks_and_highlights(temp_db):
+    """Items and quotes are searchable and scoped to the business."""
+    business_id = business.create("Acme", "", "company", "")
+    other_id = business.create("Other", "", "company", "")
+    item_id = research.create_item(
+        business_id,
+        "Supplier interview",
+        "interview",
+        plain_text="Suppliers have strong bargaining power over pricing.",
+    )
+    research.create_item(business_id, "Notes", "note", plain_text="Nothing relevant")
+    research.create_item(other_id, "Pricing", "note", plain_text="pricing pricing")
+    quote_id = research.create_quote(item_id, 31, 51, "power over pricing")
+
+    results = search.search_business(business_id, "pricing")
+
+    assert {(r["kind"], r["research_item_id"]) for r in results} == {
+        ("item", item_id),
+        ("quote", item_id),
+    }
+    quote = next(r for r in results if r["kind"] == "quote")
+    assert quote["quote_id"] == quote_id
+    for result in results:
+        assert [
+            result["snippet"][s:e].lower() for s, e in result["highlights"]
+        ] == ["pricing"]
+
+
+def test_search_index_follows_updates_and_deletes(temp_db):
+    """Triggers keep the index in sync with the research tables."""
+    business_id = business.create("Acme", "", "company", "")
+    item_id = research.create_item(business_id, "Memo", "note", plain_text="alpha")
+
+    assert search.search_business(business_id, "alpha")
+    research.update_item(item_id, "Memo", "", "bravo")
+    assert not search.search_business(business_id, "alpha")
+    assert search.search_business(business_id, "bravo")
+
+    research.delete_item(item_id)
+    assert not search.search_business(business_id, "bravo")
+
+
+def test_search_endpoint(client):
+    """The endpoint returns JSON results for the query."""
+    business_id = business.create("Acme", "", "company", "")
+    research.create_item(business_id, "Memo", "note", plain_text="market entry")
+
+    data = client.get(f"/business/{business_id}/search?q=entr").get_json()
+    assert data["query"] == "entr"
+    assert [r["title"] for r in data["results"]] == ["Memo"]
+
+    assert client.get(f"/business/{business_id}/search").get_json()["results"] == []
+
+
+def test_migration_backfills_existing_rows(temp_db):
+    """Rows written before the index existed are searchable after migrating."""
+    import db
+    from db.migrations import run_migrations, set_schema_version
+
+    business_id = business.create("Acme", "", "company", "")
+    conn = db.get_db()
+    # Return the database to its pre-migration state
+    for table in ("research_items", "quotes"):
+        for action in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER {table}_fts_{action}")
+        conn.execute(f"DROP TABLE {table}_fts")
+    conn.execute(
+        "INSERT INTO research_items (business_id, title, item_type, plain_text) "
+        "VALUES (?, 'Legacy', 'note', 'historic transcript')",
+        (business_id,),
+    )
+    set_schema_version(conn, 2)
+    conn.close()
+
+    run_migrations()
+
+    assert [r["title"] for r in search.search_business(business_id, "historic")] == [
+        "Legacy"
+    ]
@@ -0,0 +1,54 @@
+"""Tests for storage profiles and WAL checkpointing."""
+
+import pytest
+
+import db
+from db import storage
+
+
+def _pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def test_production_profile_is_applied_to_connections(temp_db):
+    """New connections run in WAL mode with the tuned settings."""
+    with db.connection() as conn:
+        assert _pragma(conn, "journal_mode") == "wal"
+        assert _pragma(conn, "synchronous") == 1  # NORMAL
+        assert _pragma(conn, "busy_timeout") == 5000
+        assert _pragma(conn, "temp_store") == 2  # MEMORY
+        assert _pragma(conn, "cache_size") == -64 * 1024
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match="Unknown storage profile"):
+        storage.get_profile("turbo")
+
+
+def test_checkpointer_truncates_large_wal(temp_db):
+    """Passive checkpoints leave the WAL in place; over the threshold it is reset."""
+    checkpointer = storage.Checkpointer(
+        temp_db, interval=3600, truncate_bytes=64 * 1024
+    )
+    conn = db.get_db()
+    try:
+        conn.execute("CREATE TABLE filler (payload BLOB)")
+        conn.executemany("INSERT INTO filler VALUES (randomblob(4096))", [()] * 100)
+        conn.commit()
+        assert storage.wal_path(temp_db).stat().st_size > 64 * 1024
+
+        assert checkpointer.checkpoint(conn) == "truncate"
+        assert storage.wal_path(temp_db).stat().st_size == 0
+        assert checkpointer.checkpoint(conn) == "passive"
+        assert checkpointer.stats["truncate"] == 1
+        assert checkpointer.stats["passive"] == 1
+    finally:
+        conn.close()
+        checkpointer.stop()
+
+
+def test_writes_start_the_checkpointer(temp_db):
+    from models import business
+
+    business.create("Acme", "", "company", "")
+    assert storage.storage_stats()["checkpointer_running"] is True
@@ -0,0 +1,82 @@
+"""Tests for cached summary PDF export."""
+
+import pytest
+
+from models import business, summary
+
+
+@pytest.fixture
+def renders(client, tmp_path, monkeypatch):
+    """Count renders; WeasyPrint itself is replaced by a stand-in PDF."""
+    monkeypatch.setattr(summary, "PDF_CACHE_DIR", str(tmp_path / "pdfs"))
+    rendered = []
+
+    def render_pdf(markdown_content):
+        rendered.append(markdown_content)
+        return b"%PDF-1.7 " + markdown_content.encode()
+
+    monkeypatch.setattr(summary, "render_pdf", render_pdf)
+    return rendered
+
+
+def test_unchanged_summary_is_served_from_cache(client, renders):
+    business_id = business.create("Acme", "", "company", "")
+    summary.save_summary(business_id, "# Findings")
+    url = f"/business/{business_id}/summary/pdf"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.data == b"%PDF-1.7 # Findings"
+    assert first.mimetype == "application/pdf"
+    etag = first.headers["ETag"]
+
+    second = client.get(url)
+    assert second.data == first.data
+    assert second.headers["ETag"] == etag
+    assert renders == ["# Findings"]
+
+    revalidated = client.get(url, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+    assert renders == ["# Findings"]
+
+    summary.save_summary(business_id, "# Findings, revised")
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert renders == ["# Findings", "# Findings, revised"]
+
+
+def test_stylesheet_change_invalidates_cache(client, renders, monkeypatch):
+    business_id = business.create("Acme", "", "company", "")
+    summary.save_summary(business_id, "# Findings")
+    first = summary.export_to_pdf(business_id)
+
+    monkeypatch.setattr(summary, "STYLESHEET_VERSION", "next")
+    second = summary.export_to_pdf(business_id)
+    assert first != second
+    assert len(renders) == 2
+
+
+def test_least_recently_exported_pdfs_are_evicted(client, renders, monkeypatch):
+    monkeypatch.setattr(summary, "PDF_CACHE_MAX_BYTES", 70)
+    ids = [business.create(name, "", "company", "") for name in "ABC"]
+    paths = []
+    for business_id in ids:
+        summary.save_summary(business_id, f"# Summary of business {business_id}")
+        paths.append(summary.export_to_pdf(business_id))
+
+    assert [path.exists() for path in paths] == [False, True, True]
+    assert list(summary.pdf_cache_dir().glob("*.tmp")) == []
+
+
+def test_missing_summary_is_an_error(client, renders):
+    business_id = business.create("Acme", "", "company", "")
+    assert client.get(f"/business/{business_id}/summary/pdf").status_code == 400
+    assert client.get("/business/999/summary/pdf").status_code == 404
+
+
+def test_rendered_html_carries_stylesheet():
+    html = summary.render_html("| a | b |\n|---|---|\n| 1 | 2 |")
+    assert summary.STYLESHEET in html
+    assert "<table>" in html
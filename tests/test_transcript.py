@@ -0,0 +1,82 @@
+"""Tests for stitching transcripts of overlapping audio segments."""
+
+import pytest
+
+from services import transcript
+from services.transcript import Segment
+
+
+def test_plan_segments_overlap_and_cover_the_recording():
+    assert transcript.plan_segments(250, 100, 10) == [
+        Segment(0, 100),
+        Segment(90, 190),
+        Segment(180, 250),
+    ]
+    assert transcript.plan_segments(50, 100, 10) == [Segment(0, 50)]
+    with pytest.raises(ValueError):
+        transcript.plan_segments(250, 10, 10)
+
+
+def test_parse_lines():
+    text = (
+        "[01:05] Speaker 1: Hello there.\n"
+        "and welcome.\n"
+        "\n"
+        "[1:01:07] **Alice**: Thanks for having me."
+    )
+    assert transcript.parse_lines(text, Segment(0, 4000)) == [
+        (65, "Speaker 1", "Hello there. and welcome."),
+        (3667, "Alice", "Thanks for having me."),
+    ]
+
+
+def test_timestamps_relative_to_the_segment_are_shifted():
+    lines = transcript.parse_lines("[00:05] Speaker 1: Hi.", Segment(600, 1200))
+    assert lines[0].seconds == 605
+
+
+def test_stitch_drops_the_duplicated_overlap():
+    segments = [Segment(0, 100), Segment(80, 180)]
+    first = (
+        "[00:10] Speaker 1: Opening remarks.\n"
+        "[01:25] Speaker 1: This sentence is in the overlap.\n"
+        "[01:35] Speaker 2: So is this one, near the end."
+    )
+    second = (
+        "[01:25] Speaker 1: This sentence is in the overlap.\n"
+        "[01:35] Speaker 2: So is this one near the end.\n"
+        "[02:30] Speaker 2: Closing remarks."
+    )
+    lines = transcript.stitch(segments, [first, second], overlap=20)
+    assert [line.text for line in lines] == [
+        "Opening remarks.",
+        "This sentence is in the overlap.",
+        "So is this one near the end.",
+        "Closing remarks.",
+    ]
+
+
+def test_stitch_keeps_speaker_labels_consistent():
+    """The second segment numbered its speakers the other way around."""
+    segments = [Segment(0, 100), Segment(80, 180)]
+    first = (
+        "[00:10] Speaker 1: What does the company sell?\n"
+        "[01:22] Speaker 2: Mostly industrial pumps and valves.\n"
+        "[01:28] Speaker 1: And who buys them?"
+    )
+    second = (
+        "[01:22] Speaker 1: Mostly industrial pumps and valves.\n"
+        "[01:28] Speaker 2: And who buys them?\n"
+        "[01:40] Speaker 1: Municipal water utilities.\n"
+        "[02:00] Speaker 3: Sorry to interrupt.\n"
+        "[02:10] Dr. Chen: Let me add something."
+    )
+    lines = transcript.stitch(segments, [first, second], overlap=20)
+    assert [(line.speaker, line.text) for line in lines[-3:]] == [
+        ("Speaker 2", "Municipal water utilities."),
+        ("Speaker 3", "Sorry to interrupt."),
+        ("Dr. Chen", "Let me add something."),
+    ]
+    assert transcript.render(lines[:1]) == (
+        "[00:10] Speaker 1: What does the company sell?"
+    )
@@ -0,0 +1,164 @@
+"""Tests for garbage collection of orphaned upload files."""
+
+import io
+import os
+import time
+
+import pytest
+
+from models import blobs, business, research, uploads
+from services import upload_gc
+
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def upload_dir(temp_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(blobs, "UPLOAD_DIR", tmp_path / "uploads")
+    blobs.UPLOAD_DIR.mkdir()
+    return blobs.UPLOAD_DIR
+
+
+def write(path, data=b"data", age=0.0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def age_quarantine(upload_dir, seconds):
+    for path in (upload_dir / upload_gc.QUARANTINE).rglob("*"):
+        if path.is_file():
+            stamp = path.stat().st_mtime - seconds
+            os.utime(path, (stamp, stamp))
+
+
+def test_legacy_orphans_are_quarantined_then_deleted(upload_dir):
+    kept_id = business.create("Acme", "", "company", "")
+    gone_id = business.create("Gone", "", "company", "")
+    referenced = write(upload_dir / str(kept_id) / "deck.pdf", age=2 * DAY)
+    research.create_item(
+        kept_id, "Deck", "document", original_file_path=str(referenced)
+    )
+    fresh = write(upload_dir / str(kept_id) / "new.pdf")
+    write(upload_dir / str(kept_id) / "old.pdf", b"x" * 10, age=2 * DAY)
+    write(upload_dir / str(gone_id) / "summary.pdf", b"y" * 5, age=2 * DAY)
+    business.delete(gone_id)
+
+    report = upload_gc.collect()
+    assert (report["scanned"], report["quarantined"]) == (4, 2)
+    assert report["bytes_reclaimed"] == 0
+    assert referenced.exists() and fresh.exists()
+    assert not (upload_dir / str(gone_id)).exists()
+    quarantined = upload_dir / upload_gc.QUARANTINE / str(kept_id) / "old.pdf"
+    assert quarantined.read_bytes() == b"x" * 10
+
+    # Deleted only once they have sat in quarantine for the grace period
+    assert upload_gc.collect()["deleted"] == 0
+    age_quarantine(upload_dir, 2 * DAY)
+    report = upload_gc.collect()
+    assert (report["deleted"], report["bytes_reclaimed"]) == (2, 15)
+    assert not quarantined.exists()
+
+
+def test_quarantined_file_referenced_again_is_restored(upload_dir):
+    business_id = business.create("Acme", "", "company", "")
+    path = write(upload_dir / str(business_id) / "notes.pdf", age=2 * DAY)
+    assert upload_gc.collect()["quarantined"] == 1
+    assert not path.exists()
+
+    research.create_item(business_id, "Notes", "document", original_file_path=str(path))
+    age_quarantine(upload_dir, 2 * DAY)
+    report = upload_gc.collect()
+    assert (report["restored"], report["deleted"]) == (1, 0)
+    assert path.read_bytes() == b"data"
+
+
+def test_unreferenced_blobs_are_collected_after_grace(upload_dir):
+    business_id = business.create("Acme", "", "company", "")
+    used = blobs.store(io.BytesIO(b"in use"), "a.pdf")
+    unused = blobs.store(io.BytesIO(b"no longer used"), "b.pdf")
+    research.create_item(business_id, "A", "document", blob_sha256=used["sha256"])
+    item_id = research.create_item(
+        business_id, "B", "document", blob_sha256=unused["sha256"]
+    )
+    research.delete_item(item_id)
+    for blob in (used, unused):
+        stamp = time.time() - 2 * DAY
+        os.utime(blobs.path_for(blob), (stamp, stamp))
+
+    # The blob row was touched just now, so it is still within its grace period
+    assert upload_gc.collect()["quarantined"] == 0
+
+    report = upload_gc.collect(grace=0)
+    assert report["quarantined"] == 1
+    assert blobs.get(unused["sha256"]) is None
+    assert not blobs.path_for(unused).exists()
+    assert blobs.path_for(used).exists()
+
+    report = upload_gc.collect(grace=0)
+    assert (report["deleted"], report["bytes_reclaimed"]) == (1, 14)
+
+
+def test_dry_run_moves_nothing(upload_dir):
+    business_id = business.create("Acme", "", "company", "")
+    path = write(upload_dir / str(business_id) / "old.pdf", age=2 * DAY)
+    stale = write(upload_dir / upload_gc.STAGING / "tmpabc", age=2 * DAY)
+    other = write(upload_dir / "README", age=2 * DAY)
+    orphans = []
+
+    report = upload_gc.collect(
+        dry_run=True, on_orphan=lambda path, size: orphans.append(path)
+    )
+    assert report["quarantined"] == 2
+    assert orphans == [f"{business_id}/old.pdf", "tmp/tmpabc"]
+    assert path.exists() and stale.exists() and other.exists()
+
+
+def test_incremental_passes_resume_from_cursor(upload_dir):
+    names = [f"{n}/file.pdf" for n in range(1, 6)]
+    for name in names:
+        write(upload_dir / name, age=2 * DAY)
+
+    seen, passes, cursor = [], [], ""
+    for _ in range(3):
+        report = upload_gc.collect(
+            after=cursor, limit=2, on_orphan=lambda path, size: seen.append(path)
+        )
+        cursor = report["cursor"]
+        passes.append((report["scanned"], cursor))
+    assert passes == [(2, "2/file.pdf"), (2, "4/file.pdf"), (1, "")]
+    assert seen == names
+    assert [
+        "/".join(parts) for parts in upload_gc.iter_files(upload_dir, ("2",))
+    ] == []  # everything was quarantined, and quarantine is not walked
+
+
+def test_gc_uploads_command(upload_dir):
+    from app import app
+
+    business_id = business.create("Acme", "", "company", "")
+    write(upload_dir / str(business_id) / "old.pdf", b"z" * 7, age=2 * DAY)
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["gc-uploads", "--dry-run"])
+    assert result.exit_code == 0
+    assert f"{business_id}/old.pdf" in result.output
+    assert "Would have quarantined 1 of 1 files" in result.output
+
+    runner.invoke(args=["gc-uploads"])
+    result = runner.invoke(args=["gc-uploads", "--grace-hours", "0"])
+    assert "reclaiming 7 bytes" in result.output
+
+
+def test_idle_resumable_upload_expires(upload_dir):
+    business_id = business.create("Acme", "", "company", "")
+    upload = uploads.create(business_id, "talk.mp3", 100)
+    part = uploads.part_path(upload)
+    stamp = time.time() - 2 * DAY
+    os.utime(part, (stamp, stamp))
+
+    assert upload_gc.collect()["quarantined"] == 1
+    assert uploads.get(upload["id"]) is None
+    assert not part.exists()
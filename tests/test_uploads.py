@@ -0,0 +1,176 @@
+"""Tests for chunked, resumable uploads."""
+
+import base64
+import hashlib
+import io
+import threading
+
+import pytest
+
+from models import blobs, business, jobs, research, uploads
+
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 40
+OCTETS = "application/offset+octet-stream"
+
+
+@pytest.fixture
+def business_id(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(blobs, "UPLOAD_DIR", tmp_path / "uploads")
+    return business.create("Acme", "", "company", "")
+
+
+def start(client, business_id, filename="report.pdf", length=len(PDF)):
+    response = client.post(
+        f"/business/{business_id}/uploads",
+        json={"filename": filename, "length": length},
+    )
+    assert response.status_code == 201
+    assert response.headers["Location"] == response.get_json()["url"]
+    return response.get_json()["url"]
+
+
+def patch(client, url, offset, data, checksum=None):
+    headers = {"Upload-Offset": str(offset), "Content-Type": OCTETS}
+    if checksum:
+        headers["Upload-Checksum"] = checksum
+    return client.patch(url, data=data, headers=headers)
+
+
+def sha256_header(data):
+    return "sha256 " + base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def test_chunked_upload_becomes_research_item(client, business_id):
+    url = start(client, business_id)
+    for offset in range(0, len(PDF), 4000):
+        chunk = PDF[offset : offset + 4000]
+        response = patch(client, url, offset, chunk, sha256_header(chunk))
+        assert response.status_code == 204
+        assert response.headers["Upload-Offset"] == str(offset + len(chunk))
+
+    response = client.post(f"{url}/complete", data={"title": "Big", "type": "document"})
+    assert response.status_code == 201
+    item_id = response.get_json()["item_id"]
+
+    item = research.get_item_by_id(item_id, "metadata")
+    assert item["status"] == "pending"
+    blob = blobs.get(item["blob_sha256"])
+    assert blob["sha256"] == hashlib.sha256(PDF).hexdigest()
+    assert blobs.path_for(blob).read_bytes() == PDF
+    assert jobs.get_latest_job_for_item(item_id)["kind"] == "extract_pdf"
+    # The upload is gone once complete
+    assert client.head(url).status_code == 404
+
+
+def test_resume_from_reported_offset(client, business_id):
+    url = start(client, business_id)
+    assert patch(client, url, 0, PDF[:1000]).status_code == 204
+
+    # A retry of a chunk that already landed is told where the upload is
+    conflict = patch(client, url, 0, PDF[:1000])
+    assert conflict.status_code == 409
+    assert conflict.headers["Upload-Offset"] == "1000"
+
+    head = client.head(url)
+    assert head.status_code == 200
+    assert head.headers["Upload-Offset"] == "1000"
+    assert head.headers["Upload-Length"] == str(len(PDF))
+    assert patch(client, url, 1000, PDF[1000:]).status_code == 204
+
+    response = client.post(
+        f"{url}/complete", json={"title": "Resumed", "type": "document"}
+    )
+    item = research.get_item_by_id(response.get_json()["item_id"], "metadata")
+    assert blobs.path_for(blobs.get(item["blob_sha256"])).read_bytes() == PDF
+
+
+def test_bad_checksum_keeps_offset(client, business_id):
+    url = start(client, business_id)
+    response = patch(client, url, 0, PDF[:1000], sha256_header(b"something else"))
+    assert response.status_code == 460
+    assert client.get(url).get_json()["offset"] == 0
+
+    response = patch(client, url, 0, PDF[:1000], "crc32 AAAA")
+    assert response.status_code == 400
+    assert (
+        patch(client, url, 0, PDF[:1000], sha256_header(PDF[:1000])).status_code == 204
+    )
+
+
+def test_chunk_is_written_before_the_offset_advances(business_id, monkeypatch):
+    upload = uploads.create(business_id, "report.pdf", len(PDF))
+    part = uploads.part_path(upload)
+    sizes = []
+    run_write = uploads.run_write
+
+    def recording_run_write(func):
+        sizes.append(part.stat().st_size)
+        return run_write(func)
+
+    monkeypatch.setattr(uploads, "run_write", recording_run_write)
+    updated = uploads.append(upload["id"], 0, io.BytesIO(PDF[:1000]))
+    # The file copy is done by the time the writer runs the update
+    assert sizes == [1000]
+    assert updated["bytes_received"] == 1000
+
+
+def test_racing_chunks_at_one_offset(business_id):
+    upload = uploads.create(business_id, "report.pdf", len(PDF))
+    barrier = threading.Barrier(4)
+    outcomes = []
+
+    def send(data):
+        barrier.wait()
+        try:
+            uploads.append(upload["id"], 0, io.BytesIO(data))
+            outcomes.append("appended")
+        except uploads.OffsetMismatchError as e:
+            outcomes.append(e.offset)
+
+    threads = [
+        threading.Thread(target=send, args=(PDF[:n],)) for n in (100, 200, 300, 400)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    received = uploads.get(upload["id"])["bytes_received"]
+    assert sorted(outcomes, key=str) == [received] * 3 + ["appended"]
+    assert uploads.part_path(upload).read_bytes() == PDF[:received]
+
+
+def test_chunk_past_declared_length_is_refused(client, business_id):
+    url = start(client, business_id, length=10)
+    assert patch(client, url, 0, b"x" * 11).status_code == 400
+    assert client.get(url).get_json()["offset"] == 0
+
+
+def test_incomplete_upload_cannot_complete(client, business_id):
+    url = start(client, business_id)
+    patch(client, url, 0, PDF[:10])
+    response = client.post(f"{url}/complete", data={"title": "Early", "type": "note"})
+    assert response.status_code == 409
+    assert research.get_items_for_business(business_id, "metadata") == []
+
+
+def test_uploads_validation_and_cancel(client, business_id):
+    response = client.post(
+        f"/business/{business_id}/uploads", json={"filename": "a.pdf", "length": 0}
+    )
+    assert response.status_code == 400
+    response = client.post(
+        "/business/999/uploads", json={"filename": "a.pdf", "length": 1}
+    )
+    assert response.status_code == 404
+
+    url = start(client, business_id)
+    assert (
+        client.patch(url, data=b"x", headers={"Upload-Offset": "0"}).status_code == 415
+    )
+    upload_id = url.rsplit("/", 1)[1]
+    part = uploads.part_path({"id": upload_id})
+    assert part.exists()
+    assert client.delete(url).status_code == 204
+    assert not part.exists()
+    assert client.get(url).status_code == 404
@@ -0,0 +1,169 @@
+"""Tests for the conditional URL fetch cache and refreshing URL research."""
+
+import pytest
+
+import db
+
+from models import business, jobs, research, search
+from services import bulk_import, extractor, job_runner
+from services.cache import DiskCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DiskCache(tmp_path / "url_cache.db", max_bytes=1024 * 1024)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def extract_calls(monkeypatch):
+    """Count trafilatura extractions."""
+    calls = []
+    extract_article = extractor.extract_article
+
+    def counted(html):
+        calls.append(html)
+        return extract_article(html)
+
+    monkeypatch.setattr(extractor, "extract_article", counted)
+    return calls
+
+
+def test_not_modified_skips_extraction(article_server, cache, extract_calls):
+    article_server.validators = True
+    article_server.add_article("/pumps", "Pump market")
+    url = article_server.url("/pumps")
+
+    article, changed = extractor.fetch_article(url, cache)
+    assert changed and "Pump market" in article["text"]
+
+    again, changed = extractor.fetch_article(url, cache)
+    assert not changed
+    assert again["text"] == article["text"]
+    assert article_server.statuses == [200, 304]
+    assert len(extract_calls) == 1
+
+    article_server.add_article("/pumps", "Valve market")
+    updated, changed = extractor.fetch_article(url, cache)
+    assert changed and "Valve market" in updated["text"]
+    assert len(extract_calls) == 2
+
+
+def test_identical_body_without_validators_skips_extraction(
+    article_server, cache, extract_calls
+):
+    article_server.add_article("/pumps", "Pump market")
+    url = article_server.url("/pumps")
+
+    extractor.fetch_article(url, cache)
+    _, changed = extractor.fetch_article(url, cache)
+
+    assert not changed
+    assert article_server.statuses == [200, 200]
+    assert len(extract_calls) == 1
+
+
+def test_expired_entries_are_fetched_in_full(
+    article_server, cache, extract_calls, monkeypatch
+):
+    article_server.validators = True
+    article_server.add_article("/pumps", "Pump market")
+    url = article_server.url("/pumps")
+    extractor.fetch_article(url, cache)
+
+    monkeypatch.setattr(extractor, "URL_CACHE_TTL", -1)
+    _, changed = extractor.fetch_article(url, cache)
+
+    assert changed
+    assert article_server.statuses == [200, 200]
+
+
+def test_failed_download(article_server, cache):
+    assert extractor.fetch_article(article_server.url("/missing"), cache) == (
+        None,
+        False,
+    )
+    assert extractor.extract_from_url(article_server.url("/missing"), cache) == ""
+
+
+def test_refresh_updates_only_changed_pages(temp_db, article_server, cache):
+    article_server.validators = True
+    business_id = business.create("Acme", "", "company", "")
+    ids = {}
+    for path in ("/a", "/b"):
+        article_server.add_article(path, f"Story {path}")
+        url = article_server.url(path)
+        ids[path] = research.create_item(
+            business_id,
+            f"My title {path}",
+            "article",
+            source_reference=url,
+            plain_text=extractor.extract_from_url(url, cache),
+        )
+    research.create_item(business_id, "Book", "note", source_reference="ISBN 123")
+    unsourced = research.create_item(business_id, "Call notes", "note")
+    with db.connection() as conn:
+        conn.execute(
+            "UPDATE research_items SET source_reference = NULL WHERE id = ?",
+            (unsourced,),
+        )
+        conn.commit()
+
+    article_server.add_article("/b", "Rewritten story")
+    results = bulk_import.refresh_business(business_id, cache)
+
+    statuses = {result["item_id"]: result["status"] for result in results}
+    assert statuses == {ids["/a"]: "unchanged", ids["/b"]: "updated"}
+    item = research.get_item_by_id(ids["/b"])
+    assert item["title"] == "My title /b"
+    assert "Rewritten story" in item["plain_text"]
+    assert article_server.statuses.count(304) == 1
+
+
+def test_refresh_endpoint(client, article_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(extractor, "URL_CACHE_PATH", str(tmp_path / "urls.db"))
+    business_id = business.create("Acme", "", "company", "")
+    article_server.add_article("/a", "Story")
+    item_id = research.create_item(
+        business_id,
+        "Story",
+        "article",
+        source_reference=article_server.url("/a"),
+        plain_text="old text",
+    )
+
+    response = client.post(f"/business/{business_id}/research/refresh")
+
+    assert response.status_code == 302
+    assert article_server.requests == []
+    assert job_runner.run_next() == "done"
+    item = research.get_item_by_id(item_id)
+    assert item["status"] == "ready"
+    assert "discussed at length" in item["plain_text"]
+    job = jobs.get_latest_job_for_item(item_id)
+    assert jobs.get_result(job)["status"] == "updated"
+
+    # An unchanged page does not write the item (or reindex it, or touch
+    # its business) at all
+    stamp = "2000-01-01 00:00:00"
+    with db.connection() as conn:
+        conn.execute("UPDATE research_items SET updated_at = ?", (stamp,))
+        conn.execute("UPDATE businesses SET updated_at = ?", (stamp,))
+        conn.commit()
+    client.post(f"/business/{business_id}/research/refresh")
+    assert job_runner.run_next() == "done"
+    job = jobs.get_latest_job_for_item(item_id)
+    assert jobs.get_result(job)["status"] == "unchanged"
+    unchanged = research.get_item_by_id(item_id)
+    assert (unchanged["plain_text"], unchanged["updated_at"]) == (
+        item["plain_text"],
+        stamp,
+    )
+    assert business.get_by_id(business_id)["updated_at"] == stamp
+    assert (
+        search.search_business(business_id, "discussed")[0]["research_item_id"]
+        == item_id
+    )
+    assert client.post("/business/999/research/refresh").status_code == 404
+    monkeypatch.setattr(extractor, "_url_cache", None)
@@ -0,0 +1,74 @@
+"""Tests for skipping saves of unchanged analysis and summary content."""
+
+import db
+from models import analysis, business, summary
+
+
+def _counter(name: str) -> int:
+    return db.get_counters().get(name, 0)
+
+
+def test_unchanged_analysis_save_is_elided(temp_db):
+    """Re-saving identical data keeps the version and counts an elided write."""
+    business_id = business.create("Acme", "", "company", "")
+    analysis_id = analysis.create_analysis(business_id, "vrio", "VRIO")
+    data = {"resources": [{"name": "Brand", "valuable": 4}]}
+    elided = _counter("elided_writes.analysis")
+
+    assert analysis.save_analysis_by_id(analysis_id, data) == 2
+    assert analysis.save_analysis_by_id(analysis_id, data) == 2
+    assert _counter("elided_writes.analysis") == elided + 1
+
+    # A patch that changes nothing is elided too
+    assert (
+        analysis.patch_analysis(
+            analysis_id,
+            business_id,
+            [{"op": "replace", "path": "/resources/0/valuable", "value": 4}],
+        )
+        == 2
+    )
+    assert _counter("elided_writes.analysis") == elided + 2
+
+    assert analysis.save_analysis_by_id(analysis_id, {"resources": []}) == 3
+    assert analysis.save_analysis_by_id(999, data) is None
+
+    # The legacy save-by-type path counts its elided writes as well
+    saved_id = analysis.save_analysis(business_id, "vrio", {"resources": []})
+    assert saved_id == analysis_id
+    assert _counter("elided_writes.analysis") == elided + 3
+    assert analysis.get_analysis_by_id(analysis_id)["version"] == 3
+
+
+def test_unchanged_summary_save_is_elided(temp_db):
+    """Re-saving identical markdown does not touch the row."""
+    business_id = business.create("Acme", "", "company", "")
+    elided = _counter("elided_writes.summary")
+
+    summary_id = summary.save_summary(business_id, "# Draft")
+    with db.connection() as conn:
+        conn.execute(
+            "UPDATE summaries SET updated_at = '2000-01-01 00:00:00' WHERE id = ?",
+            (summary_id,),
+        )
+        conn.commit()
+
+    assert summary.save_summary(business_id, "# Draft") == summary_id
+    assert summary.get_summary(business_id)["updated_at"] == "2000-01-01 00:00:00"
+    assert _counter("elided_writes.summary") == elided + 1
+
+    summary.save_summary(business_id, "# Final")
+    saved = summary.get_summary(business_id)
+    assert saved["markdown_content"] == "# Final"
+    assert saved["updated_at"] != "2000-01-01 00:00:00"
+
+
+def test_stats_endpoint_reports_counters(client):
+    """The /stats endpoint exposes the elided write counters."""
+    business_id = business.create("Acme", "", "company", "")
+    summary.save_summary(business_id, "same")
+    summary.save_summary(business_id, "same")
+
+    data = client.get("/stats").get_json()
+    assert data["counters"]["elided_writes.summary"] >= 1
+    assert "connects" in data["db_pool"]
@@ -0,0 +1,158 @@
+"""Tests for the single-writer group-commit queue."""
+
+import sqlite3
+import threading
+
+import pytest
+
+import db
+from db import writer
+from models import business
+
+
+def test_concurrent_writes_share_batches(temp_db):
+    """Writes submitted together all commit, in fewer transactions than writes."""
+    queue = writer.WriteQueue(temp_db, max_batch_latency=0.05, max_batch_size=100)
+    futures = [
+        queue.submit(
+            lambda conn, i: (
+                conn.execute(
+                    "INSERT INTO businesses (name, type) VALUES (?, 'company')",
+                    (f"Business {i}",),
+                ).lastrowid
+            ),
+            i,
+        )
+        for i in range(20)
+    ]
+    ids = [future.result(timeout=5) for future in futures]
+    queue.stop()
+
+    assert len(set(ids)) == 20
+    assert queue.stats["writes"] == 20
+    assert queue.stats["batches"] < 20
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM businesses").fetchone()[0] == 20
+
+
+def test_failed_write_does_not_affect_its_batch(temp_db):
+    """A failing write rolls back alone and its exception reaches the caller."""
+    queue = writer.WriteQueue(temp_db, max_batch_latency=0.05, max_batch_size=100)
+
+    def insert(conn, name):
+        conn.execute(
+            "INSERT INTO businesses (name, type) VALUES (?, 'company')",
+            (name,),
+        )
+
+    def insert_then_fail(conn):
+        insert(conn, "Rolled back")
+        raise ValueError("boom")
+
+    first = queue.submit(insert, "First")
+    failing = queue.submit(insert_then_fail)
+    last = queue.submit(insert, "Last")
+    first.result(timeout=5)
+    last.result(timeout=5)
+    with pytest.raises(ValueError, match="boom"):
+        failing.result(timeout=5)
+    queue.stop()
+
+    assert queue.stats["failed"] == 1
+    with db.connection() as conn:
+        names = [row["name"] for row in conn.execute("SELECT name FROM businesses")]
+    assert names == ["First", "Last"]
+
+
+class BrokenDiskConnection(sqlite3.Connection):
+    """A connection whose COMMIT and ROLLBACK fail, as after SQLITE_IOERR."""
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT":
+            raise sqlite3.OperationalError("disk I/O error")
+        if sql == "ROLLBACK":
+            raise sqlite3.OperationalError("cannot rollback - no transaction is active")
+        return super().execute(sql, *args)
+
+
+def insert_business(conn, name):
+    conn.execute("INSERT INTO businesses (name, type) VALUES (?, 'company')", (name,))
+
+
+def test_failed_rollback_fails_only_its_batch(temp_db, monkeypatch):
+    """A batch whose ROLLBACK fails errors out and the writer keeps going."""
+    connect = writer.WriteQueue._connect
+    connections = []
+
+    def flaky_connect(self):
+        if not connections:
+            conn = sqlite3.connect(
+                temp_db, check_same_thread=False, factory=BrokenDiskConnection
+            )
+            conn.isolation_level = None
+        else:
+            conn = connect(self)
+        connections.append(conn)
+        return conn
+
+    monkeypatch.setattr(writer.WriteQueue, "_connect", flaky_connect)
+    queue = writer.WriteQueue(temp_db, max_batch_latency=0, max_batch_size=100)
+
+    with pytest.raises(sqlite3.OperationalError, match="disk I/O error"):
+        queue.submit(insert_business, "Lost").result(timeout=5)
+    queue.submit(insert_business, "Kept").result(timeout=5)
+    queue.stop()
+
+    assert len(connections) == 2
+    assert queue.stats["failed"] == 1
+    with db.connection() as conn:
+        names = [row["name"] for row in conn.execute("SELECT name FROM businesses")]
+    assert names == ["Kept"]
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_dead_writer_raises_instead_of_blocking(temp_db, monkeypatch):
+    """Once the writer thread is gone, writes fail fast and a new writer starts."""
+    connect = writer.WriteQueue._connect
+    broken = [True]
+
+    def broken_connect(self):
+        if broken[0]:
+            raise sqlite3.OperationalError("unable to open database file")
+        return connect(self)
+
+    monkeypatch.setattr(writer.WriteQueue, "_connect", broken_connect)
+    queue = writer.WriteQueue(temp_db, max_batch_latency=0, max_batch_size=100)
+    queue._thread.join(5)
+
+    assert not queue.is_alive()
+    with pytest.raises(RuntimeError):
+        queue.submit(insert_business, "Never queued")
+
+    broken[0] = False
+    writer.stop_writer()
+    writer._writer = queue
+    writer.run_write(insert_business, "Acme")
+    assert writer.get_writer() is not queue
+    assert [b["name"] for b in business.get_all()] == ["Acme"]
+
+
+def test_model_writes_from_many_threads(temp_db):
+    """Model writes from concurrent threads are all committed by the writer."""
+    errors = []
+
+    def create(i):
+        try:
+            business.create(f"Business {i}", "", "company", "")
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=create, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(business.get_all()) == 16
+    assert writer.writer_stats()["writes"] >= 16